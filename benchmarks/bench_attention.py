@@ -0,0 +1,98 @@
+"""Latency and peak memory of LSTMWithAttention inference at batch sizes 1, 32 and 1024.
+
+Run from the repository root:  python benchmarks/bench_attention.py [--aot]
+
+Variants: the original repeat+cat attention, the split projection, the torch.export program
+and (with --aot, which takes about a minute to compile) the AOTInductor package. Each
+variant/batch pair runs in a fresh interpreter so its peak RSS growth is measured in isolation.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stocksense.config import HIDDEN_SIZE, LOOKBACK  # noqa: E402
+from stocksense.lstm import LSTMWithAttention, export_lstm, load_exported_lstm  # noqa: E402
+
+BATCH_SIZES = [1, 32, 1024]
+
+
+class RepeatCatAttention(LSTMWithAttention):
+    """The attention as originally written, for comparison"""
+    def attention(self, hidden, outputs):
+        seq_len = outputs.size(1)
+        hidden = hidden.unsqueeze(1).repeat(1, seq_len, 1)
+        energy = torch.tanh(self.attn_w(torch.cat((hidden, outputs), dim=2)))
+        weights = torch.softmax(torch.matmul(energy, self.attn_v), dim=1)
+        return torch.bmm(weights.unsqueeze(1), outputs).squeeze(1)
+
+
+def load_variant(variant, state_path, export_dir):
+    if variant in ("repeat_cat", "split"):
+        model = (RepeatCatAttention if variant == "repeat_cat" else LSTMWithAttention)(1, HIDDEN_SIZE)
+        model.load_state_dict(torch.load(state_path))
+        return model.eval()
+    return load_exported_lstm(os.path.join(export_dir, f"{variant}.pt2"), aot=variant == "aot")
+
+
+def run_child(variant, batch, state_path, export_dir):
+    torch.manual_seed(0)
+    model = load_variant(variant, state_path, export_dir)
+    x = torch.randn(batch, LOOKBACK, 1)
+    with torch.inference_mode():
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        model(x)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+        n = max(3, 2000 // batch)
+        start = time.perf_counter()
+        for _ in range(n):
+            out = model(x)
+        latency = (time.perf_counter() - start) / n
+    print(json.dumps({"latency": latency, "peak_kb": peak, "checksum": float(out.sum())}))
+
+
+def measure(variant, batch, state_path, export_dir):
+    # ru_maxrss is a high-water mark, so each measurement needs a fresh process
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", variant, str(batch), state_path, export_dir]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--aot", action="store_true", help="Also benchmark the AOTInductor package")
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        variant, batch, state_path, export_dir = args.child
+        run_child(variant, int(batch), state_path, export_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = LSTMWithAttention(1, HIDDEN_SIZE).eval()
+        state_path = os.path.join(tmp, "state.pt")
+        torch.save(model.state_dict(), state_path)
+        variants = ["repeat_cat", "split", "export"]
+        export_lstm(model, os.path.join(tmp, "export.pt2"))
+        if args.aot:
+            export_lstm(model, os.path.join(tmp, "aot.pt2"), aot=True)
+            variants.append("aot")
+
+        print(f"lookback {LOOKBACK}, hidden {HIDDEN_SIZE}, {torch.get_num_threads()} torch threads")
+        for batch in BATCH_SIZES:
+            results = {v: measure(v, batch, state_path, tmp) for v in variants}
+            reference = results["repeat_cat"]["checksum"]
+            for variant, r in results.items():
+                print(f"batch {batch:>5}  {variant:<10}  {r['latency'] * 1e3:9.3f} ms  "
+                      f"peak +{r['peak_kb'] / 1024:7.1f} MiB  |checksum diff| {abs(r['checksum'] - reference):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compiled CompactForest versus the sklearn RandomForest it was built from: size, peak memory and speed.
+
+Run from the repository root:  python benchmarks/bench_forest.py [--rows 1250 --repeat 5]
+
+The forest is trained by train_rf on indicator features of a synthetic price series. Batches are
+one row (the recommendation), the full history (the backtest signal pass) and a 10x tiled history.
+forest_predict_proba is what the app calls: the compiled forest up to COMPACT_RF_MAX_ROWS rows, sklearn above.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stocksense.forest import compile_forest, forest_predict_proba, train_rf  # noqa: E402
+from stocksense.indicators import create_labels, fused_indicators  # noqa: E402
+
+
+def best_time(fn, X, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def peak_memory(fn, X):
+    tracemalloc.start()
+    fn(X)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2020-01-01", periods=args.rows)
+    closes = 100 * np.exp(np.cumsum(rng.normal(3e-4, 0.02, args.rows)))
+    df, features = fused_indicators(pd.DataFrame({"Close": closes}, index=index))
+    features["sentiment"] = 0.1
+    clf = train_rf(features, create_labels(df))[0]
+    clf.set_params(n_jobs=1)
+    features = features.fillna(0)
+
+    start = time.perf_counter()
+    compact = compile_forest(clf)
+    compile_time = time.perf_counter() - start
+    n_nodes = sum(est.tree_.node_count for est in clf.estimators_)
+    print(f"{clf.n_estimators} trees, {n_nodes} nodes, max depth {compact.depths.max()}, "
+          f"compiled in {compile_time * 1e3:.0f} ms")
+    print(f"pickled size: sklearn {len(pickle.dumps(clf)) / 2 ** 20:6.1f} MiB  "
+          f"compact {len(pickle.dumps(compact)) / 2 ** 20:6.1f} MiB  (arrays {compact.nbytes / 2 ** 20:.1f} MiB)")
+
+    batches = {"1 row": features.iloc[[-1]], "history": features,
+               "history x10": pd.concat([features] * 10, ignore_index=True)}
+    for name, X in batches.items():
+        proba = clf.predict_proba(X)
+        diff = np.abs(compact.predict_proba(X) - proba).max()
+        agree = (compact.predict(X) == clf.predict(X)).mean() * 100
+        t_sk, t_compact = best_time(clf.predict_proba, X, args.repeat), best_time(compact.predict_proba, X, args.repeat)
+        m_sk, m_compact = peak_memory(clf.predict_proba, X), peak_memory(compact.predict_proba, X)
+        t_used = best_time(lambda X: forest_predict_proba(clf, X), X, args.repeat)
+        print(f"{name:<12} {len(X):>6} rows  sklearn {t_sk * 1e3:8.1f} ms  compact {t_compact * 1e3:8.1f} ms  "
+              f"speedup {t_sk / t_compact:5.2f}x  dispatched {t_used * 1e3:8.1f} ms  "
+              f"peak {m_sk / 2 ** 20:6.1f} vs {m_compact / 2 ** 20:6.1f} MiB  "
+              f"|proba diff| {diff:.1e}  classes agree {agree:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare one global panel LSTM against per-ticker LSTMs: training throughput and holdout accuracy.
+
+Run from the repository root:  python benchmarks/bench_global_lstm.py [--tickers 25 --epochs 5]
+
+Prices are synthetic (per-ticker drift, volatility and return autocorrelation); the last
+--holdout fraction of every series is kept out of training and scored in price space.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stocksense.config import HIDDEN_SIZE, LOOKBACK  # noqa: E402
+from stocksense.global_lstm import TickerView, build_panel, train_global_lstm  # noqa: E402
+from stocksense.lstm import DEVICE, LSTMWithAttention, _fit_lstm, make_windows  # noqa: E402
+
+
+def synthetic_frames(n_tickers, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=n_rows)
+    frames = {}
+    for i in range(n_tickers):
+        drift, vol, phi = rng.normal(3e-4, 3e-4), rng.uniform(0.01, 0.03), rng.uniform(-0.1, 0.3)
+        shocks = rng.normal(drift, vol, n_rows)
+        returns = np.empty(n_rows)
+        returns[0] = shocks[0]
+        for t in range(1, n_rows):
+            returns[t] = phi * returns[t - 1] + shocks[t]
+        frames[f"SYN{i:02d}"] = pd.DataFrame({"Close": rng.uniform(100, 3000) * np.exp(np.cumsum(returns))},
+                                             index=index)
+    return frames
+
+
+def holdout_windows(df, scaler, split):
+    """Windows whose target bar is at or after split, scaled with the training scaler"""
+    scaled = scaler.transform(df["Close"].values.reshape(-1, 1))
+    X = make_windows(scaled)[:-1][split - LOOKBACK:]
+    return np.ascontiguousarray(X), df["Close"].values[split:]
+
+
+def mape(model_fn, scaler, X, actual):
+    with torch.no_grad():
+        pred = model_fn(torch.from_numpy(X).to(DEVICE)).cpu().numpy().reshape(-1, 1)
+    pred = scaler.inverse_transform(pred)[:, 0]
+    return float(np.mean(np.abs(pred - actual) / actual) * 100)
+
+
+def single_window_latency(model, X, n=50):
+    window = torch.from_numpy(X[-1:]).to(DEVICE)
+    with torch.no_grad():
+        model(window)
+        start = time.perf_counter()
+        for _ in range(n):
+            model(window)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=25)
+    parser.add_argument("--rows", type=int, default=1250)
+    parser.add_argument("--epochs", type=int, default=5, help="Epochs for each per-ticker model")
+    parser.add_argument("--global-epochs", type=int, default=5)
+    parser.add_argument("--embed-dim", type=int, default=8)
+    parser.add_argument("--holdout", type=float, default=0.1)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.tickers, args.rows)
+    split = int(args.rows * (1 - args.holdout))
+    train_frames = {t: df.iloc[:split] for t, df in frames.items()}
+    tickers, scalers, X, ids, y = build_panel(train_frames)
+    print(f"{len(tickers)} tickers, {len(X)} training windows, lookback {LOOKBACK}, hidden {HIDDEN_SIZE}")
+
+    # Per-ticker models
+    start = time.perf_counter()
+    per_ticker = {}
+    for i, ticker in enumerate(tickers):
+        model = LSTMWithAttention(1, HIDDEN_SIZE).to(DEVICE)
+        opt = torch.optim.Adam(model.parameters(), lr=0.001)
+        _fit_lstm(model, opt, X[ids == i], y[ids == i], args.epochs, validation_fraction=0)
+        per_ticker[ticker] = model.eval()
+    t_per_ticker = time.perf_counter() - start
+
+    # Global model
+    start = time.perf_counter()
+    global_model, _ = train_global_lstm(train_frames, epochs=args.global_epochs, embed_dim=args.embed_dim,
+                                        save=False)
+    t_global = time.perf_counter() - start
+
+    err_per_ticker, err_global, lat_per_ticker, lat_global = [], [], [], []
+    for ticker in tickers:
+        X_test, actual = holdout_windows(frames[ticker], scalers[ticker], split)
+        view = TickerView(global_model, ticker)
+        err_per_ticker.append(mape(per_ticker[ticker], scalers[ticker], X_test, actual))
+        err_global.append(mape(view, scalers[ticker], X_test, actual))
+        lat_per_ticker.append(single_window_latency(per_ticker[ticker], X_test))
+        lat_global.append(single_window_latency(view, X_test))
+
+    n_per_ticker, n_global = len(X) * args.epochs, len(X) * args.global_epochs
+    print(f"per-ticker: train {t_per_ticker:7.1f} s  {n_per_ticker / t_per_ticker:8.0f} windows/s  "
+          f"holdout MAPE {np.mean(err_per_ticker):5.2f}%  predict {np.mean(lat_per_ticker) * 1e3:.2f} ms")
+    print(f"global:     train {t_global:7.1f} s  {n_global / t_global:8.0f} windows/s  "
+          f"holdout MAPE {np.mean(err_global):5.2f}%  predict {np.mean(lat_global) * 1e3:.2f} ms")
+    print(f"global wins on {sum(g < p for g, p in zip(err_global, err_per_ticker))}/{len(tickers)} tickers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark the fused indicator kernel against the pandas indicator + feature path.
+
+Run from the repository root:  python benchmarks/bench_indicators.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stocksense.indicators import (INDICATOR_COLUMNS, KERNEL_COLUMNS, build_features,  # noqa: E402
+                                   calculate_technical_indicators, indicator_matrix)
+
+MINUTES_PER_SESSION = 375  # NSE 09:15-15:30
+SESSIONS_PER_YEAR = 250
+
+CASES = [
+    ("5y daily", 5 * SESSIONS_PER_YEAR, 0.015),
+    ("1y minute", SESSIONS_PER_YEAR * MINUTES_PER_SESSION, 0.0008),
+    ("3y minute", 3 * SESSIONS_PER_YEAR * MINUTES_PER_SESSION, 0.0008),
+]
+
+
+def pandas_path(close):
+    df = calculate_technical_indicators(pd.DataFrame({"Close": close}))
+    return df, build_features(df)
+
+
+def max_relative_error(matrix, df, features):
+    expected = np.column_stack([df[INDICATOR_COLUMNS].to_numpy(), features.to_numpy(dtype=float)])
+    scale = np.maximum(1.0, np.abs(expected))
+    err = np.nan_to_num(np.abs(matrix - expected) / scale)
+    # bb_pos is skipped: pandas' rolling std leaves round-off residue on flat windows
+    keep = [i for i, name in enumerate(KERNEL_COLUMNS) if name != "bb_pos"]
+    return err[:, keep].max()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for label, n_rows, vol in CASES:
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, vol, n_rows)))
+        df, features = pandas_path(close)
+        out64 = np.empty((n_rows, len(KERNEL_COLUMNS)), order="F")
+        out32 = np.empty((n_rows, len(KERNEL_COLUMNS)), dtype=np.float32, order="F")
+        err = max_relative_error(indicator_matrix(close, out=out64), df, features)
+
+        n = 20 if n_rows < 10000 else 2
+        t_pandas = min(timeit.repeat(lambda: pandas_path(close), number=n, repeat=3)) / n
+        t_64 = min(timeit.repeat(lambda: indicator_matrix(close, out=out64), number=n, repeat=3)) / n
+        t_32 = min(timeit.repeat(lambda: indicator_matrix(close, out=out32), number=n, repeat=3)) / n
+        print(f"{label:<10} rows={n_rows:>7}  pandas: {t_pandas * 1e3:8.2f} ms  "
+              f"fused f64: {t_64 * 1e3:7.2f} ms ({t_pandas / t_64:4.1f}x)  "
+              f"fused f32: {t_32 * 1e3:7.2f} ms ({t_pandas / t_32:4.1f}x)  max rel err: {err:.1e}")
+
+
+if __name__ == "__main__":
+    main()
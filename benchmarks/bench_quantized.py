@@ -0,0 +1,91 @@
+"""Dynamic int8 LSTM inference versus fp32: accuracy drift and the LSTM cost of a 25-ticker screen.
+
+Run from the repository root:  python benchmarks/bench_quantized.py [--tickers 25 --epochs 1]
+
+Per-ticker models are trained briefly on synthetic prices, then each one is quantized with
+quantize_lstm. The screen timing covers what screen_stocks does for the LSTM: one lstm_predict per
+ticker, plus a batched 5-step forecast_tickers call over the whole universe.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.preprocessing import MinMaxScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stocksense.config import HIDDEN_SIZE  # noqa: E402
+from stocksense.lstm import (DEVICE, LSTMWithAttention, _fit_lstm, _lstm_windows, forecast_tickers,  # noqa: E402
+                             lstm_predict, quantization_drift, quantize_lstm)
+
+
+def synthetic_frames(n_tickers, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=n_rows)
+    return {f"SYN{i:02d}": pd.DataFrame({"Close": rng.uniform(100, 3000) * np.exp(np.cumsum(
+        rng.normal(3e-4, rng.uniform(0.01, 0.03), n_rows)))}, index=index) for i in range(n_tickers)}
+
+
+def state_size(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return len(buffer.getvalue())
+
+
+def time_screen(models, scalers, frames, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for ticker, df in frames.items():
+            lstm_predict(models[ticker], scalers[ticker], df)
+    single = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        forecast_tickers(frames, models, scalers, horizon=5)
+    return single, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=25)
+    parser.add_argument("--rows", type=int, default=1250)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if DEVICE.type != "cpu":
+        print("Dynamic int8 quantization runs on CPU only")
+        return
+
+    frames = synthetic_frames(args.tickers, args.rows)
+    models, quantized, scalers, drifts, price_drifts = {}, {}, {}, [], []
+    for ticker, df in frames.items():
+        prices = df["Close"].values.reshape(-1, 1)
+        scalers[ticker] = MinMaxScaler().fit(prices)
+        X, y = _lstm_windows(scalers[ticker].transform(prices))
+        model = LSTMWithAttention(1, HIDDEN_SIZE).to(DEVICE)
+        _fit_lstm(model, torch.optim.Adam(model.parameters(), lr=0.001), X, y, args.epochs)
+        models[ticker], quantized[ticker] = model.eval(), quantize_lstm(model)
+        drift = quantization_drift(models[ticker], quantized[ticker], X)
+        drifts.append(drift)
+        price_drifts.append(drift * float(np.ptp(prices)) / float(prices[-1, 0]) * 100)
+
+    print(f"{len(frames)} tickers, {args.rows} bars, hidden {HIDDEN_SIZE}, "
+          f"{torch.get_num_threads()} torch threads, quantized engine {torch.backends.quantized.engine}")
+    print(f"drift (scaled units): max {max(drifts):.4f}  mean {np.mean(drifts):.4f}   "
+          f"as % of last price: max {max(price_drifts):.3f}%")
+    print(f"state_dict size: fp32 {state_size(next(iter(models.values()))) / 1024:.0f} KiB  "
+          f"int8 {state_size(next(iter(quantized.values()))) / 1024:.0f} KiB")
+
+    fp32_single, fp32_batch = time_screen(models, scalers, frames, args.repeat)
+    int8_single, int8_batch = time_screen(quantized, scalers, frames, args.repeat)
+    print(f"screen, lstm_predict per ticker: fp32 {fp32_single * 1e3:8.1f} ms  int8 {int8_single * 1e3:8.1f} ms  "
+          f"speedup {fp32_single / int8_single:.2f}x")
+    print(f"screen, batched 5-step forecast: fp32 {fp32_batch * 1e3:8.1f} ms  int8 {int8_batch * 1e3:8.1f} ms  "
+          f"speedup {fp32_batch / int8_batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
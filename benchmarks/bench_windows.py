@@ -0,0 +1,49 @@
+"""Benchmark the strided LSTM window builder against the original Python loop.
+
+Run from the repository root:  python benchmarks/bench_windows.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stocksense.config import LOOKBACK  # noqa: E402
+from stocksense.lstm import make_windows  # noqa: E402
+
+
+def loop_windows(scaled, lookback=LOOKBACK):
+    # The window construction train_lstm used before make_windows
+    X, y = [], []
+    for i in range(lookback, len(scaled)):
+        X.append(scaled[i - lookback:i])
+        y.append(scaled[i])
+    X, y = np.array(X), np.array(y)
+    return torch.tensor(X).float(), torch.tensor(y).float()
+
+
+def strided_windows(scaled, lookback=LOOKBACK):
+    X = make_windows(scaled, lookback)[:-1]
+    y = np.ascontiguousarray(scaled[lookback:], dtype=np.float32)
+    return torch.from_numpy(X), torch.from_numpy(y)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for n_rows, n_features in [(1250, 1), (1250, 8), (20000, 1), (20000, 8)]:
+        scaled = rng.random((n_rows, n_features))
+        X_loop, _ = loop_windows(scaled)
+        X_fast, _ = strided_windows(scaled)
+        assert torch.equal(X_loop, X_fast)
+
+        n = 20 if n_rows < 10000 else 3
+        t_loop = min(timeit.repeat(lambda: loop_windows(scaled), number=n, repeat=3)) / n
+        t_fast = min(timeit.repeat(lambda: strided_windows(scaled), number=n, repeat=3)) / n
+        print(f"rows={n_rows:>6} features={n_features}  loop: {t_loop * 1e3:8.2f} ms  "
+              f"strided: {t_fast * 1e3:8.3f} ms  speedup: {t_loop / t_fast:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Import-time report for the Streamlit app.
+
+Run from the repository root:  python benchmarks/import_report.py
+
+Shows what ``import stock`` costs per top-level package (self time from ``python -X importtime``),
+how much of that is Streamlit itself, and what each lazily imported library costs when it is first
+used. Exits with status 1 if any of ``stocksense.lazy.HEAVY_MODULES`` is imported at startup that
+Streamlit does not already import on its own, so it can guard against regressions in CI.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stocksense.lazy import HEAVY_MODULES  # noqa: E402
+
+DEFERRED_PROBE = """
+import json
+import stock
+from stocksense.lazy import load_times
+for lazy in [stock.go, stock.plt, stock.sns, stock.metrics, stock.lstm, stock.backtest, stock.analysis]:
+    lazy.__name__
+print(json.dumps(load_times))
+"""
+
+
+def package_self_times(statement):
+    """Seconds of import self time per top-level package for running `statement` in a fresh interpreter"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                          capture_output=True, text=True)
+    totals = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return totals
+
+
+def main(top=15):
+    baseline = package_self_times("import streamlit")
+    app = package_self_times("import stock")
+
+    print(f"import streamlit: {sum(baseline.values()):6.2f} s")
+    print(f"import stock:     {sum(app.values()):6.2f} s\n")
+    print(f"{'package':<24}{'self time':>10}")
+    for name, seconds in sorted(app.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<24}{seconds:>9.3f}s")
+
+    probe = subprocess.run([sys.executable, "-c", DEFERRED_PROBE], cwd=ROOT, capture_output=True, text=True)
+    if probe.returncode == 0:
+        print("\nDeferred until first use:")
+        for name, seconds in json.loads(probe.stdout.strip().splitlines()[-1]).items():
+            print(f"{name:<24}{seconds:>9.3f}s")
+
+    regressions = [name for name in HEAVY_MODULES if name in app and name not in baseline]
+    if regressions:
+        print(f"\nHeavy modules imported at startup: {', '.join(regressions)}")
+        return 1
+    print("\nNo heavy modules imported at startup beyond Streamlit's own.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
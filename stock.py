@@ -2,24 +2,31 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
-import yfinance as yf
-import torch
-import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.utils import resample
-import requests
-from transformers import pipeline
 import warnings
-import time
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import classification_report, accuracy_score
+import os
+
+from stocksense.config import (
+    COMPANY_NAMES, INDIAN_INDICES, NIFTY_50_STOCKS, SECTORAL_INDICES, TRENDING_STOCKS, WALK_FORWARD_FOLDS,
+    WALK_FORWARD_WORKERS, WARMUP_TIMEOUT_SECONDS
+)
+from stocksense.data import (
+    fetch_market_headlines, fetch_nifty_trend, fetch_quote_snapshot, get_fii_dii_data, get_price_history
+)
+from stocksense.indicators import interpret_signals
+from stocksense.lazy import lazy_import
+from stocksense.warmup import Warmup
+
+# Heavy libraries load on first use, so the landing page doesn't wait for torch, transformers or sklearn
+go = lazy_import("plotly.graph_objects")
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+metrics = lazy_import("sklearn.metrics")
+analysis = lazy_import("stocksense.analysis")
+backtest = lazy_import("stocksense.backtest")
+forest = lazy_import("stocksense.forest")
+lstm = lazy_import("stocksense.lstm")
+sentiment = lazy_import("stocksense.sentiment")
 
 warnings.filterwarnings('ignore')
 
@@ -394,638 +401,189 @@ st.markdown("""
 
 
 # Loading Screen
-def show_loading_screen():
+def show_loading_screen(warmup):
     loading_placeholder = st.empty()
-    with loading_placeholder.container():
-        st.markdown("""
+
+    def render(progress):
+        done = sum(state != "running" for _, state, _ in progress)
+        icons = {"running": "⏳", "done": "✅", "failed": "⚠️"}
+        steps = "".join(
+            f'<div style="font-size: 0.95rem; margin: 0.3rem 0; opacity: {1.0 if critical else 0.7};">'
+            f'{icons[state]} {label}</div>'
+            for label, state, critical in progress
+        )
+        loading_placeholder.markdown(f"""
         <div class="loading-container">
             <div class="loading-spinner"></div>
             <div class="loading-text">StockSense Pro</div>
-            <div class="loading-subtext">Initializing AI Models & Market Data...</div>
+            <div class="loading-subtext">Initializing AI Models & Market Data... {done}/{len(progress)}</div>
+            <div style="margin-top: 1.5rem; text-align: left;">{steps}</div>
         </div>
         """, unsafe_allow_html=True)
 
-    # Simulate loading time
-    time.sleep(2)
+    # Only market data blocks the page; models keep loading in the background
+    warmup.wait_critical(WARMUP_TIMEOUT_SECONDS, on_progress=render)
     loading_placeholder.empty()
 
 
-# Configuration
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-LOOKBACK = 90
-EPOCHS = 50
-HIDDEN_SIZE = 128
-NEWSAPI_KEY = "272cce001c674f2b8fe9bb051b2c1804"  # Replace with your actual API key
-FINBERT_MODEL = "ProsusAI/finbert"
-
-# Nifty 50 stocks
-NIFTY_50_STOCKS = [
-    'RELIANCE.NS', 'HDFCBANK.NS', 'TCS.NS', 'INFY.NS', 'HINDUNILVR.NS',
-    'ICICIBANK.NS', 'KOTAKBANK.NS', 'BHARTIARTL.NS', 'ITC.NS', 'SBIN.NS',
-    'LT.NS', 'ASIANPAINT.NS', 'AXISBANK.NS', 'MARUTI.NS', 'TITAN.NS',
-    'NESTLEIND.NS', 'WIPRO.NS', 'ULTRACEMCO.NS', 'HCLTECH.NS', 'BAJFINANCE.NS',
-    'TECHM.NS', 'SUNPHARMA.NS', 'POWERGRID.NS', 'NTPC.NS', 'COALINDIA.NS'
-]
+def _warm_models():
+    sentiment.load_sentiment_model()
+    analysis.get_stock_recommendation  # Imports torch, sklearn and the LSTM code
+
+
+def start_warmup(ticker):
+    warmup = Warmup()
+    # Warm-up threads run outside the script, so they call the stocksense fetchers and never Streamlit
+    warmup.submit("quotes", "Market indices & trending stocks", fetch_quote_snapshot, critical=True)
+    warmup.submit("nifty", "Nifty 50 trend", fetch_nifty_trend, critical=True)
+    warmup.submit("news", "Market news", fetch_market_headlines, critical=True)
+    warmup.submit("models", "FinBERT & forecasting models", _warm_models)
+    warmup.submit(f"prices:{ticker}", f"{ticker.replace('.NS', '')} price history", get_price_history, ticker)
+    return warmup
 
-COMPANY_NAMES = {
-    'RELIANCE.NS': 'Reliance Industries', 'HDFCBANK.NS': 'HDFC Bank', 'TCS.NS': 'TCS',
-    'INFY.NS': 'Infosys', 'HINDUNILVR.NS': 'Hindustan Unilever', 'ICICIBANK.NS': 'ICICI Bank',
-    'KOTAKBANK.NS': 'Kotak Bank', 'BHARTIARTL.NS': 'Bharti Airtel', 'ITC.NS': 'ITC Ltd',
-    'SBIN.NS': 'SBI', 'LT.NS': 'L&T', 'ASIANPAINT.NS': 'Asian Paints',
-    'AXISBANK.NS': 'Axis Bank', 'MARUTI.NS': 'Maruti Suzuki', 'TITAN.NS': 'Titan',
-    'NESTLEIND.NS': 'Nestle India', 'WIPRO.NS': 'Wipro', 'ULTRACEMCO.NS': 'UltraTech',
-    'HCLTECH.NS': 'HCL Tech', 'BAJFINANCE.NS': 'Bajaj Finance', 'TECHM.NS': 'Tech Mahindra',
-    'SUNPHARMA.NS': 'Sun Pharma', 'POWERGRID.NS': 'Power Grid', 'NTPC.NS': 'NTPC',
-    'COALINDIA.NS': 'Coal India'
-}
-
-# Indian Market Indices mapping
-INDIAN_INDICES = {
-    'Nifty 50': '^NSEI',
-    'Sensex': '^BSESN',
-    'Nifty Bank': '^NSEBANK',
-    'Nifty IT': '^CNXIT',
-    'Nifty Auto': '^CNXAUTO'
-}
-
-
-# Cache models
-@st.cache_resource
-def load_sentiment_model():
-    try:
-        return pipeline("sentiment-analysis", model=FINBERT_MODEL, tokenizer=FINBERT_MODEL,
-                        device=0 if torch.cuda.is_available() else -1)
-    except:
-        return None
+
+# Market data comes from stocksense.data, whose caches are shared by every session and the warm-up threads
+def get_quote_snapshot():
+    return fetch_quote_snapshot()
 
 
-# Cache market data to avoid repeated API calls
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_real_time_indices():
     """Fetch real-time Indian market indices data"""
+    snapshot = get_quote_snapshot()
     indices_data = []
 
     for name, symbol in INDIAN_INDICES.items():
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.history(period="2d")
-
-            if len(info) >= 2:
-                current_price = info['Close'].iloc[-1]
-                prev_price = info['Close'].iloc[-2]
-                change_pct = ((current_price - prev_price) / prev_price) * 100
-
-                color = "#00C851" if change_pct > 0 else "#ff4444"
-                change_str = f"{change_pct:+.1f}%"
-
-                indices_data.append({
-                    "name": name,
-                    "value": f"{current_price:,.2f}",
-                    "change": change_str,
-                    "color": color
-                })
-            else:
-                # Fallback to static data if API fails
-                fallback_data = {
-                    'Nifty 50': {"value": "19,567.25", "change": "+1.2%", "color": "#00C851"},
-                    'Sensex': {"value": "65,345.67", "change": "+0.8%", "color": "#00C851"},
-                    'Nifty Bank': {"value": "45,234.50", "change": "-0.3%", "color": "#ff4444"},
-                    'Nifty IT': {"value": "33,456.78", "change": "+2.1%", "color": "#00C851"},
-                    'Nifty Auto': {"value": "15,678.90", "change": "+1.8%", "color": "#00C851"}
-                }
-                indices_data.append({
-                    "name": name,
-                    **fallback_data[name]
-                })
-
-        except Exception as e:
-            st.error(f"Error fetching {name}: {str(e)}")
+        quote = snapshot.get(symbol)
+        if quote is not None:
+            change_pct = quote["change"]
+            color = "#00C851" if change_pct > 0 else "#ff4444"
+            change_str = f"{change_pct:+.1f}%"
+
+            indices_data.append({
+                "name": name,
+                "value": f"{quote['price']:,.2f}",
+                "change": change_str,
+                "color": color
+            })
+        else:
+            # Fallback to static data if API fails
+            fallback_data = {
+                'Nifty 50': {"value": "19,567.25", "change": "+1.2%", "color": "#00C851"},
+                'Sensex': {"value": "65,345.67", "change": "+0.8%", "color": "#00C851"},
+                'Nifty Bank': {"value": "45,234.50", "change": "-0.3%", "color": "#ff4444"},
+                'Nifty IT': {"value": "33,456.78", "change": "+2.1%", "color": "#00C851"},
+                'Nifty Auto': {"value": "15,678.90", "change": "+1.8%", "color": "#00C851"}
+            }
+            indices_data.append({
+                "name": name,
+                **fallback_data[name]
+            })
 
     return indices_data
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_trending_stocks():
     """Fetch real-time data for trending stocks"""
-    trending_stocks = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS', 'BHARTIARTL.NS']
+    snapshot = get_quote_snapshot()
     trending_data = []
 
-    for ticker in trending_stocks:
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.history(period="2d")
-
-            if len(info) >= 2:
-                current_price = info['Close'].iloc[-1]
-                prev_price = info['Close'].iloc[-2]
-                change_pct = ((current_price - prev_price) / prev_price) * 100
-
-                company_name = COMPANY_NAMES.get(ticker, ticker.replace('.NS', ''))
-
-                trending_data.append({
-                    "symbol": ticker.replace('.NS', ''),
-                    "company": company_name,
-                    "price": current_price,
-                    "change": change_pct
-                })
-        except Exception as e:
-            # Fallback to sample data if API fails
-            fallback_trending = [
-                {"symbol": "RELIANCE", "company": "Reliance Industries", "price": 2456.30, "change": 2.3},
-                {"symbol": "TCS", "company": "Tata Consultancy Services", "price": 3789.45, "change": 1.8},
-                {"symbol": "HDFCBANK", "company": "HDFC Bank", "price": 1654.20, "change": -0.5},
-                {"symbol": "INFY", "company": "Infosys", "price": 1456.80, "change": 3.2},
-                {"symbol": "ICICIBANK", "company": "ICICI Bank", "price": 934.60, "change": 1.1},
-                {"symbol": "BHARTIARTL", "company": "Bharti Airtel", "price": 845.30, "change": -1.2}
-            ]
-            return fallback_trending
+    for ticker in TRENDING_STOCKS:
+        quote = snapshot.get(ticker)
+        if quote is not None:
+            company_name = COMPANY_NAMES.get(ticker, ticker.replace('.NS', ''))
+
+            trending_data.append({
+                "symbol": ticker.replace('.NS', ''),
+                "company": company_name,
+                "price": quote["price"],
+                "change": quote["change"]
+            })
+
+    if not trending_data:
+        # Fallback to sample data if API fails
+        fallback_trending = [
+            {"symbol": "RELIANCE", "company": "Reliance Industries", "price": 2456.30, "change": 2.3},
+            {"symbol": "TCS", "company": "Tata Consultancy Services", "price": 3789.45, "change": 1.8},
+            {"symbol": "HDFCBANK", "company": "HDFC Bank", "price": 1654.20, "change": -0.5},
+            {"symbol": "INFY", "company": "Infosys", "price": 1456.80, "change": 3.2},
+            {"symbol": "ICICIBANK", "company": "ICICI Bank", "price": 934.60, "change": 1.1},
+            {"symbol": "BHARTIARTL", "company": "Bharti Airtel", "price": 845.30, "change": -1.2}
+        ]
+        return fallback_trending
 
     return trending_data
 
 
-@st.cache_data(ttl=900)  # Cache for 15 minutes
-def get_latest_indian_market_news():
-    """Fetch latest news about Indian stock market"""
-    try:
-        # Multiple queries for comprehensive Indian market news
-        queries = [
-            "Indian stock market",
-            "Nifty Sensex",
-            "BSE NSE India",
-            "Indian shares market",
-            "Mumbai stock exchange"
-        ]
-
-        all_articles = []
-
-        for query in queries[:2]:  # Limit to 2 queries to avoid API limits
-            url = f"https://newsapi.org/v2/everything"
-            params = {
-                'q': query,
-                'country': 'in',
-                'category': 'business',
-                'sortBy': 'publishedAt',
-                'pageSize': 5,
-                'apiKey': NEWSAPI_KEY
-            }
+FALLBACK_NEWS = [
+    "🔥 Nifty 50 hits fresh record high",
+    "💰 FII inflows boost market sentiment",
+    "🏦 Banking stocks surge on rate cut hopes",
+    "💻 IT sector shows resilience",
+    "🚗 Auto stocks rally on festive demand"
+]
 
-            response = requests.get(url, params=params, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get('articles', [])
-
-                for article in articles:
-                    title = article.get('title', '')
-                    if title and 'stock' in title.lower() or 'market' in title.lower() or 'nifty' in title.lower() or 'sensex' in title.lower():
-                        # Create engaging news format
-                        if 'high' in title.lower() or 'surge' in title.lower() or 'rally' in title.lower():
-                            emoji = "🔥"
-                        elif 'fall' in title.lower() or 'drop' in title.lower() or 'decline' in title.lower():
-                            emoji = "📉"
-                        elif 'bank' in title.lower():
-                            emoji = "🏦"
-                        elif 'tech' in title.lower() or 'IT' in title:
-                            emoji = "💻"
-                        elif 'auto' in title.lower():
-                            emoji = "🚗"
-                        else:
-                            emoji = "💰"
-
-                        # Truncate title if too long
-                        short_title = title[:50] + "..." if len(title) > 50 else title
-                        all_articles.append(f"{emoji} {short_title}")
-
-            time.sleep(0.1)  # Small delay between requests
-
-        # Return top 5 unique articles
-        unique_articles = list(dict.fromkeys(all_articles))[:5]
-
-        if not unique_articles:
-            # Fallback news
-            return [
-                "🔥 Nifty 50 hits fresh record high",
-                "💰 FII inflows boost market sentiment",
-                "🏦 Banking stocks surge on rate cut hopes",
-                "💻 IT sector shows resilience",
-                "🚗 Auto stocks rally on festive demand"
-            ]
-
-        return unique_articles
 
-    except Exception as e:
-        st.error(f"News API Error: {str(e)}")
-        # Fallback news
-        return [
-            "🔥 Nifty 50 hits fresh record high",
-            "💰 FII inflows boost market sentiment",
-            "🏦 Banking stocks surge on rate cut hopes",
-            "💻 IT sector shows resilience",
-            "🚗 Auto stocks rally on festive demand"
-        ]
+def get_latest_indian_market_news():
+    """Fetch latest news about Indian stock market"""
+    headlines, error = fetch_market_headlines()
+    if error:
+        st.error(f"News API Error: {error}")
+    return headlines or FALLBACK_NEWS
 
 
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
 def get_nifty_trend_data():
     """Get Nifty 50 historical data for trend visualization"""
-    try:
-        nifty = yf.Ticker("^NSEI")
-        hist = nifty.history(period="1mo")  # Last 30 days
+    trend = fetch_nifty_trend()
+    if trend is not None:
+        return trend
+    # Fallback data
+    dates = pd.date_range(start=datetime.now() - timedelta(days=30), end=datetime.now(), freq='D')
+    nifty_base = 19500
+    nifty_prices = nifty_base + np.cumsum(np.random.randn(len(dates)) * 100)
+    return dates, nifty_prices
 
-        if not hist.empty:
-            return hist.index, hist['Close'].values
-        else:
-            # Fallback data
-            dates = pd.date_range(start=datetime.now() - timedelta(days=30), end=datetime.now(), freq='D')
-            nifty_base = 19500
-            nifty_prices = nifty_base + np.cumsum(np.random.randn(len(dates)) * 100)
-            return dates, nifty_prices
-
-    except Exception as e:
-        # Fallback data
-        dates = pd.date_range(start=datetime.now() - timedelta(days=30), end=datetime.now(), freq='D')
-        nifty_base = 19500
-        nifty_prices = nifty_base + np.cumsum(np.random.randn(len(dates)) * 100)
-        return dates, nifty_prices
 
-
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def get_sectoral_performance():
     """Get real sectoral performance data"""
-    try:
-        # Sectoral indices mapping
-        sectoral_indices = {
-            'Banking': '^NSEBANK',
-            'IT Services': '^CNXIT',
-            'Oil & Gas': '^CNXENERGY',
-            'Consumer Goods': '^CNXFMCG',
-            'Automobiles': '^CNXAUTO',
-            'Pharma': '^CNXPHARMA',
-            'Metals': '^CNXMETAL',
-            'Telecom': '^CNXIT'  # Using IT as proxy for telecom
-        }
-
-        sectors = []
-        performance = []
-
-        for sector, symbol in sectoral_indices.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="2d")
-
-                if len(hist) >= 2:
-                    current = hist['Close'].iloc[-1]
-                    previous = hist['Close'].iloc[-2]
-                    change_pct = ((current - previous) / previous) * 100
-
-                    sectors.append(sector)
-                    performance.append(round(change_pct, 1))
-
-            except:
-                continue
-
-        if len(sectors) == 0:
-            # Fallback data
-            sectors = ['Banking', 'IT Services', 'Oil & Gas', 'Consumer Goods', 'Automobiles', 'Pharma', 'Metals',
-                       'Telecom']
-            performance = [2.1, 1.5, -0.8, 1.9, 2.8, -0.3, -1.5, 0.7]
-
-        return sectors, performance
+    snapshot = get_quote_snapshot()
+    sectors = []
+    performance = []
 
-    except Exception as e:
+    for sector, symbol in SECTORAL_INDICES.items():
+        quote = snapshot.get(symbol)
+        if quote is not None:
+            sectors.append(sector)
+            performance.append(round(quote["change"], 1))
+
+    if len(sectors) == 0:
         # Fallback data
         sectors = ['Banking', 'IT Services', 'Oil & Gas', 'Consumer Goods', 'Automobiles', 'Pharma', 'Metals',
                    'Telecom']
         performance = [2.1, 1.5, -0.8, 1.9, 2.8, -0.3, -1.5, 0.7]
-        return sectors, performance
-
-
-# LSTM Model
-class LSTMWithAttention(nn.Module):
-    def __init__(self, input_size, hidden_size, num_layers=2):
-        super().__init__()
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-        self.attn_w = nn.Linear(hidden_size * 2, hidden_size)
-        self.attn_v = nn.Parameter(torch.randn(hidden_size))
-        self.fc = nn.Linear(hidden_size, 1)
-
-    def attention(self, hidden, outputs):
-        seq_len = outputs.size(1)
-        hidden = hidden.unsqueeze(1).repeat(1, seq_len, 1)
-        energy = torch.tanh(self.attn_w(torch.cat((hidden, outputs), dim=2)))
-        weights = torch.softmax(torch.matmul(energy, self.attn_v), dim=1)
-        context = torch.bmm(weights.unsqueeze(1), outputs).squeeze(1)
-        return context
-
-    def forward(self, x):
-        outputs, (hidden, _) = self.lstm(x)
-        context = self.attention(hidden[-1], outputs)
-        return self.fc(context)
-
-
-# Technical Indicators
-def calculate_technical_indicators(df):
-    df["SMA50"] = df["Close"].rolling(50, min_periods=1).mean()
-    df["SMA200"] = df["Close"].rolling(200, min_periods=1).mean()
-    df["EMA50"] = df["Close"].ewm(span=50, adjust=False).mean()
-    df["EMA200"] = df["Close"].ewm(span=200, adjust=False).mean()
-    delta = df["Close"].diff()
-    up, down = delta.clip(lower=0), -delta.clip(upper=0)
-    rs = up.ewm(alpha=1 / 14).mean() / down.replace(0, np.nan).ewm(alpha=1 / 14).mean()
-    df["RSI"] = 100 - (100 / (1 + rs))
-    ema12, ema26 = df["Close"].ewm(span=12).mean(), df["Close"].ewm(span=26).mean()
-    macd, signal = ema12 - ema26, (ema12 - ema26).ewm(span=9).mean()
-    df["MACD"] = macd - signal
-    sma20, std20 = df["Close"].rolling(20).mean(), df["Close"].rolling(20).std()
-    df["BB_upper"] = sma20 + 2 * std20
-    df["BB_lower"] = sma20 - 2 * std20
-    df["roc_5"] = df["Close"].pct_change(5)
-    df["roc_10"] = df["Close"].pct_change(10)
-    return df
-
-
-# Interpret Signals
-def interpret_signals(df):
-    sig = {}
-    sig["SMA"] = "Bullish" if df["SMA50"].iloc[-1] > df["SMA200"].iloc[-1] else "Bearish"
-    sig["EMA"] = "Bullish" if df["EMA50"].iloc[-1] > df["EMA200"].iloc[-1] else "Bearish"
-    rsi = df["RSI"].iloc[-1]
-    sig["RSI"] = "Oversold" if rsi < 30 else "Overbought" if rsi > 70 else "Neutral"
-    sig["MACD"] = "Bullish" if df["MACD"].iloc[-1] > 0 else "Bearish"
-    close = df["Close"].iloc[-1]
-    if close <= df["BB_lower"].iloc[-1]:
-        sig["Bollinger"] = "Near Lower"
-    elif close >= df["BB_upper"].iloc[-1]:
-        sig["Bollinger"] = "Near Upper"
-    else:
-        sig["Bollinger"] = "Neutral"
-    sig["ROC5"] = "Up" if df["roc_5"].iloc[-1] > 0 else "Down"
-    return sig
-
-
-# News and Sentiment
-def build_news_query(ticker):
-    company = COMPANY_NAMES.get(ticker.upper(), ticker)
-    return f'"{company}" OR "{ticker.split(".")[0]}"'
-
-
-def fetch_news_newsapi(query, company_name, ticker, limit=10):
-    url = f"https://newsapi.org/v2/everything?q={query}&pageSize={limit}&sortBy=publishedAt&apiKey={NEWSAPI_KEY}"
-    try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code != 200:
-            return []
-        articles = resp.json().get("articles", [])
-        filtered = []
-        for a in articles:
-            title = a.get("title", "")
-            desc = a.get("description", "") or ""
-            if (company_name.lower() in title.lower() or company_name.lower() in desc.lower() or
-                    ticker.split(".")[0].lower() in title.lower()):
-                filtered.append({
-                    "title": title,
-                    "url": a.get("url", ""),
-                    "date": a.get("publishedAt", "")
-                })
-        return filtered
-    except:
-        return []
-
-
-def analyze_sentiment_news(news_list):
-    if not news_list or not load_sentiment_model():
-        return 0.0
-    scores = []
-    for item in news_list:
-        try:
-            res = load_sentiment_model()(item["title"], truncation=True)[0]
-            label, score = res["label"].lower(), res["score"]
-            scores.append(score if "positive" in label else -score if "negative" in label else 0.0)
-        except:
-            scores.append(0.0)
-    return float(np.mean(scores)) if scores else 0.0
-
-
-# LSTM Train/Predict
-def train_lstm(df):
-    prices = df["Close"].values.reshape(-1, 1)
-    scaler = MinMaxScaler().fit(prices)
-    scaled = scaler.transform(prices)
-    X, y = [], []
-    for i in range(LOOKBACK, len(scaled)):
-        X.append(scaled[i - LOOKBACK:i])
-        y.append(scaled[i])
-    X, y = np.array(X), np.array(y)
-    model = LSTMWithAttention(1, HIDDEN_SIZE).to(DEVICE)
-    opt = torch.optim.Adam(model.parameters(), lr=0.001)
-    loss_fn = nn.MSELoss()
-    loader = DataLoader(TensorDataset(torch.tensor(X).float(), torch.tensor(y).float()), batch_size=32, shuffle=True)
-    for ep in range(EPOCHS):
-        model.train()
-        losses = []
-        for xb, yb in loader:
-            xb, yb = xb.to(DEVICE), yb.to(DEVICE)
-            opt.zero_grad()
-            out = model(xb).squeeze()
-            loss = loss_fn(out, yb.squeeze())
-            loss.backward()
-            opt.step()
-            losses.append(loss.item())
-    return model, scaler
-
-
-def lstm_predict(model, scaler, df):
-    seq = scaler.transform(df["Close"].values.reshape(-1, 1))[-LOOKBACK:]
-    seq = torch.tensor(seq).unsqueeze(0).float().to(DEVICE)
-    with torch.no_grad():
-        pred_scaled = model(seq).cpu().item()
-    return scaler.inverse_transform([[pred_scaled]])[0, 0]
-
-
-# Labels & Features
-def create_labels(df, horizon=5, vol_factor=0.5):
-    fut = df["Close"].shift(-horizon)
-    ret = (fut - df["Close"]) / df["Close"]
-    vol = df["Close"].pct_change().rolling(30).std()
-    thr = vol * vol_factor
-    labels = pd.Series(index=df.index, dtype=object)
-    labels[ret > thr] = "BUY"
-    labels[ret < -thr] = "SELL"
-    labels[(ret >= -thr) & (ret <= thr)] = "HOLD"
-    return labels
-
-
-def build_features(df, sentiment_series=None):
-    feats = pd.DataFrame(index=df.index)
-    feats["sma50_gt_sma200"] = (df["SMA50"] > df["SMA200"]).astype(int)
-    feats["ema50_gt_ema200"] = (df["EMA50"] > df["EMA200"]).astype(int)
-    feats["rsi"] = df["RSI"].fillna(50)
-    feats["macd"] = df["MACD"].fillna(0)
-    feats["bb_pos"] = (df["Close"] - df["BB_lower"]) / (df["BB_upper"] - df["BB_lower"])
-    feats["roc_5"] = df["roc_5"].fillna(0)
-    feats["roc_10"] = df["roc_10"].fillna(0)
-    if sentiment_series is not None:
-        feats["sentiment"] = sentiment_series
-    return feats.fillna(0.0)
-
-
-def train_rf(features, labels):
-    data = features.join(labels.rename("label")).dropna()
-    X, y = data.drop(columns=["label"]), data["label"]
-    min_count = y.value_counts().min()
-    balanced = pd.concat([
-        resample(data[data.label == "BUY"], n_samples=min_count, random_state=42),
-        resample(data[data.label == "SELL"], n_samples=min_count, random_state=42),
-        resample(data[data.label == "HOLD"], n_samples=min_count, random_state=42)
-    ])
-    Xb, yb = balanced.drop(columns=["label"]), balanced["label"]
-    Xtr, Xte, ytr, yte = train_test_split(Xb, yb, stratify=yb, test_size=0.2, random_state=42)
-    clf = RandomForestClassifier(n_estimators=500, random_state=42)
-    clf.fit(Xtr, ytr)
-    return clf, Xtr, Xte, ytr, yte
-
-
-# FII/DII Data (Placeholder - you can integrate real API)
-def get_fii_dii_data():
-    return {
-        "FII": {"buy": 7500.25, "sell": 6200.50, "net": 1299.75},
-        "DII": {"buy": 4800.75, "sell": 5100.25, "net": -299.50},
-        "date": datetime.now().strftime("%Y-%m-%d")
-    }
 
+    return sectors, performance
 
-# Stock Recommendation
-def get_stock_recommendation(ticker):
-    try:
-        # Try 5y, then 2y, then 1y
-        for period in ["5y", "2y", "1y"]:
-            df = yf.Ticker(ticker).history(period=period)
-            if not df.empty:
-                break
-        if df.empty:
-            return "HOLD", 50.0, "No data available", None, None, None, None, None, None, None, None, None
-
-        df = df.rename(columns=str.capitalize)
-        df = calculate_technical_indicators(df)
-
-        # News & Sentiment
-        company_name = COMPANY_NAMES.get(ticker.upper(), ticker)
-        query = build_news_query(ticker)
-        news = fetch_news_newsapi(query, company_name, ticker, limit=10)
-        sentiment_score = analyze_sentiment_news(news)
-        sentiment_series = pd.Series(sentiment_score, index=df.index)
-
-        # LSTM
-        model, scaler = train_lstm(df)
-        lstm_price = lstm_predict(model, scaler, df)
-
-        # Random Forest
-        labels = create_labels(df)
-        features = build_features(df, sentiment_series)
-        clf, X_train, X_test, y_train, y_test = train_rf(features, labels)
-        recommendation = clf.predict(features.iloc[[-1]])[0]
-        confidence = clf.predict_proba(features.iloc[[-1]]).max() * 100
-        details = f"Price: ₹{df['Close'].iloc[-1]:.2f} | Predicted: ₹{lstm_price:.2f}"
-
-        return recommendation, confidence, details, df, news, clf, labels, features, model, scaler, X_train, X_test, y_train, y_test
 
-    except Exception as e:
-        return "HOLD", 50.0, f"Analysis error: {str(e)[:50]}", None, None, None, None, None, None, None, None, None, None, None
-
-
-# Backtesting functions
-def portfolio_backtest(df, signals, start_capital=1.0):
-    capital = start_capital
-    position = 0
-    cash = capital
-    portfolio_values = []
-    trade_entries = []
-    trade_returns = []
-
-    entry_price = None
-
-    for date, signal in signals.items():
-        price = df.loc[date, 'Close']
-
-        if signal == 'BUY' and position == 0:
-            position = cash / price
-            cash = 0
-            entry_price = price
-            trade_entries.append((date, 'BUY', price))
-        elif signal == 'SELL' and position > 0:
-            cash = position * price
-            position = 0
-            trade_entries.append((date, 'SELL', price))
-            trade_return = (price - entry_price) / entry_price
-            trade_returns.append(trade_return)
-            entry_price = None
-
-        port_val = cash + position * price
-        portfolio_values.append((date, port_val))
-
-    if position > 0 and entry_price is not None:
-        last_price = df['Close'].iloc[-1]
-        trade_return = (last_price - entry_price) / entry_price
-        trade_returns.append(trade_return)
-
-    portfolio_df = pd.DataFrame(portfolio_values, columns=['Date', 'PortfolioValue']).set_index('Date')
-    portfolio_df = portfolio_df.sort_index()
-
-    returns = portfolio_df['PortfolioValue'].pct_change().dropna()
-    cumulative_return = (portfolio_df['PortfolioValue'][-1] / portfolio_df['PortfolioValue'][0]) - 1
-    days = (portfolio_df.index[-1] - portfolio_df.index[0]).days
-    years = days / 365.25
-    annualized_return = (1 + cumulative_return) ** (1 / years) - 1
-    annualized_vol = returns.std() * np.sqrt(252)
-    sharpe_ratio = annualized_return / annualized_vol if annualized_vol != 0 else np.nan
-
-    rolling_max = portfolio_df['PortfolioValue'].cummax()
-    drawdowns = (portfolio_df['PortfolioValue'] - rolling_max) / rolling_max
-    max_drawdown = drawdowns.min()
-
-    buy_hold_ret = (df['Close'][-1] / df['Close'][0]) ** (1 / years) - 1
-
-    n_trades = len(trade_returns)
-    avg_trade_ret = np.mean(trade_returns) if trade_returns else 0.0
-    median_trade_ret = np.median(trade_returns) if trade_returns else 0.0
-    win_trades = sum(1 for tr in trade_returns if tr > 0)
-    win_rate = (win_trades / n_trades * 100) if n_trades > 0 else 0.0
-
-    summary = f"""
-=== Backtest Summary ===
-\n Period: {portfolio_df.index[0].date()} to {portfolio_df.index[-1].date()} ({years:.2f} years)
-\n Start capital: {start_capital:.4f}, End capital: {portfolio_df['PortfolioValue'][-1]:.4f}
-\n Cumulative return: {cumulative_return * 100:.2f}%
-\n Annualized return: {annualized_return * 100:.2f}%
-\n Annualized vol: {annualized_vol * 100:.2f}%
-\n Sharpe ratio (rf=0): {sharpe_ratio:.2f}
-\n Max drawdown: {max_drawdown * 100:.2f}%
-\n Buy & Hold annualized return: {buy_hold_ret * 100:.2f}%
-\n Number of trades: {n_trades}
-\n Average trade return: {avg_trade_ret * 100:.2f}% | Median: {median_trade_ret * 100:.2f}%
-\n Win rate: {win_trades}/{n_trades} = {win_rate:.2f}%
-    """
-
-    return portfolio_df, trade_entries, trade_returns, summary
-
-
-def run_backtest(ticker, df, clf, labels, features, model, scaler, X_train, X_test, y_train, y_test):
+# Backtesting
+def run_backtest(ticker, df, clf, labels, features, model, scaler, X_train, X_test, y_train, y_test,
+                 walk_forward=False, n_folds=WALK_FORWARD_FOLDS, n_workers=WALK_FORWARD_WORKERS):
     st.markdown(f"### Backtesting {ticker} for last 5 years")
 
-    # Predict labels for entire period to generate signals
-    signals = pd.Series(clf.predict(features.fillna(0)), index=features.index)
-
-    # Run portfolio backtest simulation
-    portfolio_df, trades, trade_returns, summary = portfolio_backtest(df, signals)
+    portfolio_df, trades, trade_returns, summary, fold_report = backtest.backtest_model_signals(
+        df, clf, labels, features, walk_forward=walk_forward, n_folds=n_folds, n_workers=n_workers
+    )
+    if fold_report is not None:
+        st.write(f"Walk-forward signals ({n_folds} expanding folds, {n_workers} workers):")
+        st.dataframe(fold_report)
 
     # Display LSTM prediction
-    lstm_pred = lstm_predict(model, scaler, df)
+    lstm_pred = lstm.lstm_predict(model, scaler, df)
     st.write(f"LSTM price prediction (last data point): {lstm_pred:.2f} vs last Close: {df['Close'].iloc[-1]:.2f}")
 
     # Train RF and evaluate (display report)
     y_test_preds = clf.predict(X_test)
-    rf_report = classification_report(y_test, y_test_preds)
-    accuracy = accuracy_score(y_test, y_test_preds)
+    rf_report = metrics.classification_report(y_test, y_test_preds)
+    accuracy = metrics.accuracy_score(y_test, y_test_preds)
     st.write("Balanced RF classification report:")
     st.code(rf_report)
     st.write(f"Accuracy: {accuracy}")
@@ -1110,11 +668,37 @@ def run_backtest(ticker, df, clf, labels, features, model, scaler, X_train, X_te
         st.write("Feature importance plot skipped:", e)
 
 
+# Pipeline Timings
+def show_trace_panel(run):
+    root = run.spans[-1]
+    with st.expander(f"⏱️ Last analysis timings ({root['wall_s']:.2f}s total)", expanded=False):
+        stages = pd.DataFrame(run.stages())
+        if stages.empty:
+            st.write("No stages were recorded.")
+            return
+        table = pd.DataFrame({
+            "Stage": stages["span"],
+            "Wall (s)": stages["wall_s"].round(3),
+            "CPU (s)": stages["cpu_s"].round(3),
+            "Share (%)": (stages["wall_s"] / root["wall_s"] * 100).round(1),
+        })
+        if stages["rss_delta_bytes"].notna().any():
+            table["RSS change (MiB)"] = (stages["rss_delta_bytes"].astype(float) / 2 ** 20).round(1)
+        if "peak_bytes" in stages:
+            table["Peak alloc (MiB)"] = (stages["peak_bytes"] / 2 ** 20).round(1)
+        if "error" in stages:
+            table["Error"] = stages["error"].fillna("")
+        st.bar_chart(table.set_index("Stage")["Wall (s)"])
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+
 # Main App
 def main():
     # Show loading screen
+    if 'warmup' not in st.session_state:
+        st.session_state.warmup = start_warmup(st.session_state.get('ticker', NIFTY_50_STOCKS[0]))
     if 'loaded' not in st.session_state:
-        show_loading_screen()
+        show_loading_screen(st.session_state.warmup)
         st.session_state.loaded = True
 
     # Sidebar with Professional Design
@@ -1280,10 +864,13 @@ def main():
             format_func=lambda x: f"{x.replace('.NS', '')} - {COMPANY_NAMES.get(x, x.replace('.NS', ''))}",
             index=0
         )
+        # Start fetching the selected stock's history while the user decides
+        st.session_state.warmup.submit(f"prices:{selected_stock}", f"{selected_stock} price history",
+                                       get_price_history, selected_stock)
 
         if st.button("🚀 Analyze Stock", type="primary", use_container_width=True):
             with st.spinner("🤖 Running Advanced AI Analysis..."):
-                result = get_stock_recommendation(selected_stock)
+                result, _, run = analysis.analyze_ticker(selected_stock)
 
                 # Unpack the result with proper handling
                 if len(result) == 14:
@@ -1305,6 +892,7 @@ def main():
                 st.session_state.X_test = X_test
                 st.session_state.y_train = y_train
                 st.session_state.y_test = y_test
+                st.session_state.trace = run
 
                 # Display recommendation with enhanced styling
                 card_class = f"{recommendation.lower()}-result"
@@ -1500,16 +1088,29 @@ def main():
                             """, unsafe_allow_html=True)
                     st.markdown('</div>', unsafe_allow_html=True)
 
+        if st.session_state.get('trace') is not None:
+            show_trace_panel(st.session_state.trace)
+
         # Backtesting Button with enhanced styling
+        walk_forward, n_folds, n_workers = False, WALK_FORWARD_FOLDS, WALK_FORWARD_WORKERS
+        if 'df' in st.session_state:
+            walk_forward = st.checkbox("Walk-forward (out-of-sample) signals", value=False)
+            if walk_forward:
+                n_folds = st.slider("Walk-forward folds", 2, 12, WALK_FORWARD_FOLDS)
+                n_workers = st.slider("Worker processes", 1, os.cpu_count() or 1,
+                                      min(WALK_FORWARD_WORKERS, os.cpu_count() or 1))
+
         if ('df' in st.session_state and
                 all(key in st.session_state for key in
                     ['clf', 'labels', 'features', 'model', 'scaler', 'X_train', 'X_test', 'y_train', 'y_test']) and
                 st.button("📊 Run Backtesting Analysis", type="secondary", use_container_width=True)):
             with st.spinner("🔄 Running Comprehensive Backtest Analysis..."):
+                # Prefer the stored forest for this exact data over whatever the session last held
+                clf = forest.load_rf(st.session_state.ticker, st.session_state.features, st.session_state.df)
                 run_backtest(
                     st.session_state.ticker,
                     st.session_state.df,
-                    st.session_state.clf,
+                    clf if clf is not None else st.session_state.clf,
                     st.session_state.labels,
                     st.session_state.features,
                     st.session_state.model,
@@ -1517,9 +1118,30 @@ def main():
                     st.session_state.X_train,
                     st.session_state.X_test,
                     st.session_state.y_train,
-                    st.session_state.y_test
+                    st.session_state.y_test,
+                    walk_forward=walk_forward,
+                    n_folds=n_folds,
+                    n_workers=n_workers
                 )
 
+    # Nifty 50 Screener
+    st.markdown('<div class="fade-in">', unsafe_allow_html=True)
+    st.markdown("## 📋 Nifty 50 Screener")
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        if st.button("🧮 Screen All Nifty 50 Stocks", use_container_width=True):
+            progress = st.progress(0.0, text="Starting screener workers...")
+
+            def report_progress(done, total, row):
+                progress.progress(done / total, text=f"{done}/{total} analyzed · {row['Ticker']}: {row['Recommendation']}")
+
+            st.session_state.screen_results = analysis.screen_stocks(progress_callback=report_progress)
+            progress.empty()
+
+    if 'screen_results' in st.session_state:
+        st.dataframe(st.session_state.screen_results, use_container_width=True, hide_index=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
     # Market Overview Section with enhanced styling
     st.markdown('<div class="fade-in">', unsafe_allow_html=True)
     st.markdown("## 📊 Indian Stock Market Overview")
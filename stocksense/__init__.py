@@ -0,0 +1,19 @@
+"""StockSense analytics engine.
+
+The modelling, data and backtesting code behind the Streamlit app, importable without Streamlit:
+
+- ``config``: tickers, index maps, model and cache settings
+- ``data``: local price store, batched quotes, NewsAPI and the shared HTTP client
+- ``indicators``: technical indicators, labels and RF features
+- ``feature_store``: memory-mapped indicator, feature and label matrices per ticker and data version
+- ``sentiment``: FinBERT headline scoring
+- ``lstm``: LSTM price model and checkpoint registry
+- ``global_lstm``: one LSTM shared across tickers, trained on a mixed panel
+- ``forest``: RandomForest classifier
+- ``backtest``: vectorized and walk-forward backtests
+- ``analysis``: single-ticker recommendation and the batch screener
+- ``sweep``: parallel hyperparameter sweeps with pruning and a SQLite results table
+- ``tracing``: per-stage wall/CPU/memory spans, exported as JSON lines and Prometheus text
+
+Run ``python -m stocksense --help`` for the headless command line.
+"""
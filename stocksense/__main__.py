@@ -0,0 +1,5 @@
+import sys
+
+from stocksense.cli import main
+
+sys.exit(main())
@@ -0,0 +1,123 @@
+"""End-to-end stock recommendation and the batch screener."""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from stocksense.config import COMPANY_NAMES, LSTM_MODE, NIFTY_50_STOCKS, SCREENER_WORKERS
+from stocksense.data import build_news_query, fetch_news_newsapi, get_price_history
+from stocksense.feature_store import stored_features
+from stocksense.forest import forest_predict_proba, train_rf
+from stocksense.global_lstm import global_ticker_model
+from stocksense.lstm import init_pool_worker, lstm_predict, pool_context, train_lstm
+from stocksense.sentiment import analyze_sentiment_news
+from stocksense.tracing import span, trace
+
+
+# Stock Recommendation
+def get_stock_recommendation(ticker):
+    return analyze_ticker(ticker)[0]
+
+
+def analyze_ticker(ticker):
+    """get_stock_recommendation's result tuple, the LSTM price target (NaN on failure) and the traced Run.
+
+    The Run holds this analysis's per-stage timings; it is None when tracing is disabled.
+    """
+    with trace("analysis", ticker=ticker) as run:
+        result, lstm_price = _recommend(ticker)
+    return result, lstm_price, run
+
+
+def _recommend(ticker):
+    try:
+        with span("price_history"):
+            df = get_price_history(ticker)
+        if df.empty:
+            return ("HOLD", 50.0, "No data available", None, None, None, None, None, None, None, None, None, None,
+                    None), np.nan
+
+        df = df.rename(columns=str.capitalize)
+        with span("features"):
+            df, features, labels = stored_features(ticker, df)
+
+        # News & Sentiment
+        company_name = COMPANY_NAMES.get(ticker.upper(), ticker)
+        with span("news"):
+            query = build_news_query(ticker)
+            news = fetch_news_newsapi(query, company_name, ticker, limit=10)
+        with span("sentiment"):
+            sentiment_score = analyze_sentiment_news(news)
+        sentiment_series = pd.Series(sentiment_score, index=df.index)
+
+        # LSTM
+        with span("train_lstm"):
+            global_model = global_ticker_model(ticker, df) if LSTM_MODE == "global" else None
+            model, scaler = global_model or train_lstm(df, ticker)
+        with span("lstm_predict"):
+            lstm_price = lstm_predict(model, scaler, df)
+
+        # Random Forest
+        features["sentiment"] = sentiment_series
+        with span("train_rf"):
+            clf, X_train, X_test, y_train, y_test = train_rf(features, labels, ticker, df)
+        with span("rf_predict"):
+            proba = forest_predict_proba(clf, features.iloc[[-1]])[0]
+        recommendation = clf.classes_[proba.argmax()]
+        confidence = proba.max() * 100
+        details = f"Price: ₹{df['Close'].iloc[-1]:.2f} | Predicted: ₹{lstm_price:.2f}"
+
+        return (recommendation, confidence, details, df, news, clf, labels, features, model, scaler, X_train, X_test,
+                y_train, y_test), lstm_price
+
+    except Exception as e:
+        return ("HOLD", 50.0, f"Analysis error: {str(e)[:50]}", None, None, None, None, None, None, None, None, None,
+                None, None), np.nan
+
+
+# Batch Screener
+def _screen_ticker(ticker):
+    result, target, _ = analyze_ticker(ticker)
+    recommendation, confidence, details, df = result[:4]
+    row = {
+        "Ticker": ticker.replace('.NS', ''),
+        "Company": COMPANY_NAMES.get(ticker, ticker.replace('.NS', '')),
+        "Recommendation": recommendation,
+        "Confidence (%)": round(float(confidence), 1),
+        "Price": np.nan,
+        "LSTM Target": np.nan,
+        "Upside (%)": np.nan,
+        "Note": ""
+    }
+    if df is None:
+        row["Note"] = details
+        return row
+    price, target = float(df["Close"].iloc[-1]), float(target)
+    row.update({"Price": round(price, 2), "LSTM Target": round(target, 2),
+                "Upside (%)": round((target - price) / price * 100, 2)})
+    return row
+
+
+def screen_stocks(tickers=NIFTY_50_STOCKS, n_workers=SCREENER_WORKERS, progress_callback=None):
+    """Run get_stock_recommendation for every ticker across a process pool.
+
+    progress_callback(done, total, row) is called in the parent as each ticker finishes.
+    Returns one row per ticker, in the order the tickers were given.
+    """
+    torch_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    rows = {}
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=pool_context(), initializer=init_pool_worker,
+                             initargs=(torch_threads,)) as pool:
+        futures = {pool.submit(_screen_ticker, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {"Ticker": ticker.replace('.NS', ''), "Recommendation": "HOLD",
+                       "Note": f"Worker error: {str(e)[:50]}"}
+            rows[ticker] = row
+            if progress_callback is not None:
+                progress_callback(len(rows), len(tickers), row)
+    return pd.DataFrame([rows[t] for t in tickers])
@@ -0,0 +1,303 @@
+"""Vectorized portfolio backtests and the parallel walk-forward engine."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import torch
+
+from stocksense.config import LOOKBACK, WALK_FORWARD_FOLDS, WALK_FORWARD_WORKERS
+from stocksense.forest import forest_predict, train_rf
+from stocksense.lstm import DEVICE, init_pool_worker, make_windows, pool_context, train_lstm
+
+
+# Backtesting functions
+def signal_codes(signals):
+    """Map BUY/SELL/HOLD labels (or signed numbers) to +1/-1/0 int8 codes"""
+    values = np.asarray(signals)
+    if values.dtype.kind in "biuf":
+        return np.sign(np.nan_to_num(values)).astype(np.int8)
+    return np.where(values == "BUY", 1, np.where(values == "SELL", -1, 0)).astype(np.int8)
+
+
+def vectorized_backtest(close, signals, years, start_capital=1.0):
+    """Long-only all-in backtest of one or many signal columns against one close series.
+
+    close: (T,) prices. signals: (T,) or (T, K) labels or +1/-1/0 codes. A BUY opens a position when
+    flat and a SELL closes it when long; trades fill at that bar's close. Returns a dict of (T, K)
+    position/equity arrays, per-column metric arrays and per-column trade index arrays.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    codes = signal_codes(signals)
+    if codes.ndim == 1:
+        codes = codes[:, None]
+    n_bars, n_cols = codes.shape
+
+    # Position is long whenever the most recent BUY/SELL signal so far was a BUY
+    last_signal = np.maximum.accumulate(np.where(codes != 0, np.arange(n_bars)[:, None], 0), axis=0)
+    position = (np.take_along_axis(codes, last_signal, axis=0) == 1).astype(np.int8)
+
+    price_ret = np.zeros(n_bars)
+    price_ret[1:] = close[1:] / close[:-1] - 1
+    held = np.zeros((n_bars, n_cols))
+    held[1:] = position[:-1]
+    equity = start_capital * np.cumprod(1 + held * price_ret[:, None], axis=0)
+
+    cumulative_return = equity[-1] / equity[0] - 1
+    annualized_return = (1 + cumulative_return) ** (1 / years) - 1
+    annualized_vol = np.std(equity[1:] / equity[:-1] - 1, axis=0, ddof=1) * np.sqrt(252)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe_ratio = np.where(annualized_vol != 0, annualized_return / annualized_vol, np.nan)
+    running_max = np.maximum.accumulate(equity, axis=0)
+    max_drawdown = ((equity - running_max) / running_max).min(axis=0)
+
+    change = np.diff(position, axis=0, prepend=0)
+    entries, exits, trade_returns = [], [], []
+    for k in range(n_cols):
+        entry_idx = np.flatnonzero(change[:, k] == 1)
+        exit_idx = np.flatnonzero(change[:, k] == -1)
+        # A position still open at the end is marked to the last close
+        exit_prices = np.append(close[exit_idx], close[-1])[:len(entry_idx)]
+        entries.append(entry_idx)
+        exits.append(exit_idx)
+        trade_returns.append((exit_prices - close[entry_idx]) / close[entry_idx])
+
+    n_trades = np.array([len(tr) for tr in trade_returns])
+    win_trades = np.array([int((tr > 0).sum()) for tr in trade_returns])
+    return {
+        "position": position,
+        "equity": equity,
+        "entries": entries,
+        "exits": exits,
+        "trade_returns": trade_returns,
+        "cumulative_return": cumulative_return,
+        "annualized_return": annualized_return,
+        "annualized_vol": annualized_vol,
+        "sharpe_ratio": sharpe_ratio,
+        "max_drawdown": max_drawdown,
+        "n_trades": n_trades,
+        "avg_trade_ret": np.array([tr.mean() if len(tr) else 0.0 for tr in trade_returns]),
+        "median_trade_ret": np.array([np.median(tr) if len(tr) else 0.0 for tr in trade_returns]),
+        "win_trades": win_trades,
+        "win_rate": np.where(n_trades > 0, win_trades / np.maximum(n_trades, 1) * 100, 0.0)
+    }
+
+
+def _backtest_years(index):
+    return (index.max() - index.min()).days / 365.25
+
+
+def backtest_signal_matrix(df, signals, start_capital=1.0):
+    """Backtest every column of a signal DataFrame in one pass; returns one row of metrics per column"""
+    signals = signals.sort_index()
+    result = vectorized_backtest(df["Close"].reindex(signals.index).values, signals.values,
+                                 _backtest_years(signals.index), start_capital)
+    metric_names = ["cumulative_return", "annualized_return", "annualized_vol", "sharpe_ratio",
+                    "max_drawdown", "n_trades", "avg_trade_ret", "median_trade_ret", "win_rate"]
+    return pd.DataFrame({name: result[name] for name in metric_names}, index=signals.columns)
+
+
+def portfolio_backtest(df, signals, start_capital=1.0):
+    signals = signals.sort_index()
+    close = df["Close"].reindex(signals.index).values
+    years = _backtest_years(signals.index)
+    result = vectorized_backtest(close, signals.values, years, start_capital)
+
+    portfolio_df = pd.DataFrame({"PortfolioValue": result["equity"][:, 0]}, index=signals.index)
+    portfolio_df.index.name = "Date"
+
+    dates = signals.index
+    trade_entries = sorted(
+        [(dates[i], 'BUY', close[i]) for i in result["entries"][0]] +
+        [(dates[i], 'SELL', close[i]) for i in result["exits"][0]],
+        key=lambda trade: trade[0]
+    )
+    trade_returns = list(result["trade_returns"][0])
+
+    cumulative_return = result["cumulative_return"][0]
+    annualized_return = result["annualized_return"][0]
+    annualized_vol = result["annualized_vol"][0]
+    sharpe_ratio = result["sharpe_ratio"][0]
+    max_drawdown = result["max_drawdown"][0]
+
+    buy_hold_ret = (df['Close'].iloc[-1] / df['Close'].iloc[0]) ** (1 / years) - 1
+
+    n_trades = int(result["n_trades"][0])
+    avg_trade_ret = result["avg_trade_ret"][0]
+    median_trade_ret = result["median_trade_ret"][0]
+    win_trades = int(result["win_trades"][0])
+    win_rate = result["win_rate"][0]
+
+    summary = f"""
+=== Backtest Summary ===
+\n Period: {portfolio_df.index[0].date()} to {portfolio_df.index[-1].date()} ({years:.2f} years)
+\n Start capital: {start_capital:.4f}, End capital: {portfolio_df['PortfolioValue'].iloc[-1]:.4f}
+\n Cumulative return: {cumulative_return * 100:.2f}%
+\n Annualized return: {annualized_return * 100:.2f}%
+\n Annualized vol: {annualized_vol * 100:.2f}%
+\n Sharpe ratio (rf=0): {sharpe_ratio:.2f}
+\n Max drawdown: {max_drawdown * 100:.2f}%
+\n Buy & Hold annualized return: {buy_hold_ret * 100:.2f}%
+\n Number of trades: {n_trades}
+\n Average trade return: {avg_trade_ret * 100:.2f}% | Median: {median_trade_ret * 100:.2f}%
+\n Win rate: {win_trades}/{n_trades} = {win_rate:.2f}%
+    """
+
+    return portfolio_df, trade_entries, trade_returns, summary
+
+
+# Walk-forward Backtest
+def walk_forward_folds(n_rows, n_folds=WALK_FORWARD_FOLDS, mode="expanding", purge=5):
+    """Chronological (train_start, train_end, test_start, test_end) row ranges.
+
+    The first 1/(n_folds + 1) of the rows is only ever trained on; the rest is split into n_folds
+    consecutive test blocks. "expanding" trains on everything before a block, "rolling" on a
+    window of the same length as the first one. Training stops `purge` rows before each block
+    because labels look `horizon` bars ahead.
+    """
+    min_train = n_rows // (n_folds + 1)
+    test_size = (n_rows - min_train) // n_folds
+    folds = []
+    for k in range(n_folds):
+        test_start = min_train + k * test_size
+        test_end = n_rows if k == n_folds - 1 else test_start + test_size
+        train_start = 0 if mode == "expanding" else max(test_start - min_train, 0)
+        folds.append((train_start, test_start - purge, test_start, test_end))
+    return folds
+
+
+def _walk_forward_fold(shm_name, shape, columns, fold, include_lstm):
+    train_start, train_end, test_start, test_end = fold
+    close_col, label_col = columns.index("Close"), columns.index("label")
+    feature_cols = [i for i in range(len(columns)) if i not in (close_col, label_col)]
+
+    shm = SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        X_train = data[train_start:train_end, feature_cols].copy()
+        codes = data[train_start:train_end, label_col].copy()
+        X_test = data[test_start:test_end, feature_cols].copy()
+        closes = data[train_start:test_end, close_col].copy()
+        del data
+    finally:
+        shm.close()
+
+    feature_names = [columns[i] for i in feature_cols]
+    labels = pd.Series(np.where(codes == 1, "BUY", np.where(codes == -1, "SELL", "HOLD")).astype(object))
+    labels[np.isnan(codes)] = np.nan
+    try:
+        clf = train_rf(pd.DataFrame(X_train, columns=feature_names), labels)[0]
+        signals = clf.predict(pd.DataFrame(X_test, columns=feature_names))
+    except ValueError:
+        # Too few rows of some class to balance this fold
+        signals = np.full(len(X_test), "HOLD", dtype=object)
+
+    lstm_pred = None
+    n_train_closes = test_start - train_start
+    if include_lstm and n_train_closes > LOOKBACK:
+        model, scaler = train_lstm(pd.DataFrame({"Close": closes[:n_train_closes]}))
+        scaled = scaler.transform(closes[n_train_closes - LOOKBACK:].reshape(-1, 1))
+        with torch.no_grad():
+            pred = model(torch.from_numpy(make_windows(scaled)[:-1]).to(DEVICE)).cpu().numpy()
+        lstm_pred = scaler.inverse_transform(pred).ravel()
+    return signals, lstm_pred
+
+
+def walk_forward_signals(df, features, labels, n_folds=WALK_FORWARD_FOLDS, n_workers=WALK_FORWARD_WORKERS,
+                         mode="expanding", include_lstm=False):
+    """Retrain per fold in a process pool and stitch the out-of-sample RF signals together.
+
+    Returns the signal Series over the tested rows, the stitched one-step LSTM price predictions
+    (or None) and a per-fold report.
+    """
+    columns = list(features.columns) + ["Close", "label"]
+    data = np.column_stack([
+        features.values.astype(np.float64),
+        df["Close"].reindex(features.index).values.astype(np.float64),
+        np.where(labels.isna(), np.nan, signal_codes(labels.fillna("HOLD")).astype(np.float64))
+    ])
+    folds = walk_forward_folds(len(data), n_folds, mode)
+    torch_threads = max(1, (os.cpu_count() or 1) // n_workers)
+
+    shm = SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=pool_context(), initializer=init_pool_worker,
+                                 initargs=(torch_threads,)) as pool:
+            futures = [pool.submit(_walk_forward_fold, shm.name, data.shape, columns, fold, include_lstm)
+                       for fold in folds]
+            results = [f.result() for f in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    test_index = features.index[folds[0][2]:]
+    signals = pd.Series(np.concatenate([r[0] for r in results]), index=test_index)
+    lstm_predictions = None
+    if include_lstm:
+        lstm_predictions = pd.Series(np.concatenate([
+            r[1] if r[1] is not None else np.full(fold[3] - fold[2], np.nan) for r, fold in zip(results, folds)
+        ]), index=test_index)
+
+    close = data[:, columns.index("Close")]
+    report = []
+    for k, ((train_start, train_end, test_start, test_end), (fold_signals, _)) in enumerate(zip(folds, results)):
+        actual = labels.iloc[test_start:test_end]
+        known = actual.notna().values
+        row = {
+            "fold": k + 1,
+            "train_from": features.index[train_start].date(),
+            "train_to": features.index[train_end - 1].date(),
+            "test_from": features.index[test_start].date(),
+            "test_to": features.index[test_end - 1].date(),
+            "oos_accuracy": float((fold_signals[known] == actual.values[known]).mean()) if known.any() else np.nan
+        }
+        if include_lstm:
+            row.update(lstm_accuracy(lstm_predictions.values[test_start - folds[0][2]:test_end - folds[0][2]],
+                                     close[test_start:test_end], close[test_start - 1:test_end - 1]))
+        report.append(row)
+    return signals, lstm_predictions, pd.DataFrame(report).set_index("fold")
+
+
+def lstm_accuracy(predicted, actual, previous):
+    """Out-of-sample MAPE (%) and direction accuracy of one-step price predictions.
+
+    previous is the close each prediction was made from; a direction is right when the predicted
+    and actual moves away from it have the same sign. Rows without a prediction are skipped.
+    """
+    known = ~np.isnan(predicted)
+    if not known.any():
+        return {"lstm_mape": np.nan, "lstm_direction_accuracy": np.nan}
+    predicted, actual, previous = predicted[known], actual[known], previous[known]
+    return {
+        "lstm_mape": float(np.mean(np.abs(predicted - actual) / actual) * 100),
+        "lstm_direction_accuracy": float(np.mean(np.sign(predicted - previous) == np.sign(actual - previous)))
+    }
+
+
+def backtest_model_signals(df, clf, labels, features, walk_forward=False, n_folds=WALK_FORWARD_FOLDS,
+                           n_workers=WALK_FORWARD_WORKERS, mode="expanding", include_lstm=False):
+    """Backtest the RF's signals over the whole history, or walk-forward out-of-sample signals.
+
+    Returns portfolio_backtest's results followed by the per-fold report (None when not walking forward).
+    With include_lstm, the LSTM is retrained per fold too and its out-of-sample MAPE and direction
+    accuracy are added to the fold report and the summary.
+    """
+    features = features.fillna(0)
+    if walk_forward:
+        # Out-of-sample signals from models retrained on each fold's past only
+        signals, lstm_predictions, fold_report = walk_forward_signals(df, features, labels, n_folds, n_workers, mode,
+                                                                      include_lstm)
+        portfolio_df, trades, trade_returns, summary = portfolio_backtest(df.loc[signals.index], signals)
+        if lstm_predictions is not None:
+            close = df["Close"].reindex(features.index)
+            lstm = lstm_accuracy(lstm_predictions.values, close.loc[signals.index].values,
+                                 close.shift(1).loc[signals.index].values)
+            summary += (f"\n LSTM out-of-sample MAPE: {lstm['lstm_mape']:.2f}% | "
+                        f"Direction accuracy: {lstm['lstm_direction_accuracy'] * 100:.2f}%\n")
+        return portfolio_df, trades, trade_returns, summary, fold_report
+
+    # Predict labels for entire period to generate signals
+    signals = pd.Series(forest_predict(clf, features), index=features.index)
+    return (*portfolio_backtest(df, signals), None)
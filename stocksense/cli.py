@@ -0,0 +1,254 @@
+"""Headless command line for analyses, screens and backtests."""
+import argparse
+import json
+import sys
+
+from stocksense.config import (
+    GLOBAL_EMBED_DIM, GLOBAL_EPOCHS, LSTM_MODE, NIFTY_50_STOCKS, SCREENER_WORKERS, SWEEP_DB_PATH, SWEEP_WORKERS,
+    WALK_FORWARD_FOLDS, WALK_FORWARD_WORKERS
+)
+
+SCREEN_SORT_COLUMNS = {
+    "ticker": "Ticker",
+    "recommendation": "Recommendation",
+    "confidence": "Confidence (%)",
+    "upside": "Upside (%)"
+}
+
+
+def cmd_analyze(args):
+    from stocksense.analysis import get_stock_recommendation
+    from stocksense.lstm import lstm_predict
+
+    result = get_stock_recommendation(args.ticker)
+    recommendation, confidence, details, df = result[:4]
+    if df is None:
+        print(details, file=sys.stderr)
+        return 1
+
+    output = {
+        "ticker": args.ticker,
+        "recommendation": recommendation,
+        "confidence": round(float(confidence), 2),
+        "price": round(float(df["Close"].iloc[-1]), 2),
+        "lstm_target": round(float(lstm_predict(result[8], result[9], df)), 2),
+        "news": [n["title"] for n in result[4]]
+    }
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        print(f"{args.ticker}: {recommendation} ({confidence:.1f}% confidence)")
+        print(details)
+    return 0
+
+
+def cmd_screen(args):
+    from stocksense.analysis import screen_stocks
+
+    def report_progress(done, total, row):
+        print(f"[{done}/{total}] {row['Ticker']}: {row['Recommendation']}", file=sys.stderr)
+
+    table = screen_stocks(args.tickers or NIFTY_50_STOCKS, args.workers, report_progress)
+    table = table.sort_values(SCREEN_SORT_COLUMNS[args.sort], ascending=args.sort == "ticker")
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+    print(table.to_string(index=False))
+    return 0
+
+
+def cmd_backtest(args):
+    from stocksense.analysis import get_stock_recommendation
+    from stocksense.backtest import backtest_model_signals
+
+    result = get_stock_recommendation(args.ticker)
+    df = result[3]
+    if df is None:
+        print(result[2], file=sys.stderr)
+        return 1
+
+    clf, labels, features = result[5], result[6], result[7]
+    portfolio_df, trades, trade_returns, summary, fold_report = backtest_model_signals(
+        df, clf, labels, features, walk_forward=args.walk_forward, n_folds=args.folds, n_workers=args.workers,
+        mode=args.mode, include_lstm=args.lstm
+    )
+    if fold_report is not None:
+        print(fold_report.to_string())
+    print("\n".join(line.strip() for line in summary.splitlines() if line.strip()))
+    return 0
+
+
+def cmd_forecast(args):
+    from stocksense.data import get_price_history
+    from stocksense.global_lstm import load_global_lstm
+    from stocksense.lstm import forecast_tickers, train_lstm
+
+    frames = {}
+    for ticker in args.tickers or NIFTY_50_STOCKS:
+        df = get_price_history(ticker)
+        if df.empty:
+            print(f"{ticker}: no price history, skipped", file=sys.stderr)
+            continue
+        frames[ticker] = df.rename(columns=str.capitalize)
+
+    loaded = load_global_lstm(frames) if LSTM_MODE == "global" else None
+    if loaded is not None and all(t in loaded[1] for t in frames):
+        models, scalers = loaded
+    else:
+        models, scalers = {}, {}
+        for ticker, df in frames.items():
+            models[ticker], scalers[ticker] = train_lstm(df, ticker)
+
+    paths = forecast_tickers(frames, models, scalers, horizon=args.horizon)
+    for ticker, path in paths.items():
+        print(f"{ticker:<14} {frames[ticker]['Close'].iloc[-1]:>10.2f} -> " + " ".join(f"{p:.2f}" for p in path))
+    return 0
+
+
+def cmd_train_global(args):
+    from stocksense.data import get_price_history
+    from stocksense.global_lstm import train_global_lstm
+
+    frames = {}
+    for ticker in args.tickers or NIFTY_50_STOCKS:
+        df = get_price_history(ticker)
+        if df.empty:
+            print(f"{ticker}: no price history, skipped", file=sys.stderr)
+            continue
+        frames[ticker] = df.rename(columns=str.capitalize)
+    model, _ = train_global_lstm(frames, epochs=args.epochs, embed_dim=args.embed_dim)
+    print(f"Trained global LSTM on {len(model.tickers)} tickers; set STOCKSENSE_LSTM_MODE=global to use it")
+    return 0
+
+
+def _sweep_values(values, cast):
+    # "low:high" is a range for random search; anything else is a list of values
+    if len(values) == 1 and ":" in values[0]:
+        low, high = values[0].split(":")
+        return cast(low), cast(high)
+    return [cast(v) for v in values]
+
+
+def cmd_sweep(args):
+    from stocksense.data import get_price_history
+    from stocksense.sweep import grid_trials, random_trials, run_sweep
+
+    space = {}
+    for name, cast in [("lookback", int), ("hidden_size", int), ("epochs", int), ("horizon", int),
+                       ("vol_factor", float)]:
+        if getattr(args, name):
+            space[name] = _sweep_values(getattr(args, name), cast)
+    if not space:
+        print("Give at least one of --lookback, --hidden-size, --epochs, --horizon, --vol-factor", file=sys.stderr)
+        return 1
+    if args.random:
+        trials = random_trials(space, args.random, args.seed)
+    elif any(isinstance(v, tuple) for v in space.values()):
+        print("low:high ranges need --random N", file=sys.stderr)
+        return 1
+    else:
+        trials = grid_trials(space)
+
+    df = get_price_history(args.ticker)
+    if df.empty:
+        print(f"{args.ticker}: no price history", file=sys.stderr)
+        return 1
+
+    def report_progress(done, total, row):
+        value = "" if row.get("value") is None else f" {row['objective']}={row['value']:.4f}"
+        print(f"[{done}/{total}] trial {row['trial']} {row['status']}{value} {row['params']}", file=sys.stderr)
+
+    results = run_sweep(df, trials, args.ticker, args.objective, n_workers=args.workers, db_path=args.db,
+                        progress_callback=report_progress)
+    print(_format_sweep(results, args.top))
+    return 0
+
+
+def cmd_sweep_results(args):
+    from stocksense.sweep import load_results
+
+    results = load_results(args.sweep_id, args.db)
+    if results.empty:
+        print("No sweep results", file=sys.stderr)
+        return 1
+    print(_format_sweep(results, args.top))
+    return 0
+
+
+def _format_sweep(results, top):
+    # Metrics of a stage no trial ran are all empty
+    results = results.dropna(axis=1, how="all")
+    columns = [c for c in results.columns if c not in ("sweep_id", "ticker", "error", "finished_at")]
+    header = f"Sweep {results['sweep_id'].iloc[0]}: {len(results)} trials, " + \
+        ", ".join(f"{n} {s}" for s, n in results["status"].value_counts().items())
+    return header + "\n" + results[columns].head(top).to_string(index=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m stocksense", description="StockSense headless engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="Buy/Hold/Sell recommendation for one ticker")
+    analyze.add_argument("ticker", help="Yahoo Finance symbol, e.g. TCS.NS")
+    analyze.add_argument("--json", action="store_true", help="Print the result as JSON")
+    analyze.set_defaults(func=cmd_analyze)
+
+    screen = commands.add_parser("screen", help="Recommendations for many tickers in a process pool")
+    screen.add_argument("tickers", nargs="*", help="Symbols to screen (default: all NIFTY_50_STOCKS)")
+    screen.add_argument("--workers", type=int, default=SCREENER_WORKERS)
+    screen.add_argument("--sort", choices=sorted(SCREEN_SORT_COLUMNS), default="confidence")
+    screen.add_argument("--csv", help="Also write the table to this CSV file")
+    screen.set_defaults(func=cmd_screen)
+
+    backtest = commands.add_parser("backtest", help="Backtest RF signals for one ticker")
+    backtest.add_argument("ticker")
+    backtest.add_argument("--walk-forward", action="store_true", help="Use out-of-sample walk-forward signals")
+    backtest.add_argument("--folds", type=int, default=WALK_FORWARD_FOLDS)
+    backtest.add_argument("--workers", type=int, default=WALK_FORWARD_WORKERS)
+    backtest.add_argument("--mode", choices=["expanding", "rolling"], default="expanding")
+    backtest.add_argument("--lstm", action="store_true", help="Also retrain the LSTM in each fold")
+    backtest.set_defaults(func=cmd_backtest)
+
+    forecast = commands.add_parser("forecast", help="Multi-step LSTM price paths for many tickers")
+    forecast.add_argument("tickers", nargs="*", help="Symbols to forecast (default: all NIFTY_50_STOCKS)")
+    forecast.add_argument("--horizon", type=int, default=5, help="Number of future bars to forecast")
+    forecast.set_defaults(func=cmd_forecast)
+
+    train_global = commands.add_parser("train-global", help="Train one shared LSTM across many tickers")
+    train_global.add_argument("tickers", nargs="*", help="Symbols in the panel (default: all NIFTY_50_STOCKS)")
+    train_global.add_argument("--epochs", type=int, default=GLOBAL_EPOCHS)
+    train_global.add_argument("--embed-dim", type=int, default=GLOBAL_EMBED_DIM,
+                              help="Ticker embedding size; 0 trains without one")
+    train_global.set_defaults(func=cmd_train_global)
+
+    sweep = commands.add_parser("sweep", help="Hyperparameter sweep for one ticker in a process pool",
+                                description="Each option takes a list of values for a grid, or low:high with --random")
+    sweep.add_argument("ticker")
+    sweep.add_argument("--lookback", nargs="+")
+    sweep.add_argument("--hidden-size", nargs="+")
+    sweep.add_argument("--epochs", nargs="+")
+    sweep.add_argument("--horizon", nargs="+", help="Label horizon in bars")
+    sweep.add_argument("--vol-factor", nargs="+", help="Label threshold as a multiple of 30-day volatility")
+    sweep.add_argument("--random", type=int, metavar="N", help="Random search with N trials instead of a grid")
+    sweep.add_argument("--seed", type=int, default=0)
+    sweep.add_argument("--objective", choices=["sharpe", "lstm_mape"],
+                       help="Metric to rank and prune on (default: sharpe if label params are swept)")
+    sweep.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    sweep.add_argument("--db", default=SWEEP_DB_PATH, help="SQLite results table")
+    sweep.add_argument("--top", type=int, default=10, help="Number of best trials to print")
+    sweep.set_defaults(func=cmd_sweep)
+
+    sweep_results = commands.add_parser("sweep-results", help="Show a finished sweep from the results table")
+    sweep_results.add_argument("sweep_id", nargs="?", help="Sweep to show (default: the latest)")
+    sweep_results.add_argument("--db", default=SWEEP_DB_PATH)
+    sweep_results.add_argument("--top", type=int, default=10)
+    sweep_results.set_defaults(func=cmd_sweep_results)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Shared configuration for the StockSense engine and app."""
+import os
+
+LOOKBACK = 90
+EPOCHS = 50
+HIDDEN_SIZE = 128
+NEWSAPI_KEY = "272cce001c674f2b8fe9bb051b2c1804"  # Replace with your actual API key
+NEWSAPI_URL = os.environ.get("NEWSAPI_URL", "https://newsapi.org/v2/everything")  # Point at a local stub for testing
+FINBERT_MODEL = "ProsusAI/finbert"
+
+CACHE_DIR = os.environ.get("STOCKSENSE_CACHE_DIR", ".stocksense_cache")
+PRICE_STORE_DIR = os.path.join(CACHE_DIR, "prices")
+PRICE_REFRESH_SECONDS = 300  # Skip the delta fetch if the store was refreshed recently
+PRICE_ADJUST_TOLERANCE = 1e-4  # Relative close mismatch on a refetched bar that means history was re-adjusted
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+MODEL_STORE_DIR = os.path.join(CACHE_DIR, "models")
+FEATURE_STORE_DIR = os.path.join(CACHE_DIR, "features")
+FEATURE_STORE_TAIL_ROWS = 5  # Newest rows recomputed on every update, since a partial bar can still change
+TRACE_DIR = os.path.join(CACHE_DIR, "traces")
+TRACE_ENABLED = os.environ.get("STOCKSENSE_TRACE", "1") == "1"  # Per-stage timings of each analysis
+TRACE_MEMORY = os.environ.get("STOCKSENSE_TRACE_MEMORY", "0") == "1"  # tracemalloc peaks per span; slows allocation
+LSTM_BATCH_SIZE = 32
+LSTM_BF16 = os.environ.get("STOCKSENSE_LSTM_BF16", "0") == "1"  # bf16 autocast for LSTM training on CPU
+VALIDATION_FRACTION = 0.1  # Newest share of windows held out to drive early stopping
+MIN_VALIDATION_WINDOWS = 32  # Fewer held-out windows than this are too noisy; the training loss is monitored instead
+EARLY_STOP_PATIENCE = 5  # Epochs without a validation improvement before training stops
+LR_PATIENCE = 2  # Epochs without improvement before the learning rate is halved
+LSTM_TIME_BUDGET_SECONDS = float(os.environ.get("STOCKSENSE_LSTM_TIME_BUDGET", "120"))  # 0 disables the deadline
+FINETUNE_EPOCHS = 5
+FINETUNE_MIN_WINDOWS = 32  # Replay recent windows so a single new bar doesn't dominate fine-tuning
+FINETUNE_MAX_NEW_BARS = 60  # Retrain from scratch when more bars than this have arrived
+LSTM_QUANTIZE = os.environ.get("STOCKSENSE_LSTM_QUANTIZE", "0") == "1"  # Serve dynamic int8 LSTMs on CPU
+QUANT_MAX_DRIFT = 0.01  # Largest int8-vs-fp32 prediction gap (scaled 0-1 units) before falling back to fp32
+QUANT_CHECK_WINDOWS = 256
+LSTM_MODE = os.environ.get("STOCKSENSE_LSTM_MODE", "per_ticker")  # "global": serve from the shared panel model
+GLOBAL_EPOCHS = 20
+GLOBAL_BATCH_SIZE = 256
+GLOBAL_TIME_BUDGET_SECONDS = float(os.environ.get("STOCKSENSE_GLOBAL_TIME_BUDGET", "1800"))  # 0 disables the deadline
+GLOBAL_EMBED_DIM = 8  # Size of the learned ticker embedding; 0 trains without one
+RF_N_ESTIMATORS = 500
+RF_N_JOBS = int(os.environ.get("STOCKSENSE_RF_JOBS", "-1"))  # -1 uses every core; pool workers always use 1
+RF_WARM_START_TREES = 50  # Trees added to a stored forest when new labelled bars arrive
+RF_MAX_TREES = 1000  # Refit from scratch instead of growing past this many trees
+RF_WARM_START_MAX_NEW_BARS = 60
+COMPACT_RF_CHUNK_CELLS = 1 << 15  # (row, tree) pairs the compiled forest walks at once
+COMPACT_RF_MAX_ROWS = 256  # Larger batches go to sklearn, whose C traversal is faster per row
+SWEEP_DB_PATH = os.path.join(CACHE_DIR, "sweeps.db")
+SWEEP_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+SWEEP_FOLDS = 3  # Walk-forward folds each label trial is scored on
+SWEEP_HOLDOUT = 0.2  # Newest share of bars each LSTM trial is scored on
+SWEEP_RF_TREES = 100  # Smaller forests keep label trials cheap
+SWEEP_PRUNE_MIN_TRIALS = 4  # Reports needed at a step before a trial can be pruned against their median
+SWEEP_PRUNE_WARMUP_STEPS = 1  # First epochs/folds are too noisy to prune on
+SENTIMENT_CACHE_PATH = os.path.join(CACHE_DIR, "headline_sentiment.db")
+SENTIMENT_BATCH_SIZE = 16
+HTTP_POOL_SIZE = 8
+HTTP_MIN_INTERVAL = {"newsapi.org": 0.1}  # Minimum seconds between requests to the same host
+WALK_FORWARD_FOLDS = 5
+WALK_FORWARD_WORKERS = max(1, min(WALK_FORWARD_FOLDS, (os.cpu_count() or 2) - 1))
+POOL_START_METHOD = os.environ.get("STOCKSENSE_POOL_START_METHOD", "spawn")  # Or "forkserver"; never fork
+SCREENER_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+WARMUP_WORKERS = 4
+WARMUP_TIMEOUT_SECONDS = 15  # Show the app even if critical market data is still loading
+
+# Nifty 50 stocks
+NIFTY_50_STOCKS = [
+    'RELIANCE.NS', 'HDFCBANK.NS', 'TCS.NS', 'INFY.NS', 'HINDUNILVR.NS',
+    'ICICIBANK.NS', 'KOTAKBANK.NS', 'BHARTIARTL.NS', 'ITC.NS', 'SBIN.NS',
+    'LT.NS', 'ASIANPAINT.NS', 'AXISBANK.NS', 'MARUTI.NS', 'TITAN.NS',
+    'NESTLEIND.NS', 'WIPRO.NS', 'ULTRACEMCO.NS', 'HCLTECH.NS', 'BAJFINANCE.NS',
+    'TECHM.NS', 'SUNPHARMA.NS', 'POWERGRID.NS', 'NTPC.NS', 'COALINDIA.NS'
+]
+
+COMPANY_NAMES = {
+    'RELIANCE.NS': 'Reliance Industries', 'HDFCBANK.NS': 'HDFC Bank', 'TCS.NS': 'TCS',
+    'INFY.NS': 'Infosys', 'HINDUNILVR.NS': 'Hindustan Unilever', 'ICICIBANK.NS': 'ICICI Bank',
+    'KOTAKBANK.NS': 'Kotak Bank', 'BHARTIARTL.NS': 'Bharti Airtel', 'ITC.NS': 'ITC Ltd',
+    'SBIN.NS': 'SBI', 'LT.NS': 'L&T', 'ASIANPAINT.NS': 'Asian Paints',
+    'AXISBANK.NS': 'Axis Bank', 'MARUTI.NS': 'Maruti Suzuki', 'TITAN.NS': 'Titan',
+    'NESTLEIND.NS': 'Nestle India', 'WIPRO.NS': 'Wipro', 'ULTRACEMCO.NS': 'UltraTech',
+    'HCLTECH.NS': 'HCL Tech', 'BAJFINANCE.NS': 'Bajaj Finance', 'TECHM.NS': 'Tech Mahindra',
+    'SUNPHARMA.NS': 'Sun Pharma', 'POWERGRID.NS': 'Power Grid', 'NTPC.NS': 'NTPC',
+    'COALINDIA.NS': 'Coal India'
+}
+
+# Indian Market Indices mapping
+INDIAN_INDICES = {
+    'Nifty 50': '^NSEI',
+    'Sensex': '^BSESN',
+    'Nifty Bank': '^NSEBANK',
+    'Nifty IT': '^CNXIT',
+    'Nifty Auto': '^CNXAUTO'
+}
+
+TRENDING_STOCKS = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS', 'BHARTIARTL.NS']
+
+# Sectoral indices mapping
+SECTORAL_INDICES = {
+    'Banking': '^NSEBANK',
+    'IT Services': '^CNXIT',
+    'Oil & Gas': '^CNXENERGY',
+    'Consumer Goods': '^CNXFMCG',
+    'Automobiles': '^CNXAUTO',
+    'Pharma': '^CNXPHARMA',
+    'Metals': '^CNXMETAL',
+    'Telecom': '^CNXIT'  # Using IT as proxy for telecom
+}
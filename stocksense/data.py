@@ -0,0 +1,316 @@
+"""Market data: local price store, batched quotes, NewsAPI access and an HTTP client."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache, wraps
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+from stocksense.config import (
+    COMPANY_NAMES, HTTP_MIN_INTERVAL, HTTP_POOL_SIZE, INDIAN_INDICES, NEWSAPI_KEY, NEWSAPI_URL,
+    OHLCV_COLUMNS, PRICE_ADJUST_TOLERANCE, PRICE_REFRESH_SECONDS, PRICE_STORE_DIR,
+    SECTORAL_INDICES, TRENDING_STOCKS
+)
+
+
+# HTTP Client
+class HttpClient:
+    """Keep-alive session shared across requests, with per-host rate limiting and concurrent dispatch"""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, min_interval=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="http")
+        self.min_interval = min_interval or {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def _wait_for_slot(self, url):
+        host = urlparse(url).hostname
+        interval = self.min_interval.get(host, 0.0)
+        if not interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def get(self, url, params=None, timeout=10):
+        self._wait_for_slot(url)
+        return self.session.get(url, params=params, timeout=timeout)
+
+    def get_many(self, calls, timeout=10):
+        """Run (url, params) GETs concurrently; returns responses, or the raised exception, in input order"""
+        futures = [self.executor.submit(self.get, url, params, timeout) for url, params in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_http_client():
+    return HttpClient(HTTP_POOL_SIZE, HTTP_MIN_INTERVAL)
+
+
+# Caching
+def ttl_cache(seconds):
+    """Cache a function's results per argument tuple for `seconds`, shared by every thread and app session.
+
+    Unlike st.cache_data this works outside a Streamlit script run, so warm-up threads can fill it.
+    """
+    def decorator(fn):
+        entries, lock = {}, threading.Lock()
+
+        @wraps(fn)
+        def wrapper(*args):
+            with lock:
+                entry = entries.get(args)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            value = fn(*args)
+            with lock:
+                entries[args] = (time.monotonic() + seconds, value)
+            return value
+        return wrapper
+    return decorator
+
+
+# Batched Quotes
+@ttl_cache(300)
+def fetch_quote_snapshot():
+    """Fetch the last two closes of every overview symbol in a single batched request"""
+    symbols = list(dict.fromkeys(
+        list(INDIAN_INDICES.values()) + TRENDING_STOCKS + list(SECTORAL_INDICES.values())
+    ))
+    snapshot = {}
+    try:
+        data = yf.download(symbols, period="5d", group_by="ticker", threads=True, progress=False)
+    except Exception:
+        return snapshot
+
+    for symbol in symbols:
+        try:
+            closes = data[symbol]["Close"].dropna()
+        except KeyError:
+            continue
+        if len(closes) >= 2:
+            current_price, prev_price = float(closes.iloc[-1]), float(closes.iloc[-2])
+            snapshot[symbol] = {
+                "price": current_price,
+                "change": ((current_price - prev_price) / prev_price) * 100
+            }
+    return snapshot
+
+
+@ttl_cache(1800)
+def fetch_nifty_trend():
+    """Last month of Nifty 50 closes as (dates, closes), or None if they can't be fetched"""
+    try:
+        hist = yf.Ticker("^NSEI").history(period="1mo")
+    except Exception:
+        return None
+    if hist.empty:
+        return None
+    return hist.index, hist["Close"].values
+
+
+# Local Price Store
+# Daily OHLCV bars are kept per ticker as a single .npy matrix (day number + OHLCV columns)
+# so they can be memory-mapped and replaced atomically.
+def _price_store_path(ticker):
+    return os.path.join(PRICE_STORE_DIR, ticker.replace("^", "_") + ".npy")
+
+
+def load_price_history(ticker):
+    """Load stored daily bars for a ticker, or None if nothing is stored yet"""
+    path = _price_store_path(ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        data = np.load(path, mmap_mode="c")
+    except Exception:
+        return None
+    index = pd.DatetimeIndex(data[:, 0].astype("int64").astype("datetime64[D]"), name="Date")
+    return pd.DataFrame(data[:, 1:], index=index, columns=OHLCV_COLUMNS)
+
+
+def _normalize_bars(df):
+    df = df.rename(columns=str.capitalize)[OHLCV_COLUMNS]
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index = df.index.normalize()
+    return df
+
+
+def save_price_history(ticker, df):
+    """Write daily bars for a ticker to the store and return them as stored.
+
+    The store is append-only: old bars are never trimmed, so rows keep their positions across
+    updates and stores derived from it (see feature_store) can extend their matrices in place.
+    """
+    df = _normalize_bars(df)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+
+    days = df.index.values.astype("datetime64[D]").astype("int64").astype("float64")
+    data = np.column_stack([days, df.values.astype("float64")])
+
+    os.makedirs(PRICE_STORE_DIR, exist_ok=True)
+    path = _price_store_path(ticker)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, data)
+    os.replace(tmp_path, path)
+    return load_price_history(ticker)
+
+
+def _fetch_full_history(ticker):
+    # Cold start (or re-adjusted history): try 5y, then 2y, then 1y
+    for period in ["5y", "2y", "1y"]:
+        df = yf.Ticker(ticker).history(period=period)
+        if not df.empty:
+            break
+    if df.empty:
+        return df
+    return save_price_history(ticker, df)
+
+
+def get_price_history(ticker):
+    """Return daily OHLCV bars, fetching only the bars newer than the last stored date.
+
+    yfinance back-adjusts every earlier close after a split, bonus issue or dividend, so the
+    refetch overlaps the last completed stored bar; if its close no longer matches, the stored
+    history is stale and the full window is downloaded again.
+    """
+    stored = load_price_history(ticker)
+    if stored is None or stored.empty:
+        return _fetch_full_history(ticker)
+
+    path = _price_store_path(ticker)
+    if time.time() - os.path.getmtime(path) < PRICE_REFRESH_SECONDS:
+        return stored
+
+    # Re-fetch from the last completed stored bar, so a partial intraday bar gets completed too
+    anchor = stored.index[-2] if len(stored) > 1 else stored.index[-1]
+    try:
+        delta = yf.Ticker(ticker).history(start=anchor.strftime("%Y-%m-%d"))
+    except Exception:
+        return stored
+    if delta.empty:
+        os.utime(path)
+        return stored
+
+    delta = _normalize_bars(delta)
+    if anchor in delta.index and len(stored) > 1:
+        stored_close, fetched_close = stored.at[anchor, "Close"], delta.at[anchor, "Close"]
+        if not np.isclose(stored_close, fetched_close, rtol=PRICE_ADJUST_TOLERANCE, atol=0):
+            return _fetch_full_history(ticker)
+    merged = pd.concat([stored[stored.index < delta.index[0]], delta])
+    return save_price_history(ticker, merged)
+
+
+# News
+def build_news_query(ticker):
+    company = COMPANY_NAMES.get(ticker.upper(), ticker)
+    return f'"{company}" OR "{ticker.split(".")[0]}"'
+
+
+def fetch_news_newsapi(query, company_name, ticker, limit=10):
+    params = {"q": query, "pageSize": limit, "sortBy": "publishedAt", "apiKey": NEWSAPI_KEY}
+    try:
+        resp = get_http_client().get(NEWSAPI_URL, params=params)
+        if resp.status_code != 200:
+            return []
+        articles = resp.json().get("articles", [])
+        filtered = []
+        for a in articles:
+            title = a.get("title", "")
+            desc = a.get("description", "") or ""
+            if (company_name.lower() in title.lower() or company_name.lower() in desc.lower() or
+                    ticker.split(".")[0].lower() in title.lower()):
+                filtered.append({
+                    "title": title,
+                    "url": a.get("url", ""),
+                    "date": a.get("publishedAt", "")
+                })
+        return filtered
+    except:
+        return []
+
+
+@ttl_cache(900)
+def fetch_market_headlines():
+    """Latest Indian market headlines, each with an emoji, as (headlines, error message or None)"""
+    # Multiple queries for comprehensive Indian market news
+    queries = [
+        "Indian stock market",
+        "Nifty Sensex",
+        "BSE NSE India",
+        "Indian shares market",
+        "Mumbai stock exchange"
+    ]
+    calls = [(NEWSAPI_URL, {
+        'q': query,
+        'country': 'in',
+        'category': 'business',
+        'sortBy': 'publishedAt',
+        'pageSize': 5,
+        'apiKey': NEWSAPI_KEY
+    }) for query in queries[:2]]  # Limit to 2 queries to avoid API limits
+
+    all_articles = []
+    try:
+        for response in get_http_client().get_many(calls):
+            if isinstance(response, Exception):
+                raise response
+            if response.status_code != 200:
+                continue
+            for article in response.json().get('articles', []):
+                title = article.get('title', '')
+                if (title and 'stock' in title.lower() or 'market' in title.lower() or 'nifty' in title.lower() or
+                        'sensex' in title.lower()):
+                    # Create engaging news format
+                    if 'high' in title.lower() or 'surge' in title.lower() or 'rally' in title.lower():
+                        emoji = "🔥"
+                    elif 'fall' in title.lower() or 'drop' in title.lower() or 'decline' in title.lower():
+                        emoji = "📉"
+                    elif 'bank' in title.lower():
+                        emoji = "🏦"
+                    elif 'tech' in title.lower() or 'IT' in title:
+                        emoji = "💻"
+                    elif 'auto' in title.lower():
+                        emoji = "🚗"
+                    else:
+                        emoji = "💰"
+
+                    # Truncate title if too long
+                    short_title = title[:50] + "..." if len(title) > 50 else title
+                    all_articles.append(f"{emoji} {short_title}")
+    except Exception as e:
+        return [], str(e)
+
+    # Top 5 unique articles
+    return list(dict.fromkeys(all_articles))[:5], None
+
+
+# FII/DII Data (Placeholder - you can integrate real API)
+def get_fii_dii_data():
+    return {
+        "FII": {"buy": 7500.25, "sell": 6200.50, "net": 1299.75},
+        "DII": {"buy": 4800.75, "sell": 5100.25, "net": -299.50},
+        "date": datetime.now().strftime("%Y-%m-%d")
+    }
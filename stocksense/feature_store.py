@@ -0,0 +1,218 @@
+"""Feature store: indicator, feature and label matrices kept on disk per ticker and data version."""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from stocksense import indicators
+from stocksense.config import FEATURE_STORE_DIR, FEATURE_STORE_TAIL_ROWS
+from stocksense.indicators import FEATURE_COLUMNS, INDICATOR_COLUMNS, KERNEL_COLUMNS, create_labels, indicator_matrix
+from stocksense.lstm import data_version
+
+LABEL_CODES = {"BUY": 1.0, "SELL": -1.0, "HOLD": 0.0}
+
+
+# Store Layout
+# One directory per ticker, feature definition and data version holding .npy columns that can be
+# memory-mapped: index.npy (bar timestamps), close.npy, indicators.npy (KERNEL_COLUMNS, column-major)
+# and labels_h{horizon}_v{vol_factor}.npy (+1/0/-1 codes, NaN where the label is unknown), plus
+# meta.json with the kernel state needed to extend the matrix with new bars.
+@lru_cache(maxsize=1)
+def feature_definition():
+    """Short hash of the code and columns that produce the stored matrices; changing either starts a new store"""
+    source = "".join(inspect.getsource(fn) for fn in (
+        indicators._linear_recurrence, indicators._ewm_adjusted, indicators._lagged, indicators._indicator_tile,
+        create_labels))
+    return hashlib.sha1((source + ",".join(KERNEL_COLUMNS)).encode()).hexdigest()[:8]
+
+
+def _store_prefix(ticker):
+    return os.path.join(FEATURE_STORE_DIR, f"{ticker.replace('^', '_')}_{feature_definition()}")
+
+
+def _label_file(horizon, vol_factor):
+    return f"labels_h{horizon}_v{vol_factor:g}.npy"
+
+
+def _read_meta(path):
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    meta["state"] = {k: tuple(v) if isinstance(v, list) else v for k, v in meta["state"]}
+    return meta
+
+
+class FeatureSet:
+    """Memory-mapped view of one stored version: index, close, indicators and any stored labels"""
+    def __init__(self, path):
+        self.path = path
+        self.meta = _read_meta(path)
+        self.index = pd.DatetimeIndex(np.load(os.path.join(path, "index.npy")).astype("datetime64[ns]"), name="Date")
+        self.close = np.load(os.path.join(path, "close.npy"), mmap_mode="r")
+        self.indicators = np.load(os.path.join(path, "indicators.npy"), mmap_mode="r")
+
+    @property
+    def version(self):
+        return self.meta["data_version"]
+
+    def frame(self, columns=KERNEL_COLUMNS):
+        """Columns of the indicator matrix as a DataFrame; a contiguous run of columns shares memory with the file"""
+        first = KERNEL_COLUMNS.index(columns[0])
+        if KERNEL_COLUMNS[first:first + len(columns)] == list(columns):
+            matrix = self.indicators[:, first:first + len(columns)]
+        else:
+            matrix = self.indicators[:, [KERNEL_COLUMNS.index(c) for c in columns]]
+        return pd.DataFrame(matrix, index=self.index, columns=list(columns), copy=False)
+
+    def label_codes(self, horizon=5, vol_factor=0.5):
+        """Mapped +1/0/-1 label codes (NaN where unknown), or None if these labels are not stored"""
+        path = os.path.join(self.path, _label_file(horizon, vol_factor))
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def labels(self, horizon=5, vol_factor=0.5):
+        codes = self.label_codes(horizon, vol_factor)
+        if codes is None:
+            return None
+        labels = pd.Series(np.where(codes == 1, "BUY", np.where(codes == -1, "SELL", "HOLD")), index=self.index,
+                           dtype=object)
+        labels[np.isnan(codes)] = np.nan
+        return labels
+
+
+def _label_codes(df, horizon, vol_factor):
+    labels = create_labels(df, horizon, vol_factor)
+    return labels.map(LABEL_CODES).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _common_rows(stored, stamps, closes):
+    """Number of leading rows the stored version shares with the new series.
+
+    Rows are compared by position from the first bar, which holds because the price store is
+    append-only; a series that starts on a different date (a full refetch) shares nothing.
+    """
+    n = min(len(stored.close), len(closes))
+    same = (stored.index.values[:n] == stamps[:n]) & (stored.close[:n] == closes[:n])
+    return n if same.all() else int(np.argmin(same))
+
+
+# Store Read/Write
+def open_feature_set(ticker, df=None):
+    """The newest stored FeatureSet for a ticker (the one for df's exact data, if df is given), or None"""
+    paths = [p for p in glob.glob(_store_prefix(ticker) + "_*") if os.path.isdir(p) and not p.endswith(".tmp")]
+    if df is not None:
+        paths = [p for p in paths if p.endswith("_" + data_version(df))]
+    if not paths:
+        return None
+    try:
+        return FeatureSet(max(paths, key=os.path.getmtime))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def update_feature_store(ticker, df, labels=((5, 0.5),)):
+    """Bring the store for a ticker up to df and return its FeatureSet.
+
+    Rows the newest stored version already has are copied; the indicator kernel resumes from the
+    saved state FEATURE_STORE_TAIL_ROWS bars before its end, so only new (or possibly revised) bars
+    are computed. Labels for each (horizon, vol_factor) are recomputed from horizon bars before the
+    first changed row, since those are the labels that could see it.
+    """
+    version = data_version(df)
+    current = open_feature_set(ticker, df)
+    if current is not None and all(current.label_codes(h, v) is not None for h, v in labels):
+        return current
+
+    closes = np.ascontiguousarray(df["Close"].values, dtype=np.float64)
+    stamps = df.index.values.astype("datetime64[ns]")
+    n = len(closes)
+    previous = current or open_feature_set(ticker)
+    shared = _common_rows(previous, stamps, closes) if previous is not None else 0
+    resume = previous is not None and previous.meta["stable_rows"] <= shared
+
+    matrix = np.empty((n, len(KERNEL_COLUMNS)), order="F")
+    stable = max(n - FEATURE_STORE_TAIL_ROWS, 0)
+    if resume:
+        start, state = previous.meta["stable_rows"], dict(previous.meta["state"])
+        matrix[:start] = previous.indicators[:start]
+    else:
+        start, state, shared = 0, {}, 0
+    stable = max(stable, start)
+    # Split at the stable row so the state saved for the next update is the one that ends there
+    indicator_matrix(closes[:stable], out=matrix, start=start, state=state)
+    stable_state = dict(state)
+    indicator_matrix(closes, out=matrix, start=stable, state=state)
+
+    label_keys = {tuple(k) for k in labels} | {tuple(k) for k in (previous.meta["labels"] if resume else [])}
+    label_columns = {}
+    for horizon, vol_factor in sorted(label_keys):
+        codes = previous.label_codes(horizon, vol_factor) if resume else None
+        if codes is None:
+            label_columns[(horizon, vol_factor)] = _label_codes(df, horizon, vol_factor)
+            continue
+        first = max(shared - horizon, 0)
+        # create_labels needs 30 bars of returns before a row for its volatility threshold
+        window = max(first - 31, 0)
+        column = np.empty(n)
+        column[:first] = codes[:first]
+        column[first:] = _label_codes(df.iloc[window:], horizon, vol_factor)[first - window:]
+        label_columns[(horizon, vol_factor)] = column
+
+    path = f"{_store_prefix(ticker)}_{version}"
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    np.save(os.path.join(tmp_path, "index.npy"), stamps.view(np.int64))
+    np.save(os.path.join(tmp_path, "close.npy"), closes)
+    np.save(os.path.join(tmp_path, "indicators.npy"), matrix)
+    for (horizon, vol_factor), column in label_columns.items():
+        np.save(os.path.join(tmp_path, _label_file(horizon, vol_factor)), column)
+    meta = {"data_version": version, "definition": feature_definition(), "rows": n, "stable_rows": stable,
+            "state": list(stable_state.items()), "labels": sorted(label_keys)}
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    # The version is written to a scratch directory and renamed into place, so readers never see it half-written
+    while True:
+        try:
+            os.replace(tmp_path, path)
+            break
+        except OSError:
+            # Another session stored this version first; keep theirs unless it lacks some of these labels
+            existing = open_feature_set(ticker, df)
+            if existing is not None and all(existing.label_codes(h, v) is not None for h, v in label_keys):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return existing
+            try:
+                os.replace(path, f"{tmp_path}.old.tmp")
+            except FileNotFoundError:
+                pass
+            shutil.rmtree(f"{tmp_path}.old.tmp", ignore_errors=True)
+
+    # Versions for older data are superseded; open memory maps stay valid after the files are unlinked
+    for old_path in glob.glob(_store_prefix(ticker) + "_*"):
+        if old_path != path and not old_path.endswith(".tmp"):
+            shutil.rmtree(old_path, ignore_errors=True)
+    return FeatureSet(path)
+
+
+def stored_features(ticker, df, horizon=5, vol_factor=0.5):
+    """fused_indicators and create_labels for a ticker, served from the feature store.
+
+    Returns (df with the indicator columns added, features, labels). features and labels are
+    backed by the mapped files; add columns (such as sentiment) to features as usual, pandas
+    copies on write.
+    """
+    stored = update_feature_store(ticker, df, labels=[(horizon, vol_factor)])
+    for name in INDICATOR_COLUMNS:
+        df[name] = stored.indicators[:, KERNEL_COLUMNS.index(name)]
+    features = stored.frame(FEATURE_COLUMNS)
+    if features.isna().values.any():
+        features = features.fillna(0.0)
+    features.index = df.index
+    labels = stored.labels(horizon, vol_factor)
+    labels.index = df.index
+    return df, features, labels
@@ -0,0 +1,292 @@
+"""Balanced RandomForest BUY/HOLD/SELL classifier and its model store."""
+import glob
+import hashlib
+import multiprocessing
+import os
+import threading
+import weakref
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.utils import resample
+
+from stocksense.config import (
+    COMPACT_RF_CHUNK_CELLS, COMPACT_RF_MAX_ROWS, MODEL_STORE_DIR, RF_MAX_TREES, RF_N_ESTIMATORS, RF_N_JOBS,
+    RF_WARM_START_MAX_NEW_BARS, RF_WARM_START_TREES
+)
+from stocksense.lstm import data_version
+
+
+def _rf_jobs():
+    # Pool workers already run one per core, so a forest inside one stays single-threaded
+    return 1 if multiprocessing.parent_process() is not None else RF_N_JOBS
+
+
+def _balanced_split(data):
+    min_count = data["label"].value_counts().min()
+    balanced = pd.concat([
+        resample(data[data.label == "BUY"], n_samples=min_count, random_state=42),
+        resample(data[data.label == "SELL"], n_samples=min_count, random_state=42),
+        resample(data[data.label == "HOLD"], n_samples=min_count, random_state=42)
+    ])
+    Xb, yb = balanced.drop(columns=["label"]), balanced["label"]
+    return train_test_split(Xb, yb, stratify=yb, test_size=0.2, random_state=42)
+
+
+def _holdout_split(Xtr, Xte, ytr, yte, holdout):
+    """Re-split the balanced rows so exactly those dated in holdout are the test set"""
+    X, y = pd.concat([Xtr, Xte]), pd.concat([ytr, yte])
+    test = X.index.isin(holdout)
+    return X[~test], X[test], y[~test], y[test]
+
+
+def train_rf(features, labels, ticker=None, df=None, n_estimators=RF_N_ESTIMATORS):
+    """Fit the balanced forest; returns (clf, X_train, X_test, y_train, y_test).
+
+    With a ticker and its price frame df, a stored forest for the same data version is reused, and
+    one trained on older data is grown by RF_WARM_START_TREES trees instead of being refit. The
+    dates held out when a forest is first fit are stored with it; trees added later never train
+    on them, and X_test/y_test are always those dates, so a reused forest is scored out of sample.
+    """
+    data = features.join(labels.rename("label")).dropna()
+    split = _balanced_split(data)
+    checkpoint = load_rf_checkpoint(ticker, features) if ticker and df is not None else None
+
+    reusable = checkpoint is not None and checkpoint["last_date"] <= data.index[-1] and "holdout" in checkpoint
+    if reusable:
+        holdout = checkpoint["holdout"]
+        Xtr, Xte, ytr, yte = _holdout_split(*split, holdout)
+        # A forest whose held-out dates are no longer in the data (e.g. after a full refetch) is refit
+        reusable = len(Xte) > 0
+    if reusable:
+        clf = checkpoint["model"]
+        clf.set_params(n_jobs=_rf_jobs())
+        if checkpoint["data_version"] == data_version(df):
+            return clf, Xtr, Xte, ytr, yte
+
+        # Labels trail the last bar by the label horizon, so a new bar may add no labelled rows yet
+        new_rows = int((data.index > checkpoint["last_date"]).sum())
+        if new_rows == 0:
+            save_rf_checkpoint(ticker, clf, features, df, checkpoint["last_date"], holdout)
+            return clf, Xtr, Xte, ytr, yte
+        grown = clf.n_estimators + RF_WARM_START_TREES
+        if new_rows <= RF_WARM_START_MAX_NEW_BARS and grown <= RF_MAX_TREES:
+            # The new trees see the current rows outside the holdout; the existing ones keep what they were fit on
+            clf.set_params(warm_start=True, n_estimators=grown)
+            clf.fit(Xtr, ytr)
+            clf.set_params(warm_start=False)
+            save_rf_checkpoint(ticker, clf, features, df, data.index[-1], holdout)
+            return clf, Xtr, Xte, ytr, yte
+
+    Xtr, Xte, ytr, yte = split
+    # Resampling repeats rows, so test rows that share a date with a training row are dropped
+    holdout = Xte.index.difference(Xtr.index)
+    Xtr, Xte, ytr, yte = _holdout_split(Xtr, Xte, ytr, yte, holdout)
+    clf = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=_rf_jobs())
+    clf.fit(Xtr, ytr)
+    if ticker and df is not None:
+        save_rf_checkpoint(ticker, clf, features, df, data.index[-1], holdout)
+    return clf, Xtr, Xte, ytr, yte
+
+
+# Compiled Forest
+def _breadth_first(children_left, children_right):
+    """Node ids of one sklearn tree in breadth-first order, each left child directly before its sibling"""
+    levels, frontier = [], np.zeros(1, dtype=np.intp)
+    while len(frontier):
+        levels.append(frontier)
+        split = frontier[children_left[frontier] >= 0]
+        frontier = np.column_stack((children_left[split], children_right[split])).ravel()
+    return np.concatenate(levels)
+
+
+class CompactForest:
+    """A fitted forest flattened into node arrays and evaluated for a whole batch with numpy gathers.
+
+    Nodes are numbered breadth-first within each tree so siblings are adjacent: node i tests
+    feature[i] <= threshold[i] and moves to first_child[i], or first_child[i] + 1 when the test
+    fails. Leaves point at themselves with an infinite threshold, and value holds each node's class
+    probabilities. Rows walk a tile of trees level by level; paths that reached a leaf are dropped
+    every few levels so shallow trees stop costing work.
+    """
+    def __init__(self, clf):
+        trees = [est.tree_ for est in clf.estimators_]
+        offset = 0
+        roots, first_child, feature, threshold, missing_left, value = [], [], [], [], [], []
+        for t in trees:
+            order = _breadth_first(t.children_left, t.children_right)
+            position = np.empty_like(order)
+            position[order] = np.arange(len(order))
+            leaf = t.children_left[order] < 0
+            first_child.append(np.where(leaf, np.arange(len(order)), position[t.children_left[order]]) + offset)
+            feature.append(np.where(leaf, 0, t.feature[order]))
+            # Inputs are float32, so the largest float32 <= the float64 threshold splits them identically
+            exact = t.threshold[order]
+            thr = exact.astype(np.float32)
+            thr = np.where(thr > exact, np.nextafter(thr, np.float32(-np.inf)), thr)
+            threshold.append(np.where(leaf, np.inf, thr).astype(np.float32))
+            missing = getattr(t, "missing_go_to_left", np.zeros(t.node_count, dtype=np.uint8))[order] > 0
+            missing_left.append(missing | leaf)
+            counts = t.value[order, 0, :]
+            value.append(counts / counts.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += len(order)
+
+        n_features = clf.n_features_in_
+        self.classes_ = clf.classes_
+        self.feature_names_in_ = getattr(clf, "feature_names_in_", None)
+        self.n_features_in_ = n_features
+        self.roots = np.array(roots, dtype=np.int32)
+        self.depths = np.array([t.max_depth for t in trees], dtype=np.int16)
+        self.first_child = np.concatenate(first_child).astype(np.int32)
+        self.feature = np.concatenate(feature).astype(np.int16 if n_features < 2 ** 15 else np.int32)
+        self.threshold = np.concatenate(threshold)
+        self.missing_left = np.concatenate(missing_left)
+        self.value = np.concatenate(value).astype(np.float32)
+        self.is_leaf = self.first_child == np.arange(offset)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.roots, self.depths, self.first_child, self.feature, self.threshold,
+                                      self.missing_left, self.value, self.is_leaf))
+
+    def _as_matrix(self, X):
+        if hasattr(X, "columns") and self.feature_names_in_ is not None:
+            X = X[list(self.feature_names_in_)]
+        return np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+
+    def _leaves(self, X, roots, depth):
+        """Leaf node reached by every (row, tree) pair, row-major, for one tile of trees"""
+        flat = X.ravel()
+        node = np.tile(roots.astype(np.intp), len(X))
+        base = np.repeat(np.arange(len(X), dtype=np.intp) * self.n_features_in_, len(roots))
+        has_nan = np.isnan(flat).any()
+        leaves, active = np.empty(len(node), dtype=np.intp), None
+        for level in range(1, depth + 1):
+            x = np.take(flat, base + np.take(self.feature, node))
+            go_right = x > np.take(self.threshold, node)
+            if has_nan:
+                go_right |= np.isnan(x) & ~np.take(self.missing_left, node)
+            node = np.take(self.first_child, node) + go_right
+            if level % 4 == 0 and level < depth:
+                # Integer takes are much cheaper than boolean masks, so compact through flatnonzero
+                keep = np.flatnonzero(~np.take(self.is_leaf, node))
+                if len(keep) == len(node):
+                    continue
+                if active is None:
+                    leaves[:] = node
+                    active = keep
+                else:
+                    leaves[active] = node
+                    active = np.take(active, keep)
+                node, base = np.take(node, keep), np.take(base, keep)
+                if not len(node):
+                    break
+        if active is None:
+            return node
+        leaves[active] = node
+        return leaves
+
+    def predict_proba(self, X):
+        X = self._as_matrix(X)
+        n_trees = len(self.roots)
+        proba = np.zeros((len(X), len(self.classes_)))
+        # Tiles of about COMPACT_RF_CHUNK_CELLS (row, tree) pairs keep the working arrays in cache
+        rows = max(1, min(len(X), COMPACT_RF_CHUNK_CELLS))
+        trees = max(1, COMPACT_RF_CHUNK_CELLS // rows)
+        for r in range(0, len(X), rows):
+            block = X[r:r + rows]
+            for t in range(0, n_trees, trees):
+                roots = self.roots[t:t + trees]
+                leaves = self._leaves(block, roots, int(self.depths[t:t + trees].max()))
+                proba[r:r + rows] += self.value[leaves].reshape(len(block), len(roots), -1).sum(axis=1,
+                                                                                           dtype=np.float64)
+        return proba / n_trees
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+_compiled = weakref.WeakKeyDictionary()
+
+
+def compile_forest(clf):
+    """CompactForest for a fitted RandomForestClassifier, rebuilt only when its trees change"""
+    cached = _compiled.get(clf)
+    if cached is None or len(cached.roots) != len(clf.estimators_):
+        cached = _compiled[clf] = CompactForest(clf)
+    return cached
+
+
+def forest_predict_proba(clf, X):
+    """Class probabilities from whichever implementation is faster for this many rows.
+
+    The compiled forest avoids sklearn's per-tree dispatch, which dominates small batches, but its
+    numpy traversal costs more per row; batches above COMPACT_RF_MAX_ROWS use sklearn (and its n_jobs).
+    """
+    if len(X) <= COMPACT_RF_MAX_ROWS:
+        return compile_forest(clf).predict_proba(X)
+    return clf.predict_proba(X)
+
+
+def forest_predict(clf, X):
+    return clf.classes_[np.argmax(forest_predict_proba(clf, X), axis=1)]
+
+
+# Model Store
+# One forest per ticker and feature schema, tagged with the data version it was last trained on and the
+# dates it holds out for evaluation.
+def feature_schema(features):
+    """Short hash of the feature columns, in order, that a forest was trained on"""
+    return hashlib.sha1(",".join(map(str, features.columns)).encode()).hexdigest()[:8]
+
+
+def _rf_checkpoint_prefix(ticker, features):
+    return os.path.join(MODEL_STORE_DIR, f"{ticker.replace('^', '_')}_rf_{feature_schema(features)}")
+
+
+def load_rf_checkpoint(ticker, features):
+    """Load the most recent stored forest for a ticker and feature schema, or None if there is none"""
+    paths = glob.glob(_rf_checkpoint_prefix(ticker, features) + "_*.joblib")
+    if not paths:
+        return None
+    try:
+        checkpoint = joblib.load(max(paths, key=os.path.getmtime))
+    except Exception:
+        return None
+    if checkpoint.get("compiled") is not None:
+        _compiled[checkpoint["model"]] = checkpoint["compiled"]
+    return checkpoint
+
+
+def load_rf(ticker, features, df):
+    """The stored forest trained on exactly this data version, or None"""
+    checkpoint = load_rf_checkpoint(ticker, features)
+    if checkpoint is None or checkpoint["data_version"] != data_version(df):
+        return None
+    clf = checkpoint["model"]
+    clf.set_params(n_jobs=_rf_jobs())
+    return clf
+
+
+def save_rf_checkpoint(ticker, clf, features, df, last_date, holdout):
+    prefix = _rf_checkpoint_prefix(ticker, features)
+    version = data_version(df)
+    path = f"{prefix}_{version}.joblib"
+    os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # The compiled copy is stored too, so a reloaded forest predicts without being recompiled
+    joblib.dump({"model": clf, "compiled": compile_forest(clf), "data_version": version, "last_date": last_date,
+                 "holdout": holdout}, tmp_path)
+    os.replace(tmp_path, path)
+
+    # Forests for older data versions are superseded
+    for old_path in glob.glob(prefix + "_*.joblib"):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
@@ -0,0 +1,154 @@
+"""Global LSTM: one shared network trained on a mixed panel of windows from many tickers."""
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import torch
+import torch.nn as nn
+from sklearn.preprocessing import MinMaxScaler
+
+from stocksense.config import (
+    GLOBAL_BATCH_SIZE, GLOBAL_EMBED_DIM, GLOBAL_EPOCHS, GLOBAL_TIME_BUDGET_SECONDS, HIDDEN_SIZE, LOOKBACK,
+    MODEL_STORE_DIR
+)
+from stocksense.lstm import DEVICE, LSTMWithAttention, _fit_lstm, _lstm_windows, history_version
+
+
+# Global Model
+class GlobalLSTM(nn.Module):
+    """LSTMWithAttention shared by every ticker; an optional learned ticker embedding is appended to each step."""
+    def __init__(self, tickers, hidden_size, embed_dim=GLOBAL_EMBED_DIM):
+        super().__init__()
+        self.tickers = list(tickers)
+        self.embed_dim = embed_dim
+        self.embed = nn.Embedding(len(self.tickers), embed_dim) if embed_dim else None
+        self.net = LSTMWithAttention(1 + embed_dim, hidden_size)
+
+    def forward(self, x, ticker_ids):
+        if self.embed is not None:
+            emb = self.embed(ticker_ids).unsqueeze(1).expand(-1, x.size(1), -1)
+            x = torch.cat((x, emb), dim=2)
+        return self.net(x)
+
+
+class TickerView(nn.Module):
+    """One ticker's view of a GlobalLSTM, called like a per-ticker model so lstm_predict works unchanged."""
+    def __init__(self, model, ticker):
+        super().__init__()
+        self.model = model
+        device = next(model.parameters()).device
+        self.register_buffer("ticker_id", torch.tensor([model.tickers.index(ticker)], device=device),
+                             persistent=False)
+
+    def forward(self, x):
+        return self.model(x, self.ticker_id.expand(x.size(0)))
+
+
+# Panel Train
+def build_panel(frames):
+    """Scale each ticker with its own MinMaxScaler, then stack every ticker's windows into one panel.
+
+    frames maps ticker -> price DataFrame. Returns (tickers, scalers, X, ticker_ids, y); tickers
+    with too little history for one window are left out. Windows are ordered by the date they
+    predict (stable, so each ticker's own windows stay in order), which makes the newest share of
+    the panel a chronological holdout across every ticker.
+    """
+    tickers, scalers, X, ids, y, dates = [], {}, [], [], [], []
+    for ticker, df in frames.items():
+        if len(df) <= LOOKBACK:
+            continue
+        prices = df["Close"].values.reshape(-1, 1)
+        scalers[ticker] = MinMaxScaler().fit(prices)
+        X_t, y_t = _lstm_windows(scalers[ticker].transform(prices))
+        ids.append(np.full(len(X_t), len(tickers), dtype=np.int64))
+        tickers.append(ticker)
+        X.append(X_t)
+        y.append(y_t)
+        dates.append(df.index.values[LOOKBACK:])
+    if not tickers:
+        raise ValueError(f"No ticker has more than {LOOKBACK} bars of history")
+    order = np.argsort(np.concatenate(dates), kind="stable")
+    return tickers, scalers, np.concatenate(X)[order], np.concatenate(ids)[order], np.concatenate(y)[order]
+
+
+def train_global_lstm(frames, epochs=GLOBAL_EPOCHS, embed_dim=GLOBAL_EMBED_DIM, save=True,
+                      time_budget=GLOBAL_TIME_BUDGET_SECONDS):
+    """Train one GlobalLSTM on every ticker in frames; returns (model, scalers by ticker).
+
+    Training runs through _fit_lstm, so the newest windows are held out for early stopping and
+    the LR schedule, and time_budget caps the wall-clock time as for per-ticker models.
+    """
+    tickers, scalers, X, ids, y = build_panel(frames)
+    model = GlobalLSTM(tickers, HIDDEN_SIZE, embed_dim).to(DEVICE)
+    opt = torch.optim.Adam(model.parameters(), lr=0.001)
+    # Large batches mix windows from many tickers into each step
+    _fit_lstm(model, opt, X, y, epochs, time_budget=time_budget, ticker_ids=ids, batch_size=GLOBAL_BATCH_SIZE)
+    model.eval()
+    if save:
+        save_global_lstm(model, scalers, frames)
+    return model, scalers
+
+
+# Global Model Registry
+# A single checkpoint per LOOKBACK/HIDDEN_SIZE, replaced whenever the panel is retrained.
+def _global_checkpoint_path():
+    return os.path.join(MODEL_STORE_DIR, f"global_lstm_lb{LOOKBACK}_h{HIDDEN_SIZE}.pt")
+
+
+def save_global_lstm(model, scalers, frames):
+    path = _global_checkpoint_path()
+    os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    torch.save({
+        "model": model.state_dict(),
+        "tickers": model.tickers,
+        "embed_dim": model.embed_dim,
+        "scalers": scalers,
+        # Enough to tell a ticker's later series extends this one rather than revising it
+        "histories": {t: (frames[t].index[-1], history_version(frames[t], frames[t].index[-1])) for t in model.tickers}
+    }, tmp_path)
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=1)
+def _load_global_checkpoint(path, mtime):
+    # mtime is part of the cache key so a retrained checkpoint is picked up
+    checkpoint = torch.load(path, map_location=DEVICE, weights_only=False)
+    model = GlobalLSTM(checkpoint["tickers"], HIDDEN_SIZE, checkpoint["embed_dim"]).to(DEVICE)
+    model.load_state_dict(checkpoint["model"])
+    model.eval()
+    return model, checkpoint["scalers"], checkpoint.get("histories")
+
+
+def _serves(histories, ticker, df):
+    # Bars appended since training are fine; revised (e.g. split-adjusted) history no longer fits the scaler
+    if ticker not in histories:
+        return False
+    last_date, version = histories[ticker]
+    return last_date <= df.index[-1] and history_version(df, last_date) == version
+
+
+def load_global_lstm(frames):
+    """The saved GlobalLSTM and the scalers of the tickers in frames it can serve, or None if none is saved.
+
+    frames maps ticker -> price DataFrame. A ticker is left out of the scalers if the model was not
+    trained on it, or its history has been revised since; retrain with train-global to cover it.
+    """
+    path = _global_checkpoint_path()
+    try:
+        model, scalers, histories = _load_global_checkpoint(path, os.path.getmtime(path))
+    except Exception:
+        return None
+    if histories is None:
+        return None
+    return model, {t: scalers[t] for t, df in frames.items() if _serves(histories, t, df)}
+
+
+def global_ticker_model(ticker, df):
+    """(TickerView, scaler) for a ticker the saved global model can serve with df, else None"""
+    loaded = load_global_lstm({ticker: df})
+    if loaded is None or ticker not in loaded[1]:
+        return None
+    model, scalers = loaded
+    return TickerView(model, ticker), scalers[ticker]
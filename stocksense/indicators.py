@@ -0,0 +1,364 @@
+"""Technical indicators, signal interpretation, labels and RF features."""
+import numpy as np
+import pandas as pd
+
+
+# Technical Indicators
+def calculate_technical_indicators(df):
+    df["SMA50"] = df["Close"].rolling(50, min_periods=1).mean()
+    df["SMA200"] = df["Close"].rolling(200, min_periods=1).mean()
+    df["EMA50"] = df["Close"].ewm(span=50, adjust=False).mean()
+    df["EMA200"] = df["Close"].ewm(span=200, adjust=False).mean()
+    delta = df["Close"].diff()
+    up, down = delta.clip(lower=0), -delta.clip(upper=0)
+    rs = up.ewm(alpha=1 / 14).mean() / down.replace(0, np.nan).ewm(alpha=1 / 14).mean()
+    df["RSI"] = 100 - (100 / (1 + rs))
+    ema12, ema26 = df["Close"].ewm(span=12).mean(), df["Close"].ewm(span=26).mean()
+    macd, signal = ema12 - ema26, (ema12 - ema26).ewm(span=9).mean()
+    df["MACD"] = macd - signal
+    sma20, std20 = df["Close"].rolling(20).mean(), df["Close"].rolling(20).std()
+    df["BB_upper"] = sma20 + 2 * std20
+    df["BB_lower"] = sma20 - 2 * std20
+    df["roc_5"] = df["Close"].pct_change(5)
+    df["roc_10"] = df["Close"].pct_change(10)
+    return df
+
+
+# Streaming Indicators
+INDICATOR_COLUMNS = ["SMA50", "SMA200", "EMA50", "EMA200", "RSI", "MACD",
+                     "BB_upper", "BB_lower", "roc_5", "roc_10"]
+
+
+class _AdjustedEWM:
+    """Running ewm(adjust=True).mean(); NaN bars decay the weights but add nothing, as in pandas."""
+    def __init__(self, alpha):
+        self.decay = 1.0 - alpha
+        self.num = 0.0
+        self.den = 0.0
+
+    def update(self, x):
+        self.num *= self.decay
+        self.den *= self.decay
+        if x == x:
+            self.num += x
+            self.den += 1.0
+        return self.num / self.den if self.den else np.nan
+
+
+class _RollingMoments:
+    """Fixed-window mean and sample std with O(1) add/remove (Welford, as pandas rolling uses)."""
+    def __init__(self):
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+
+    def add(self, x):
+        self.nobs += 1
+        delta = x - self.mean
+        self.mean += delta / self.nobs
+        self.ssqdm += (self.nobs - 1) * delta * delta / self.nobs
+
+    def remove(self, x):
+        self.nobs -= 1
+        if self.nobs:
+            delta = x - self.mean
+            self.mean -= delta / self.nobs
+            self.ssqdm -= (self.nobs + 1) * delta * delta / self.nobs
+        else:
+            self.mean = self.ssqdm = 0.0
+
+    def reset(self, window):
+        """Recompute the moments exactly from the values currently in the window."""
+        self.nobs = len(window)
+        self.mean = window.mean()
+        self.ssqdm = ((window - self.mean) ** 2).sum()
+
+    def std(self):
+        return np.sqrt(max(self.ssqdm, 0.0) / (self.nobs - 1)) if self.nobs > 1 else 0.0
+
+
+class StreamingIndicators:
+    """Incremental calculate_technical_indicators: each new close costs O(1) instead of a full recompute.
+
+    update(close) returns the same columns, with the same values, that
+    calculate_technical_indicators would produce for that bar.
+    """
+    WINDOW = 200
+    # Welford add/remove loses precision when the price level falls by orders of magnitude, so the
+    # Bollinger moments are recomputed exactly from the last 20 closes this often
+    BB_RESEED_BARS = 20
+
+    def __init__(self):
+        self._closes = np.empty(self.WINDOW + 1)
+        self.count = 0
+        self._sum50 = self._sum200 = 0.0
+        self._ema50 = self._ema200 = np.nan
+        self._rsi_up, self._rsi_down = _AdjustedEWM(1 / 14), _AdjustedEWM(1 / 14)
+        self._ema12, self._ema26 = _AdjustedEWM(2 / 13), _AdjustedEWM(2 / 27)
+        self._macd_signal = _AdjustedEWM(2 / 10)
+        self._bb = _RollingMoments()
+        self.last = dict.fromkeys(INDICATOR_COLUMNS, np.nan)
+
+    @classmethod
+    def from_history(cls, df):
+        """Seed the state by replaying the Close column of a historical DataFrame."""
+        engine = cls()
+        for close in np.asarray(df["Close"], dtype=np.float64):
+            engine.update(close)
+        return engine
+
+    def _ago(self, k):
+        return self._closes[(self.count - 1 - k) % len(self._closes)]
+
+    def _window(self, k):
+        """The last k closes, oldest first."""
+        return self._closes[(self.count - k + np.arange(k)) % len(self._closes)]
+
+    def update(self, close):
+        close = float(close)
+        prev = self._ago(0) if self.count else np.nan
+        self._closes[self.count % len(self._closes)] = close
+        self.count += 1
+        n = self.count
+
+        self._sum50 += close - (self._ago(50) if n > 50 else 0.0)
+        self._sum200 += close - (self._ago(200) if n > 200 else 0.0)
+        a50, a200 = 2 / 51, 2 / 201
+        self._ema50 = close if n == 1 else a50 * close + (1 - a50) * self._ema50
+        self._ema200 = close if n == 1 else a200 * close + (1 - a200) * self._ema200
+
+        delta = close - prev
+        up = max(delta, 0.0) if n > 1 else np.nan
+        down = -delta if n > 1 and delta < 0 else np.nan
+        rs = self._rsi_up.update(up) / self._rsi_down.update(down)
+
+        macd = self._ema12.update(close) - self._ema26.update(close)
+        signal = self._macd_signal.update(macd)
+
+        if n > 20:
+            self._bb.remove(self._ago(20))
+        self._bb.add(close)
+        if n % self.BB_RESEED_BARS == 0:
+            self._bb.reset(self._window(20))
+        if n >= 20:
+            band = 2 * self._bb.std()
+            bb_upper, bb_lower = self._bb.mean + band, self._bb.mean - band
+        else:
+            bb_upper = bb_lower = np.nan
+
+        self.last = {
+            "SMA50": self._sum50 / min(n, 50),
+            "SMA200": self._sum200 / min(n, 200),
+            "EMA50": self._ema50,
+            "EMA200": self._ema200,
+            "RSI": 100 - (100 / (1 + rs)),
+            "MACD": macd - signal,
+            "BB_upper": bb_upper,
+            "BB_lower": bb_lower,
+            "roc_5": close / self._ago(5) - 1 if n > 5 else np.nan,
+            "roc_10": close / self._ago(10) - 1 if n > 10 else np.nan,
+        }
+        return self.last
+
+    def update_frame(self, df):
+        """Feed every bar of df through update and return the indicator rows as a DataFrame."""
+        rows = [self.update(close) for close in np.asarray(df["Close"], dtype=np.float64)]
+        return pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS)
+
+
+# Fused Indicator Kernel
+FEATURE_COLUMNS = ["sma50_gt_sma200", "ema50_gt_ema200", "rsi", "macd", "bb_pos", "roc_5", "roc_10"]
+KERNEL_COLUMNS = INDICATOR_COLUMNS + FEATURE_COLUMNS
+KERNEL_TILE_ROWS = 8192
+KERNEL_HALO_ROWS = 200  # longest lookback (SMA200) carried into each tile
+
+
+def _linear_recurrence(x, decay, carry=0.0):
+    """y[t] = decay * y[t-1] + x[t] with y[-1] = carry, evaluated blockwise with cumsum."""
+    n = len(x)
+    y = np.empty(n)
+    # Largest block whose rescaling factor decay**-block still fits comfortably in a float64
+    block = max(1, min(n, int(600 / -np.log(decay))))
+    powers = decay ** np.arange(block)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        p, out = powers[:stop - start], y[start:stop]
+        np.divide(x[start:stop], p, out=out)
+        np.cumsum(out, out=out)
+        out += carry * decay
+        out *= p
+        carry = out[-1]
+    return y
+
+
+def _ewm_adjusted(x, alpha, state, key, valid=None):
+    """ewm(alpha, adjust=True).mean() for one tile; bars where valid is False count as NaN.
+
+    state[key] carries the weighted sum and weight total over from the previous tile. Once the
+    weight total of an all-valid series has converged to 1/alpha it is used as a constant.
+    """
+    num0, den0 = state.get(key, (0.0, 0.0))
+    decay = 1.0 - alpha
+    if valid is None and 1.0 - den0 * alpha < 1e-15:
+        num = _linear_recurrence(x, decay, num0)
+        state[key] = num[-1], den0
+        return num * alpha
+    if valid is None:
+        valid = np.ones(len(x), dtype=bool)
+    num = _linear_recurrence(np.where(valid, x, 0.0), decay, num0)
+    den = _linear_recurrence(valid.astype(np.float64), decay, den0)
+    state[key] = num[-1], den[-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _lagged(ext, offset, lag, start, rows):
+    """Rows of ext (the tile plus its halo) lag bars back; positions before the series are NaN."""
+    lagged = np.full(rows, np.nan)
+    first = min(rows, max(0, lag - start))
+    lagged[first:] = ext[offset + first - lag:offset + rows - lag]
+    return lagged
+
+
+def _indicator_tile(c, start, stop, state, out):
+    lo = max(0, start - KERNEL_HALO_ROWS)
+    ext, offset, rows = c[lo:stop], start - lo, stop - start
+    close = ext[offset:]
+    counts = np.arange(start + 1, stop + 1, dtype=np.float64)
+
+    # Moving averages
+    csum = np.cumsum(ext)
+    sma = {}
+    for window in (50, 200):
+        total = csum[offset:].copy()
+        first = min(rows, max(0, window - start))
+        total[first:] -= csum[offset + first - window:offset + rows - window]
+        sma[window] = total / np.minimum(counts, window)
+    ema = {}
+    for span in (50, 200):
+        alpha = 2 / (span + 1)
+        x = alpha * close
+        if start == 0:
+            x[0] = close[0]
+        ema[span] = _linear_recurrence(x, 1 - alpha, state.get(span, 0.0))
+        state[span] = ema[span][-1]
+
+    # RSI
+    delta = close - _lagged(ext, offset, 1, start, rows)
+    has_delta = counts > 1
+    up = _ewm_adjusted(np.maximum(delta, 0.0), 1 / 14, state, "up", has_delta if start == 0 else None)
+    down = _ewm_adjusted(-delta, 1 / 14, state, "down", has_delta & (delta < 0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100 - (100 / (1 + up / down))
+
+    # MACD
+    macd_line = _ewm_adjusted(close, 2 / 13, state, "ema12") - _ewm_adjusted(close, 2 / 27, state, "ema26")
+    macd = macd_line - _ewm_adjusted(macd_line, 2 / 10, state, "signal")
+
+    # Bollinger Bands: sums over the 20 lagged closes, taken relative to the window's first close
+    # so flat windows get an exact zero std (as in pandas) and nothing cancels badly
+    window_start = _lagged(ext, offset, 19, start, rows)
+    s1, s2, dev = np.zeros(rows), np.zeros(rows), np.empty(rows)
+    for lag in range(19):
+        lagged = ext[offset - lag:offset - lag + rows] if start >= lag else _lagged(ext, offset, lag, start, rows)
+        np.subtract(lagged, window_start, out=dev)
+        s1 += dev
+        dev *= dev
+        s2 += dev
+    mean = window_start + s1 / 20
+    band = 2 * np.sqrt(np.maximum(s2 - s1 * s1 / 20, 0.0) / 19)
+    bb_upper, bb_lower = mean + band, mean - band
+
+    # Rate of Change
+    roc5 = close / _lagged(ext, offset, 5, start, rows) - 1
+    roc10 = close / _lagged(ext, offset, 10, start, rows) - 1
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bb_pos = (close - bb_lower) / (bb_upper - bb_lower)
+    columns = [sma[50], sma[200], ema[50], ema[200], rsi, macd, bb_upper, bb_lower, roc5, roc10,
+               sma[50] > sma[200], ema[50] > ema[200], np.where(np.isnan(rsi), 50.0, rsi), macd,
+               np.nan_to_num(bb_pos, nan=0.0, posinf=np.inf, neginf=-np.inf),
+               np.nan_to_num(roc5, nan=0.0), np.nan_to_num(roc10, nan=0.0)]
+    for i, values in enumerate(columns):
+        out[start:stop, i] = values
+
+
+def indicator_matrix(close, dtype=np.float64, out=None, start=0, state=None):
+    """Every indicator and RF feature column for one close series, written into a single matrix.
+
+    Columns follow KERNEL_COLUMNS and match calculate_technical_indicators followed by
+    build_features (without sentiment). The series is processed in cache-sized tiles that carry
+    their recurrence state forward, so long minute-bar histories never spill whole-array
+    temporaries. Pass out to reuse a preallocated float32/float64 buffer.
+
+    To extend a matrix, pass the longer series, out holding the earlier rows, start (the first row
+    to compute) and the state dict a previous call ending at start left behind; state is updated
+    in place.
+    """
+    c = np.ascontiguousarray(close, dtype=np.float64)
+    n = len(c)
+    if out is None:
+        # Column-major, so each tile column is written with one contiguous store
+        out = np.empty((n, len(KERNEL_COLUMNS)), dtype=dtype, order="F")
+    state = {} if state is None else state
+    for tile_start in range(start, n, KERNEL_TILE_ROWS):
+        _indicator_tile(c, tile_start, min(tile_start + KERNEL_TILE_ROWS, n), state, out)
+    return out
+
+
+def fused_indicators(df, sentiment_series=None):
+    """calculate_technical_indicators + build_features from one indicator_matrix call; returns (df, features)."""
+    matrix = indicator_matrix(df["Close"])
+    n_indicators = len(INDICATOR_COLUMNS)
+    for i, name in enumerate(INDICATOR_COLUMNS):
+        df[name] = matrix[:, i]
+    features = pd.DataFrame(matrix[:, n_indicators:], index=df.index, columns=FEATURE_COLUMNS)
+    if sentiment_series is not None:
+        features["sentiment"] = sentiment_series
+    return df, features.fillna(0.0)
+
+
+# Interpret Signals
+def interpret_signals(df):
+    sig = {}
+    sig["SMA"] = "Bullish" if df["SMA50"].iloc[-1] > df["SMA200"].iloc[-1] else "Bearish"
+    sig["EMA"] = "Bullish" if df["EMA50"].iloc[-1] > df["EMA200"].iloc[-1] else "Bearish"
+    rsi = df["RSI"].iloc[-1]
+    sig["RSI"] = "Oversold" if rsi < 30 else "Overbought" if rsi > 70 else "Neutral"
+    sig["MACD"] = "Bullish" if df["MACD"].iloc[-1] > 0 else "Bearish"
+    close = df["Close"].iloc[-1]
+    if close <= df["BB_lower"].iloc[-1]:
+        sig["Bollinger"] = "Near Lower"
+    elif close >= df["BB_upper"].iloc[-1]:
+        sig["Bollinger"] = "Near Upper"
+    else:
+        sig["Bollinger"] = "Neutral"
+    sig["ROC5"] = "Up" if df["roc_5"].iloc[-1] > 0 else "Down"
+    return sig
+
+
+# Labels & Features
+def create_labels(df, horizon=5, vol_factor=0.5):
+    fut = df["Close"].shift(-horizon)
+    ret = (fut - df["Close"]) / df["Close"]
+    vol = df["Close"].pct_change().rolling(30).std()
+    thr = vol * vol_factor
+    labels = pd.Series(index=df.index, dtype=object)
+    labels[ret > thr] = "BUY"
+    labels[ret < -thr] = "SELL"
+    labels[(ret >= -thr) & (ret <= thr)] = "HOLD"
+    return labels
+
+
+def build_features(df, sentiment_series=None):
+    feats = pd.DataFrame(index=df.index)
+    feats["sma50_gt_sma200"] = (df["SMA50"] > df["SMA200"]).astype(int)
+    feats["ema50_gt_ema200"] = (df["EMA50"] > df["EMA200"]).astype(int)
+    feats["rsi"] = df["RSI"].fillna(50)
+    feats["macd"] = df["MACD"].fillna(0)
+    feats["bb_pos"] = (df["Close"] - df["BB_lower"]) / (df["BB_upper"] - df["BB_lower"])
+    feats["roc_5"] = df["roc_5"].fillna(0)
+    feats["roc_10"] = df["roc_10"].fillna(0)
+    if sentiment_series is not None:
+        feats["sentiment"] = sentiment_series
+    return feats.fillna(0.0)
@@ -0,0 +1,47 @@
+"""Deferred imports for heavy libraries.
+
+``lazy_import("torch")`` returns a stand-in that imports the real module the first time one of
+its attributes is used, so code paths that never touch it never pay for the import. How long
+each first import took is kept in ``load_times`` for the import-time report.
+"""
+import importlib
+import sys
+import time
+
+# Heavy dependencies that must stay out of the app's startup path
+HEAVY_MODULES = ["torch", "transformers", "sklearn", "matplotlib", "seaborn", "plotly"]
+
+load_times = {}
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            already_loaded = self._name in sys.modules
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            if not already_loaded:
+                load_times[self._name] = time.perf_counter() - start
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def loaded_heavy_modules():
+    """Heavy top-level packages that have been imported so far in this process"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
@@ -0,0 +1,411 @@
+"""LSTM price model: windowing, training, prediction and the checkpoint registry."""
+import copy
+import glob
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from numpy.lib.stride_tricks import as_strided
+from sklearn.preprocessing import MinMaxScaler
+
+from stocksense.config import (
+    EARLY_STOP_PATIENCE, EPOCHS, FINETUNE_EPOCHS, FINETUNE_MAX_NEW_BARS, FINETUNE_MIN_WINDOWS, HIDDEN_SIZE, LOOKBACK,
+    LR_PATIENCE, LSTM_BATCH_SIZE, LSTM_BF16, LSTM_QUANTIZE, LSTM_TIME_BUDGET_SECONDS, MIN_VALIDATION_WINDOWS,
+    MODEL_STORE_DIR, POOL_START_METHOD, QUANT_CHECK_WINDOWS, QUANT_MAX_DRIFT, VALIDATION_FRACTION
+)
+
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+# LSTM Model
+class LSTMWithAttention(nn.Module):
+    def __init__(self, input_size, hidden_size, num_layers=2):
+        super().__init__()
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        self.attn_w = nn.Linear(hidden_size * 2, hidden_size)
+        self.attn_v = nn.Parameter(torch.randn(hidden_size))
+        self.fc = nn.Linear(hidden_size, 1)
+
+    def attention(self, hidden, outputs):
+        # attn_w scores [hidden; output] pairs. Splitting its weight projects the hidden state once
+        # and broadcasts it over time instead of materializing a (B, T, 2H) concatenation.
+        w_hidden, w_outputs = self.attn_w.weight.split(hidden.size(1), dim=1)
+        energy = torch.tanh(F.linear(outputs, w_outputs, self.attn_w.bias) + F.linear(hidden, w_hidden).unsqueeze(1))
+        weights = torch.softmax(torch.matmul(energy, self.attn_v), dim=1)
+        context = torch.bmm(weights.unsqueeze(1), outputs).squeeze(1)
+        return context
+
+    def forward(self, x):
+        outputs, (hidden, _) = self.lstm(x)
+        context = self.attention(hidden[-1], outputs)
+        return self.fc(context)
+
+
+# LSTM Train/Predict
+def make_windows(values, lookback=LOOKBACK):
+    """Strided (N, lookback, F) float32 view over a (T, F) or (T,) array; windows are not copied"""
+    values = np.ascontiguousarray(values, dtype=np.float32)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_windows = max(len(values) - lookback + 1, 0)
+    row_stride, col_stride = values.strides
+    return as_strided(values, shape=(n_windows, lookback, values.shape[1]),
+                      strides=(row_stride, row_stride, col_stride))
+
+
+def _lstm_windows(scaled, lookback=LOOKBACK):
+    # The final window has no next-step target; it is the one lstm_predict uses
+    X = make_windows(scaled, lookback)[:-1]
+    y = np.ascontiguousarray(scaled[lookback:], dtype=np.float32)
+    return X, y
+
+
+class TrainingController:
+    """Early stopping, learning-rate schedule and wall-clock deadline for one training run.
+
+    end_epoch(loss) returns False once the monitored loss has stopped improving for patience
+    epochs or the next epoch would overrun the deadline; restore_best() then reloads the best weights.
+    """
+    def __init__(self, model, opt, patience=EARLY_STOP_PATIENCE, time_budget=None):
+        self.model = model
+        self.scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(opt, factor=0.5, patience=LR_PATIENCE)
+        self.patience = patience
+        self.started = time.monotonic()
+        self.deadline = self.started + time_budget if time_budget else None
+        self.best_loss, self.best_state, self.bad_epochs = float("inf"), None, 0
+        self.epochs_run, self.stop_reason = 0, None
+
+    def end_epoch(self, loss):
+        self.epochs_run += 1
+        self.scheduler.step(loss)
+        if loss < self.best_loss:
+            self.best_loss, self.bad_epochs = loss, 0
+            self.best_state = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+        else:
+            self.bad_epochs += 1
+        now = time.monotonic()
+        if self.bad_epochs >= self.patience:
+            self.stop_reason = "plateau"
+        elif self.deadline is not None and now + (now - self.started) / self.epochs_run > self.deadline:
+            self.stop_reason = "deadline"
+        return self.stop_reason is None
+
+    def restore_best(self):
+        if self.best_state is not None:
+            self.model.load_state_dict(self.best_state)
+
+
+def _fit_lstm(model, opt, X, y, epochs, validation_fraction=VALIDATION_FRACTION, time_budget=None, bf16=LSTM_BF16,
+              on_epoch=None, ticker_ids=None, batch_size=LSTM_BATCH_SIZE):
+    """Train for up to epochs under a TrainingController; returns the controller.
+
+    The newest validation_fraction of the windows is held out chronologically and drives early
+    stopping and the LR schedule; when that is fewer than MIN_VALIDATION_WINDOWS, the training loss
+    does. Once the best epoch is restored, the model is fine-tuned for FINETUNE_EPOCHS on the
+    held-out windows as well, so the model that is saved and served has seen the newest bars. The
+    windows stay on the device as one tensor and are shuffled by index permutation, and the loss is
+    only read back once per epoch. bf16 enables bfloat16 autocast on CPU. on_epoch(epoch, loss) is
+    called after every epoch and stops training (stop_reason "pruned") by returning False.
+    For a GlobalLSTM, pass each window's ticker_ids; X must then be ordered by the date each
+    window predicts, so the held-out tail is the newest stretch of every ticker.
+    """
+    loss_fn = nn.MSELoss()
+    n_val = int(len(X) * validation_fraction)
+    if n_val < MIN_VALIDATION_WINDOWS:
+        n_val = 0
+    n_train = len(X) - n_val
+    X_all, y_all = torch.from_numpy(X).to(DEVICE), torch.from_numpy(y).to(DEVICE).squeeze(-1)
+    y_val = y_all[n_train:]
+    ids_all = None if ticker_ids is None else torch.from_numpy(ticker_ids).to(DEVICE)
+
+    def forward(rows):
+        return model(X_all[rows]) if ids_all is None else model(X_all[rows], ids_all[rows])
+
+    autocast = bf16 and DEVICE.type == "cpu"
+
+    def train_epoch(order):
+        # Summed batch losses stay on the device; callers read them back only when needed
+        model.train()
+        total = torch.zeros((), device=DEVICE)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            yb = y_all[idx]
+            opt.zero_grad()
+            with torch.autocast(DEVICE.type, dtype=torch.bfloat16, enabled=autocast):
+                out = forward(idx).squeeze(-1)
+            loss = loss_fn(out.float(), yb)
+            loss.backward()
+            opt.step()
+            total += loss.detach() * len(idx)
+        return total
+
+    controller = TrainingController(model, opt, time_budget=time_budget)
+    for ep in range(epochs):
+        total = train_epoch(torch.randperm(n_train, device=DEVICE))
+        if n_val:
+            model.eval()
+            with torch.no_grad():
+                monitored = loss_fn(forward(slice(n_train, None)).squeeze(-1), y_val).item()
+        else:
+            monitored = total.item() / n_train
+        if not controller.end_epoch(monitored):
+            break
+        if on_epoch is not None and not on_epoch(ep, monitored):
+            controller.stop_reason = "pruned"
+            break
+    controller.restore_best()
+    if n_val and controller.stop_reason != "pruned":
+        # Validation only chose the epoch. The held-out windows are the newest, so the model that gets
+        # served is also trained on them, with as many older windows replayed so they don't dominate.
+        tail = torch.arange(max(len(X) - 2 * n_val, 0), len(X), device=DEVICE)
+        for _ in range(FINETUNE_EPOCHS):
+            train_epoch(tail[torch.randperm(len(tail), device=DEVICE)])
+    return controller
+
+
+def train_lstm(df, ticker=None, time_budget=LSTM_TIME_BUDGET_SECONDS):
+    version = data_version(df)
+    checkpoint = load_lstm_checkpoint(ticker) if ticker else None
+
+    # Only a checkpoint whose history df extends unchanged can be reused; re-adjusted history needs a new scaler
+    if (checkpoint is not None and checkpoint["last_date"] <= df.index[-1] and
+            checkpoint.get("history_version") == history_version(df, checkpoint["last_date"])):
+        model = LSTMWithAttention(1, HIDDEN_SIZE).to(DEVICE)
+        model.load_state_dict(checkpoint["model"])
+        scaler = checkpoint["scaler"]
+        if checkpoint["data_version"] == version:
+            return _serving_model(model, scaler, df, ticker, checkpoint), scaler
+
+        # A changed last bar (intraday refresh) still counts as one new bar
+        new_bars = max(int((df.index > checkpoint["last_date"]).sum()), 1)
+        if new_bars <= FINETUNE_MAX_NEW_BARS:
+            opt = torch.optim.Adam(model.parameters(), lr=0.001)
+            opt.load_state_dict(checkpoint["optimizer"])
+            X, y = _lstm_windows(scaler.transform(df["Close"].values.reshape(-1, 1)))
+            n_windows = max(new_bars, FINETUNE_MIN_WINDOWS)
+            _fit_lstm(model, opt, X[-n_windows:], y[-n_windows:], FINETUNE_EPOCHS, validation_fraction=0,
+                      time_budget=time_budget)
+            save_lstm_checkpoint(ticker, model, opt, scaler, df)
+            return _serving_model(model, scaler, df, ticker), scaler
+
+    prices = df["Close"].values.reshape(-1, 1)
+    scaler = MinMaxScaler().fit(prices)
+    X, y = _lstm_windows(scaler.transform(prices))
+    model = LSTMWithAttention(1, HIDDEN_SIZE).to(DEVICE)
+    opt = torch.optim.Adam(model.parameters(), lr=0.001)
+    _fit_lstm(model, opt, X, y, EPOCHS, time_budget=time_budget)
+    if ticker:
+        save_lstm_checkpoint(ticker, model, opt, scaler, df)
+    return _serving_model(model, scaler, df, ticker), scaler
+
+
+def lstm_predict(model, scaler, df):
+    seq = scaler.transform(df["Close"].values[-LOOKBACK:].reshape(-1, 1))
+    pred_scaled = forecast_windows(model, make_windows(seq)[-1:])[0, 0]
+    return scaler.inverse_transform([[pred_scaled]])[0, 0]
+
+
+# Batched Forecasts
+def _rollout(model, x, horizon, ticker_ids=None):
+    """Recursive rollout: each predicted step is appended to the window that predicts the next one"""
+    steps = []
+    for _ in range(horizon):
+        step = model(x) if ticker_ids is None else model(x, ticker_ids)
+        steps.append(step)
+        x = torch.cat((x[:, 1:], step.unsqueeze(1)), dim=1)
+    return torch.cat(steps, dim=1)
+
+
+def forecast_windows(models, windows, horizon=1, ticker_ids=None):
+    """Scaled (B, horizon) forecast paths for a (B, LOOKBACK, 1) stack of scaled windows.
+
+    models is either one model for the whole stack (pass ticker_ids for a GlobalLSTM) or a list
+    holding each window's own model. Everything runs in one inference_mode block, with one
+    transfer to the device and one back.
+    """
+    windows = np.ascontiguousarray(windows, dtype=np.float32)
+    with torch.inference_mode():
+        x = torch.from_numpy(windows).to(DEVICE)
+        if not isinstance(models, (list, tuple)):
+            ids = None if ticker_ids is None else torch.as_tensor(ticker_ids, device=DEVICE)
+            return _rollout(models, x, horizon, ids).cpu().numpy()
+
+        # Per-ticker models: one rollout per distinct model over the windows that use it
+        paths = torch.empty(len(windows), horizon, device=DEVICE)
+        groups = {}
+        for i, model in enumerate(models):
+            groups.setdefault(id(model), (model, []))[1].append(i)
+        for model, rows in groups.values():
+            rows = torch.as_tensor(rows, device=DEVICE)
+            paths[rows] = _rollout(model, x[rows], horizon)
+        return paths.cpu().numpy()
+
+
+def forecast_tickers(frames, models, scalers, horizon=1):
+    """Price paths for many tickers from one batched forecast; returns {ticker: array of horizon prices}.
+
+    frames, scalers: dicts keyed by ticker. models: a dict of per-ticker models, or a GlobalLSTM
+    (whose tickers attribute maps each ticker to its embedding id).
+    """
+    tickers = list(frames)
+    windows = np.stack([scalers[t].transform(frames[t]["Close"].values[-LOOKBACK:].reshape(-1, 1))
+                        for t in tickers])
+    if isinstance(models, dict):
+        paths = forecast_windows([models[t] for t in tickers], windows, horizon)
+    else:
+        paths = forecast_windows(models, windows, horizon, [models.tickers.index(t) for t in tickers])
+    return {t: scalers[t].inverse_transform(path.reshape(-1, 1))[:, 0] for t, path in zip(tickers, paths)}
+
+
+# Quantized Inference
+def quantize_lstm(model):
+    """Dynamic int8 copy of a trained model for CPU inference.
+
+    The LSTM and output Linear weights are stored as int8 and activations are quantized per
+    batch. attn_w stays fp32 because the split attention reads its weight tensor directly.
+    """
+    qconfig = torch.ao.quantization.default_dynamic_qconfig
+    spec = {name: qconfig for name, module in model.named_modules()
+            if isinstance(module, nn.LSTM) or (isinstance(module, nn.Linear) and not name.endswith("attn_w"))}
+    with warnings.catch_warnings():
+        # torch.ao dynamic quantization warns that it is deprecated in favour of torchao
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model).cpu().eval(), spec, dtype=torch.qint8)
+
+
+def quantization_drift(model, quantized, windows):
+    """Largest |int8 - fp32| prediction gap over windows, in scaled (0-1) price units"""
+    x = torch.from_numpy(np.ascontiguousarray(windows, dtype=np.float32))
+    with torch.inference_mode():
+        return float((quantized(x) - model(x)).abs().max())
+
+
+def _serving_model(model, scaler, df, ticker, checkpoint=None):
+    # The fp32 model unless int8 serving is enabled and stays within QUANT_MAX_DRIFT of it
+    if not LSTM_QUANTIZE or DEVICE.type != "cpu":
+        return model
+    quantized = quantize_lstm(model)
+    if checkpoint is not None and "int8_drift" in checkpoint:
+        if checkpoint["model_int8"] is None:
+            return model
+        quantized.load_state_dict(checkpoint["model_int8"])
+        return quantized
+
+    X, _ = _lstm_windows(scaler.transform(df["Close"].values.reshape(-1, 1)))
+    drift = quantization_drift(model, quantized, X[-QUANT_CHECK_WINDOWS:])
+    accepted = drift <= QUANT_MAX_DRIFT
+    if ticker:
+        save_int8_weights(ticker, df, quantized if accepted else None, drift)
+    return quantized if accepted else model
+
+
+# Model Export
+def export_lstm(model, path, aot=False):
+    """Export a trained model with a dynamic batch dimension for serving.
+
+    Writes a torch.export program, or with aot=True an AOTInductor package of native CPU/GPU
+    kernels, which runs without the Python module tree. Load it with load_exported_lstm.
+    """
+    example = torch.zeros(2, LOOKBACK, 1, device=DEVICE)
+    batch = torch.export.Dim("batch", min=1, max=65536)
+    program = torch.export.export(model.eval(), (example,), dynamic_shapes={"x": {0: batch}})
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if aot:
+        torch._inductor.aoti_compile_and_package(program, package_path=path)
+    else:
+        torch.export.save(program, path)
+    return path
+
+
+def load_exported_lstm(path, aot=False):
+    """Callable (B, LOOKBACK, 1) -> (B, 1) model from export_lstm; usable with forecast_windows"""
+    if aot:
+        return torch._inductor.aoti_load_package(path)
+    return torch.export.load(path).module()
+
+
+# Model Registry
+# One LSTM checkpoint per ticker/LOOKBACK/HIDDEN_SIZE, tagged with the data version it was trained on.
+def data_version(df):
+    """Short hash identifying the exact price series a model was trained on"""
+    closes = np.ascontiguousarray(df["Close"].values, dtype="float64")
+    return hashlib.sha1(closes.tobytes()).hexdigest()[:12]
+
+
+def history_version(df, last_date):
+    """data_version of the bars before last_date; the last bar itself may have been a partial intraday one"""
+    return data_version(df[df.index < last_date])
+
+
+def _lstm_checkpoint_prefix(ticker):
+    return os.path.join(MODEL_STORE_DIR, f"{ticker.replace('^', '_')}_lstm_lb{LOOKBACK}_h{HIDDEN_SIZE}")
+
+
+def load_lstm_checkpoint(ticker):
+    """Load the most recent LSTM checkpoint for a ticker, or None if there is none"""
+    paths = glob.glob(_lstm_checkpoint_prefix(ticker) + "_*.pt")
+    if not paths:
+        return None
+    try:
+        with warnings.catch_warnings():
+            # Unpickling int8 weights goes through torch's deprecated TypedStorage path
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.load(max(paths, key=os.path.getmtime), map_location=DEVICE, weights_only=False)
+    except Exception:
+        return None
+
+
+def save_lstm_checkpoint(ticker, model, opt, scaler, df):
+    prefix = _lstm_checkpoint_prefix(ticker)
+    version = data_version(df)
+    path = f"{prefix}_{version}.pt"
+    os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    torch.save({
+        "model": model.state_dict(),
+        "optimizer": opt.state_dict(),
+        "scaler": scaler,
+        "data_version": version,
+        "history_version": history_version(df, df.index[-1]),
+        "last_date": df.index[-1]
+    }, tmp_path)
+    os.replace(tmp_path, path)
+
+    # Checkpoints for older data versions are superseded
+    for old_path in glob.glob(prefix + "_*.pt"):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+def save_int8_weights(ticker, df, quantized, drift):
+    """Add int8 weights (None if rejected) and their drift to the checkpoint for this data version"""
+    checkpoint = load_lstm_checkpoint(ticker)
+    if checkpoint is None or checkpoint["data_version"] != data_version(df):
+        return
+    checkpoint["model_int8"] = quantized.state_dict() if quantized is not None else None
+    checkpoint["int8_drift"] = drift
+    path = f"{_lstm_checkpoint_prefix(ticker)}_{checkpoint['data_version']}.pt"
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Worker Processes
+def pool_context():
+    """Start method for process pools; forking a process with torch/OpenMP threads running can deadlock"""
+    return multiprocessing.get_context(POOL_START_METHOD)
+
+
+def init_pool_worker(torch_threads):
+    # Keep each worker's intra-op threads within its share of the cores
+    torch.set_num_threads(torch_threads)
@@ -0,0 +1,85 @@
+"""FinBERT headline sentiment with a persistent per-headline score cache."""
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from functools import lru_cache
+
+import numpy as np
+import torch
+from transformers import pipeline
+
+from stocksense.config import CACHE_DIR, FINBERT_MODEL, SENTIMENT_BATCH_SIZE, SENTIMENT_CACHE_PATH
+
+
+_sentiment_model_lock = threading.Lock()
+
+
+def load_sentiment_model():
+    # Serialize loads so a background warm-up and an analysis don't both build the pipeline
+    with _sentiment_model_lock:
+        return _load_sentiment_model()
+
+
+@lru_cache(maxsize=None)
+def _load_sentiment_model():
+    try:
+        return pipeline("sentiment-analysis", model=FINBERT_MODEL, tokenizer=FINBERT_MODEL,
+                        device=0 if torch.cuda.is_available() else -1)
+    except:
+        return None
+
+
+def _headline_key(title):
+    normalized = " ".join(title.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _sentiment_cache():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(SENTIMENT_CACHE_PATH, timeout=10)
+    conn.execute("CREATE TABLE IF NOT EXISTS headline_sentiment (key TEXT PRIMARY KEY, score REAL NOT NULL)")
+    return conn
+
+
+def score_headlines(titles, batch_size=SENTIMENT_BATCH_SIZE):
+    """Signed FinBERT score per headline; headlines scored before are served from the on-disk cache"""
+    keys = [_headline_key(t) for t in titles]
+    unique_keys = list(dict.fromkeys(keys))
+    try:
+        with closing(_sentiment_cache()) as conn:
+            placeholders = ",".join("?" * len(unique_keys))
+            scores = dict(conn.execute(
+                f"SELECT key, score FROM headline_sentiment WHERE key IN ({placeholders})", unique_keys
+            ).fetchall())
+    except sqlite3.Error:
+        scores = {}
+
+    missing = {k: t for k, t in zip(keys, titles) if k not in scores}
+    model = load_sentiment_model() if missing else None
+    if model is not None:
+        try:
+            results = model(list(missing.values()), batch_size=batch_size, truncation=True)
+        except Exception:
+            results = []
+        new_scores = {}
+        for key, res in zip(missing, results):
+            label, score = res["label"].lower(), res["score"]
+            new_scores[key] = score if "positive" in label else -score if "negative" in label else 0.0
+        scores.update(new_scores)
+        try:
+            with closing(_sentiment_cache()) as conn, conn:
+                conn.executemany("INSERT OR REPLACE INTO headline_sentiment (key, score) VALUES (?, ?)",
+                                 new_scores.items())
+        except sqlite3.Error:
+            pass
+
+    return [scores.get(k, 0.0) for k in keys]
+
+
+def analyze_sentiment_news(news_list):
+    if not news_list:
+        return 0.0
+    scores = score_headlines([item["title"] for item in news_list])
+    return float(np.mean(scores)) if scores else 0.0
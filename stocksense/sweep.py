@@ -0,0 +1,302 @@
+"""Hyperparameter sweeps: LSTM and label settings tried per ticker across a process pool."""
+import itertools
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.preprocessing import MinMaxScaler
+
+from stocksense.backtest import _backtest_years, vectorized_backtest, walk_forward_folds
+from stocksense.config import (
+    EPOCHS, HIDDEN_SIZE, LOOKBACK, LSTM_TIME_BUDGET_SECONDS, SWEEP_DB_PATH, SWEEP_FOLDS, SWEEP_HOLDOUT,
+    SWEEP_PRUNE_MIN_TRIALS, SWEEP_PRUNE_WARMUP_STEPS, SWEEP_RF_TREES, SWEEP_WORKERS
+)
+from stocksense.feature_store import stored_features
+from stocksense.forest import train_rf
+from stocksense.indicators import create_labels, fused_indicators
+from stocksense.lstm import (
+    DEVICE, LSTMWithAttention, _fit_lstm, _lstm_windows, init_pool_worker, pool_context
+)
+
+LSTM_PARAMS = ("lookback", "hidden_size", "epochs")
+LABEL_PARAMS = ("horizon", "vol_factor")
+OBJECTIVES = {"sharpe": "max", "lstm_mape": "min"}  # Metric -> direction that is better
+
+
+# Search Spaces
+def grid_trials(space):
+    """Every combination of a {param: [values]} grid, as a list of param dicts"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_trials(space, n_trials, seed=0):
+    """n_trials param dicts drawn from a space of value lists and (low, high) ranges.
+
+    Lists are sampled uniformly; a range of two ints draws an int, any other range a float.
+    """
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(n_trials):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = float(rng.uniform(low, high))
+            else:
+                params[name] = values[int(rng.integers(len(values)))]
+        trials.append(params)
+    return trials
+
+
+# Results Table
+# One row per trial in sweep_trials and every intermediate report in sweep_steps; params are stored
+# as JSON, so they can be queried with json_extract(params, '$.lookback').
+def _results_db(db_path=SWEEP_DB_PATH):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sweep_trials (
+            sweep_id TEXT NOT NULL, trial INTEGER NOT NULL, ticker TEXT, params TEXT NOT NULL,
+            status TEXT NOT NULL, objective TEXT, value REAL, sharpe REAL, annualized_return REAL,
+            oos_accuracy REAL, lstm_mape REAL, epochs_run INTEGER, seconds REAL, error TEXT,
+            finished_at TEXT, PRIMARY KEY (sweep_id, trial));
+        CREATE TABLE IF NOT EXISTS sweep_steps (
+            sweep_id TEXT NOT NULL, trial INTEGER NOT NULL, metric TEXT NOT NULL, step INTEGER NOT NULL,
+            value REAL, PRIMARY KEY (sweep_id, trial, metric, step));
+        CREATE TABLE IF NOT EXISTS sweep_stages (
+            sweep_id TEXT NOT NULL, stage TEXT NOT NULL, key TEXT NOT NULL, metrics TEXT NOT NULL,
+            pruned INTEGER NOT NULL, PRIMARY KEY (sweep_id, stage, key));
+    """)
+    return conn
+
+
+def _save_trial(db_path, row):
+    with closing(_results_db(db_path)) as conn, conn:
+        conn.execute(f"INSERT OR REPLACE INTO sweep_trials ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                     list(row.values()))
+
+
+def _cached_stage(db_path, sweep_id, stage, key):
+    with closing(_results_db(db_path)) as conn:
+        cached = conn.execute(
+            "SELECT metrics, pruned FROM sweep_stages WHERE sweep_id = ? AND stage = ? AND key = ?",
+            (sweep_id, stage, key)).fetchone()
+    return (json.loads(cached[0]), bool(cached[1])) if cached else None
+
+
+def _save_stage(db_path, sweep_id, stage, key, metrics, pruned):
+    with closing(_results_db(db_path)) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO sweep_stages VALUES (?, ?, ?, ?, ?)",
+                     (sweep_id, stage, key, json.dumps(metrics), int(pruned)))
+
+
+def load_results(sweep_id=None, db_path=SWEEP_DB_PATH):
+    """Trials as a DataFrame with one column per param, best objective value first.
+
+    sweep_id=None returns the most recently finished sweep.
+    """
+    with closing(_results_db(db_path)) as conn:
+        if sweep_id is None:
+            latest = conn.execute("SELECT sweep_id FROM sweep_trials ORDER BY finished_at DESC LIMIT 1").fetchone()
+            if latest is None:
+                return pd.DataFrame()
+            sweep_id = latest[0]
+        results = pd.read_sql_query("SELECT * FROM sweep_trials WHERE sweep_id = ? ORDER BY trial", conn,
+                                    params=(sweep_id,))
+    if results.empty:
+        return results
+    params = pd.DataFrame([json.loads(p) for p in results.pop("params")], index=results.index)
+    results = pd.concat([results[["sweep_id", "trial", "status"]], params, results.drop(
+        columns=["sweep_id", "trial", "status"])], axis=1)
+    # Only complete trials have a value, so pruned and failed ones sort last
+    ascending = OBJECTIVES.get(results["objective"].iloc[0]) == "min"
+    return results.sort_values("value", ascending=ascending, na_position="last").reset_index(drop=True)
+
+
+# Pruning
+class MedianPruner:
+    """Stops a trial whose objective at a step is worse than the median other trials reported there.
+
+    Reports are shared through the results database, so trials running in different workers prune
+    against each other. Nothing is pruned before warmup_steps, or until min_trials other trials have
+    reported at the step.
+    """
+    def __init__(self, sweep_id, trial, objective, db_path=SWEEP_DB_PATH, min_trials=SWEEP_PRUNE_MIN_TRIALS,
+                 warmup_steps=SWEEP_PRUNE_WARMUP_STEPS):
+        self.sweep_id, self.trial, self.objective = sweep_id, trial, objective
+        self.db_path, self.min_trials, self.warmup_steps = db_path, min_trials, warmup_steps
+
+    def report(self, metric, step, value):
+        """Record an intermediate value; returns False if the trial should stop"""
+        with closing(_results_db(self.db_path)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO sweep_steps VALUES (?, ?, ?, ?, ?)",
+                         (self.sweep_id, self.trial, metric, step, float(value)))
+            if metric != self.objective or step < self.warmup_steps:
+                return True
+            others = [v for (v,) in conn.execute(
+                "SELECT value FROM sweep_steps WHERE sweep_id = ? AND metric = ? AND step = ? AND trial != ?",
+                (self.sweep_id, metric, step, self.trial)) if v is not None]
+        if len(others) < self.min_trials:
+            return True
+        median = float(np.median(others))
+        return value >= median if OBJECTIVES[metric] == "max" else value <= median
+
+
+# Trials
+def _label_stage(closes, dates, features, params, pruner):
+    """Walk-forward RF signals for one horizon/vol_factor; scored by out-of-sample Sharpe"""
+    horizon = int(params.get("horizon", 5))
+    labels = create_labels(pd.DataFrame({"Close": closes}, index=dates), horizon, params.get("vol_factor", 0.5))
+    folds = walk_forward_folds(len(closes), SWEEP_FOLDS, purge=horizon)
+    signals = np.full(len(closes), "HOLD", dtype=object)
+    metrics = {}
+    for k, (train_start, train_end, test_start, test_end) in enumerate(folds):
+        try:
+            clf = train_rf(features.iloc[train_start:train_end], labels.iloc[train_start:train_end],
+                           n_estimators=SWEEP_RF_TREES)[0]
+            signals[test_start:test_end] = clf.predict(features.iloc[test_start:test_end])
+        except ValueError:
+            # Too few rows of some class to balance this fold
+            pass
+        tested = slice(folds[0][2], test_end)
+        result = vectorized_backtest(closes[tested], signals[tested], _backtest_years(dates[tested]))
+        known = labels.iloc[tested].notna().values
+        metrics = {
+            # No trades means zero volatility; score that as a Sharpe of 0 rather than NaN
+            "sharpe": float(np.nan_to_num(result["sharpe_ratio"][0])),
+            "annualized_return": float(result["annualized_return"][0]),
+            "oos_accuracy": float((signals[tested][known] == labels.iloc[tested].values[known]).mean())
+        }
+        if not pruner.report("sharpe", k, metrics["sharpe"]):
+            return metrics, True
+    return metrics, False
+
+
+def _lstm_stage(closes, params, pruner):
+    """LSTM for one lookback/hidden_size trained on the older bars; scored by MAPE on the newest"""
+    lookback = int(params.get("lookback", LOOKBACK))
+    split = int(len(closes) * (1 - SWEEP_HOLDOUT))
+    scaler = MinMaxScaler().fit(closes[:split].reshape(-1, 1))
+    X, y = _lstm_windows(scaler.transform(closes.reshape(-1, 1)), lookback)
+    n_train = split - lookback
+    X_hold, actual = torch.from_numpy(np.ascontiguousarray(X[n_train:])).to(DEVICE), closes[split:]
+
+    def holdout_mape():
+        model.eval()
+        with torch.no_grad():
+            pred = scaler.inverse_transform(model(X_hold).cpu().numpy())[:, 0]
+        return float(np.mean(np.abs(pred - actual) / actual) * 100)
+
+    # Every trial starts from the same weights and batch order, so trials are reproducible and their scores comparable
+    torch.manual_seed(0)
+    model = LSTMWithAttention(1, int(params.get("hidden_size", HIDDEN_SIZE))).to(DEVICE)
+    opt = torch.optim.Adam(model.parameters(), lr=0.001)
+    controller = _fit_lstm(model, opt, X[:n_train], y[:n_train], int(params.get("epochs", EPOCHS)),
+                           validation_fraction=0, time_budget=LSTM_TIME_BUDGET_SECONDS,
+                           on_epoch=lambda epoch, loss: pruner.report("lstm_mape", epoch, holdout_mape()))
+    return {"lstm_mape": holdout_mape(), "epochs_run": controller.epochs_run}, controller.stop_reason == "pruned"
+
+
+def _run_trial(shm_name, shape, columns, sweep_id, trial, params, objective, ticker, db_path):
+    start = time.perf_counter()
+    shm = SharedMemory(name=shm_name)
+    data = None
+    try:
+        # Read-only views; a stage copies only the rows it trains on, not the whole matrix
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order="F")
+        data.flags.writeable = False
+        return _score_trial(data, columns, sweep_id, trial, params, objective, ticker, db_path, start)
+    finally:
+        # Every view of the buffer has to be gone before it can be closed
+        del data
+        shm.close()
+
+
+def _score_trial(data, columns, sweep_id, trial, params, objective, ticker, db_path, start):
+    day, closes = data[:, columns.index("day")], data[:, columns.index("Close")]
+    # The matrix is column-major with the features last, so they are one contiguous block
+    features = pd.DataFrame(data[:, 2:], columns=columns[2:], copy=False)
+    dates = pd.to_datetime(day, unit="D")
+    features.index = dates
+    pruner = MedianPruner(sweep_id, trial, objective, db_path)
+    row = {"sweep_id": sweep_id, "trial": trial, "ticker": ticker, "params": json.dumps(params),
+           "objective": objective, "status": "complete"}
+    stages = []
+    # Label settings are cheap to score, so they run (and can be pruned) before the LSTM
+    if any(p in params for p in LABEL_PARAMS) or objective == "sharpe":
+        stages.append(("labels", LABEL_PARAMS, lambda: _label_stage(closes, dates, features, params, pruner)))
+    if any(p in params for p in LSTM_PARAMS) or objective == "lstm_mape":
+        stages.append(("lstm", LSTM_PARAMS, lambda: _lstm_stage(closes, params, pruner)))
+    try:
+        for stage, names, run in stages:
+            # Both stages are deterministic, so a grid reuses a stage another trial already ran with the same params
+            key = json.dumps({p: params[p] for p in names if p in params}, sort_keys=True)
+            cached = _cached_stage(db_path, sweep_id, stage, key)
+            metrics, pruned = cached if cached is not None else run()
+            if cached is None:
+                _save_stage(db_path, sweep_id, stage, key, metrics, pruned)
+            row.update(metrics)
+            if pruned:
+                row["status"] = "pruned"
+                break
+        if row["status"] == "complete":
+            row["value"] = row.get(objective)
+    except Exception as e:
+        row.update({"status": "failed", "error": str(e)[:200]})
+    row.update({"seconds": time.perf_counter() - start, "finished_at": time.strftime("%Y-%m-%d %H:%M:%S")})
+    _save_trial(db_path, row)
+    return row
+
+
+def run_sweep(df, trials, ticker=None, objective=None, sweep_id=None, n_workers=SWEEP_WORKERS,
+              db_path=SWEEP_DB_PATH, progress_callback=None):
+    """Score every param dict in trials on one ticker's price history across a process pool.
+
+    Params can be any of LSTM_PARAMS and LABEL_PARAMS; a trial only runs the stages its params
+    touch. objective ("sharpe" or "lstm_mape") ranks the trials and is what they are pruned on; it
+    defaults to "sharpe" when label params are swept. The price and feature matrix is shared with
+    the workers through shared memory. Every trial is written to the results table as it finishes;
+    progress_callback(done, total, row) is called in the parent. Returns load_results(sweep_id).
+    """
+    if objective is None:
+        objective = "sharpe" if any(p in t for t in trials for p in LABEL_PARAMS) else "lstm_mape"
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {sorted(OBJECTIVES)}")
+    sweep_id = sweep_id or f"{ticker or 'sweep'}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+    df = df.rename(columns=str.capitalize)
+    # Per-trial labels depend on the swept params, so only the indicator features come from the store
+    df, features = stored_features(ticker, df)[:2] if ticker else fused_indicators(df)
+    features = features.fillna(0)
+    day = (df.index.values.astype("datetime64[D]").astype(np.int64)).astype(np.float64)
+    columns = ["day", "Close"] + list(features.columns)
+    data = np.column_stack([day, df["Close"].values.astype(np.float64), features.values.astype(np.float64)])
+    torch_threads = max(1, (os.cpu_count() or 1) // n_workers)
+
+    shm = SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf, order="F")[:] = data
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=pool_context(), initializer=init_pool_worker,
+                                 initargs=(torch_threads,)) as pool:
+            futures = [pool.submit(_run_trial, shm.name, data.shape, columns, sweep_id, k, params, objective,
+                                   ticker, db_path) for k, params in enumerate(trials)]
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                if progress_callback is not None:
+                    progress_callback(done, len(trials), row)
+    finally:
+        shm.close()
+        shm.unlink()
+    return load_results(sweep_id, db_path)
@@ -0,0 +1,198 @@
+"""Lightweight tracing: named spans with wall time, CPU time and memory, exported per run."""
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from stocksense.config import TRACE_DIR, TRACE_ENABLED, TRACE_MEMORY
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TRACE_LOG = "traces.jsonl"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_active = contextvars.ContextVar("stocksense_trace", default=None)
+
+
+def _rss_bytes():
+    """Current resident set size of this process, or None where it can't be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:  # Not Linux
+        pass
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+# Runs & Spans
+class Run:
+    """One traced run: its labels and a record per span, in the order the spans finished.
+
+    Each record has the span name, its parent, wall and CPU seconds (process CPU time, so
+    torch/sklearn worker threads count and cpu_s can exceed wall_s), the process's RSS when the span
+    ended and how much it grew (or shrank) during the span and, with TRACE_MEMORY, the peak
+    Python/numpy allocation above the span's starting level.
+    """
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.started = time.time()
+        self.status = "ok"
+        self.spans = []
+        self._stack = []
+
+    def to_dict(self):
+        return {"run": self.name, "labels": self.labels, "started": self.started, "status": self.status,
+                "spans": self.spans}
+
+    def stages(self):
+        """Top-level spans (the direct children of the run), for a per-stage breakdown"""
+        return [s for s in self.spans if s["parent"] == self.name]
+
+
+class _Frame:
+    __slots__ = ("name", "wall", "cpu", "rss", "base", "peak")
+
+    def __init__(self, name):
+        self.name = name
+        self.base = self.peak = 0
+        if TRACE_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            self.base = self.peak = current
+        self.rss = _rss_bytes()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+
+def _enter(run, name):
+    if TRACE_MEMORY and run._stack:
+        # tracemalloc keeps a single peak, so fold it into the enclosing span before resetting it
+        run._stack[-1].peak = max(run._stack[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    frame = _Frame(name)
+    run._stack.append(frame)
+    return frame
+
+
+def _exit(run, frame, error=None):
+    wall, cpu = time.perf_counter() - frame.wall, time.process_time() - frame.cpu
+    rss = _rss_bytes()
+    run._stack.pop()
+    parent = run._stack[-1] if run._stack else None
+    record = {"span": frame.name, "parent": parent.name if parent else None, "wall_s": round(wall, 6),
+              "cpu_s": round(cpu, 6), "rss_bytes": rss,
+              "rss_delta_bytes": None if rss is None or frame.rss is None else rss - frame.rss}
+    if TRACE_MEMORY:
+        frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+        record["peak_bytes"] = frame.peak - frame.base
+        if parent is not None:
+            parent.peak = max(parent.peak, frame.peak)
+        tracemalloc.reset_peak()
+    if error is not None:
+        record["error"] = type(error).__name__
+    run.spans.append(record)
+
+
+@contextmanager
+def span(name):
+    """Time a stage of the active run; does nothing when no run is being traced"""
+    run = _active.get()
+    if run is None:
+        yield
+        return
+    frame = _enter(run, name)
+    try:
+        yield
+    except BaseException as e:
+        _exit(run, frame, e)
+        raise
+    _exit(run, frame)
+
+
+@contextmanager
+def trace(name, **labels):
+    """Trace one run (e.g. an analysis) and export its spans when it ends; yields the Run.
+
+    Inside an already traced run this is just a span of it and yields the enclosing Run; with
+    tracing disabled it yields None. The run itself is recorded as the root span, so its wall time
+    is the total the stages are part of. Callers pass the Run on themselves (there is no "last run"
+    global, since concurrent app sessions share the process).
+    """
+    if not TRACE_ENABLED or _active.get() is not None:
+        with span(name):
+            yield _active.get()
+        return
+
+    run = Run(name, {k: str(v) for k, v in labels.items()})
+    started_tracemalloc = TRACE_MEMORY and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    token = _active.set(run)
+    frame = _enter(run, name)
+    try:
+        yield run
+    except BaseException as e:
+        run.status = "error"
+        _exit(run, frame, e)
+        raise
+    else:
+        _exit(run, frame)
+    finally:
+        _active.reset(token)
+        if started_tracemalloc:
+            tracemalloc.stop()
+        try:
+            export_run(run)
+        except OSError:
+            pass
+
+
+# Export
+def _prometheus_labels(labels):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped))
+
+
+def prometheus_text(run):
+    """The run's spans as Prometheus text-format gauges, one series per span"""
+    metrics = [("wall_s", "span_wall_seconds", "Wall-clock seconds spent in each span of the last run"),
+               ("cpu_s", "span_cpu_seconds", "Process CPU seconds spent in each span of the last run"),
+               ("peak_bytes", "span_peak_bytes", "Peak traced allocation above the span's starting level"),
+               ("rss_bytes", "span_rss_bytes", "Process resident set size when the span ended"),
+               ("rss_delta_bytes", "span_rss_delta_bytes", "Change in process resident set size during the span")]
+    lines = []
+    for key, metric, help_text in metrics:
+        records = [s for s in run.spans if s.get(key) is not None]
+        if not records:
+            continue
+        lines += [f"# HELP stocksense_{metric} {help_text}", f"# TYPE stocksense_{metric} gauge"]
+        for s in records:
+            labels = _prometheus_labels({"run": run.name, **run.labels, "span": s["span"]})
+            lines.append(f"stocksense_{metric}{{{labels}}} {s[key]}")
+    lines += ["# HELP stocksense_run_timestamp_seconds Unix time the last run started",
+              "# TYPE stocksense_run_timestamp_seconds gauge",
+              f"stocksense_run_timestamp_seconds{{{_prometheus_labels({'run': run.name, **run.labels})}}} "
+              f"{run.started:.3f}"]
+    return "\n".join(lines) + "\n"
+
+
+def export_run(run, trace_dir=TRACE_DIR):
+    """Append the run to traces.jsonl and rewrite {run name}.prom with its gauges"""
+    os.makedirs(trace_dir, exist_ok=True)
+    # One write per line, so runs appended from several screener workers don't interleave
+    with open(os.path.join(trace_dir, TRACE_LOG), "a") as f:
+        f.write(json.dumps(run.to_dict()) + "\n")
+    path = os.path.join(trace_dir, f"{run.name}.prom")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text(run))
+    os.replace(tmp_path, path)
+
@@ -0,0 +1,61 @@
+"""Background warm-up of models and market data for a new app session."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from stocksense.config import WARMUP_WORKERS
+
+
+@lru_cache(maxsize=None)
+def _warmup_executor():
+    # Shared by every session so idle warm-up threads don't pile up per visitor
+    return ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="warmup")
+
+
+class Warmup:
+    """Named background tasks for one session, with progress for the loading screen"""
+
+    def __init__(self):
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, label, fn, *args, critical=False):
+        """Start fn(*args) in the background unless a task with this name was already submitted"""
+        with self._lock:
+            if name not in self._tasks:
+                self._tasks[name] = {
+                    "label": label,
+                    "critical": critical,
+                    "future": _warmup_executor().submit(fn, *args)
+                }
+            return self._tasks[name]["future"]
+
+    def progress(self):
+        """(label, state, critical) per task; state is "running", "done" or "failed\""""
+        with self._lock:
+            tasks = list(self._tasks.values())
+        rows = []
+        for task in tasks:
+            future = task["future"]
+            if not future.done():
+                state = "running"
+            else:
+                state = "failed" if future.exception() is not None else "done"
+            rows.append((task["label"], state, task["critical"]))
+        return rows
+
+    def critical_ready(self):
+        return all(state != "running" for _, state, critical in self.progress() if critical)
+
+    def wait_critical(self, timeout, on_progress=None, poll_interval=0.1):
+        """Block until every critical task has finished or timeout seconds pass; returns whether they finished"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if on_progress is not None:
+                on_progress(self.progress())
+            if self.critical_ready():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
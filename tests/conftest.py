@@ -0,0 +1,37 @@
+"""Shared fixtures: scratch store directories and synthetic price history."""
+import os
+import sys
+import tempfile
+
+# Config reads the cache directory at import time, so point it at scratch space before stocksense loads
+os.environ["STOCKSENSE_CACHE_DIR"] = tempfile.mkdtemp(prefix="stocksense-tests-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from stocksense import data, feature_store, forest, global_lstm, lstm  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def store_dirs(tmp_path, monkeypatch):
+    """Give every test its own price, feature and model stores"""
+    monkeypatch.setattr(data, "PRICE_STORE_DIR", str(tmp_path / "prices"))
+    monkeypatch.setattr(feature_store, "FEATURE_STORE_DIR", str(tmp_path / "features"))
+    monkeypatch.setattr(forest, "MODEL_STORE_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(lstm, "MODEL_STORE_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(global_lstm, "MODEL_STORE_DIR", str(tmp_path / "models"))
+    return tmp_path
+
+
+@pytest.fixture
+def make_bars():
+    """make_bars(n, seed=0): n daily OHLCV bars shaped like a yfinance history frame"""
+    def make(n, seed=0, start="2015-01-01"):
+        rng = np.random.default_rng(seed)
+        close = 100 * np.exp(np.cumsum(rng.normal(3e-4, 0.02, n)))
+        index = pd.bdate_range(start, periods=n, tz="Asia/Kolkata", name="Date")
+        return pd.DataFrame({"Open": close * 0.995, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                             "Volume": rng.integers(1e5, 1e6, n).astype(float)}, index=index)
+    return make
@@ -0,0 +1,97 @@
+"""Price store: cold start, delta merges and re-adjusted history."""
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocksense import data
+
+
+class FakeYahoo:
+    """Stands in for yfinance: history(period=...) serves the whole frame, history(start=...) the bars from start on"""
+    def __init__(self):
+        self.frame = None
+        self.calls = []
+
+    def Ticker(self, ticker):
+        return types.SimpleNamespace(history=self.history)
+
+    def history(self, period=None, start=None):
+        self.calls.append(period or start)
+        if start is None:
+            return self.frame
+        return self.frame[self.frame.index.tz_localize(None) >= start]
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    fake = FakeYahoo()
+    monkeypatch.setattr(data, "yf", fake)
+    return fake
+
+
+def stored_closes(ticker="TCS.NS"):
+    return data.load_price_history(ticker)["Close"].values
+
+
+def test_cold_start_fetches_and_stores_the_full_window(yahoo, make_bars):
+    yahoo.frame = make_bars(300)
+    df = data.get_price_history("TCS.NS")
+    assert yahoo.calls == ["5y"]
+    assert len(df) == 300
+    np.testing.assert_array_equal(stored_closes(), yahoo.frame["Close"].values)
+
+
+def test_recent_store_is_served_without_fetching(yahoo, make_bars):
+    data.save_price_history("TCS.NS", make_bars(300))
+    data.get_price_history("TCS.NS")
+    assert yahoo.calls == []
+
+
+def test_delta_appends_new_bars_and_completes_the_partial_one(yahoo, make_bars, monkeypatch):
+    monkeypatch.setattr(data, "PRICE_REFRESH_SECONDS", 0)
+    bars = make_bars(2000)  # Longer than five years: the store never drops old bars
+    partial = bars.iloc[:1998].copy()
+    partial.iloc[-1, partial.columns.get_loc("Close")] *= 0.98  # Last stored bar was fetched mid-session
+    data.save_price_history("TCS.NS", partial)
+
+    yahoo.frame = bars
+    df = data.get_price_history("TCS.NS")
+    assert yahoo.calls == [bars.index[1996].strftime("%Y-%m-%d")]
+    assert len(df) == 2000
+    assert df.index[0] == bars.index[0].tz_localize(None)
+    np.testing.assert_array_equal(stored_closes(), bars["Close"].values)
+
+
+def test_readjusted_history_triggers_a_full_refetch(yahoo, make_bars, monkeypatch):
+    monkeypatch.setattr(data, "PRICE_REFRESH_SECONDS", 0)
+    bars = make_bars(301)
+    data.save_price_history("TCS.NS", bars.iloc[:300])
+
+    # A 1:2 split back-adjusts every earlier bar
+    adjusted = bars.copy()
+    adjusted[["Open", "High", "Low", "Close"]] /= 2
+    yahoo.frame = adjusted
+    data.get_price_history("TCS.NS")
+    assert yahoo.calls == [bars.index[298].strftime("%Y-%m-%d"), "5y"]
+    np.testing.assert_allclose(stored_closes(), adjusted["Close"].values)
+
+
+def test_duplicate_bars_keep_the_latest(make_bars):
+    bars = make_bars(10)
+    revised = bars.iloc[[-1]].copy()
+    revised["Close"] += 1
+    df = data.save_price_history("TCS.NS", pd.concat([bars, revised]))
+    assert len(df) == 10
+    assert df["Close"].iloc[-1] == revised["Close"].iloc[0]
+
+
+def test_concurrent_saves_of_one_ticker_do_not_collide(make_bars):
+    # App sessions and the warm-up prefetch are threads of one process
+    bars = make_bars(300)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: data.save_price_history("TCS.NS", bars), range(64)))
+    assert all(len(df) == 300 for df in results)
+    np.testing.assert_array_equal(stored_closes(), bars["Close"].values)
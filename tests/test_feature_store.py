@@ -0,0 +1,77 @@
+"""Feature store: stored matrices match a fresh computation, and updates resume from the saved kernel state."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocksense import feature_store
+from stocksense.indicators import create_labels, fused_indicators
+
+
+@pytest.fixture
+def kernel_starts(monkeypatch):
+    """First row each indicator_matrix call computes"""
+    starts = []
+    kernel = feature_store.indicator_matrix
+
+    def recording(close, **kwargs):
+        starts.append(kwargs["start"])
+        return kernel(close, **kwargs)
+    monkeypatch.setattr(feature_store, "indicator_matrix", recording)
+    return starts
+
+
+def frame(bars):
+    return bars[["Close"]].tz_localize(None)
+
+
+def assert_matches_fresh(df):
+    expected_df, expected_features = fused_indicators(df.copy())
+    stored_df, features, labels = feature_store.stored_features("TCS.NS", df.copy())
+    pd.testing.assert_frame_equal(features, expected_features, check_freq=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(stored_df, expected_df, check_freq=False, rtol=1e-9)
+    pd.testing.assert_series_equal(labels, create_labels(df), check_freq=False)
+
+
+def test_stored_features_match_fused_indicators(make_bars):
+    assert_matches_fresh(frame(make_bars(800)))
+
+
+def test_new_bars_resume_from_the_saved_state(make_bars, kernel_starts):
+    bars = frame(make_bars(800))
+    assert_matches_fresh(bars.iloc[:790])
+    kernel_starts.clear()
+    assert_matches_fresh(bars)
+    # Only the unstable tail of the old version and the new bars are computed
+    assert min(kernel_starts) == 790 - feature_store.FEATURE_STORE_TAIL_ROWS
+
+
+def test_revised_history_recomputes_from_scratch(make_bars, kernel_starts):
+    bars = frame(make_bars(800))
+    assert_matches_fresh(bars.iloc[:790])
+    revised = bars.copy()
+    revised.iloc[100, 0] *= 1.01
+    kernel_starts.clear()
+    assert_matches_fresh(revised)
+    assert min(kernel_starts) == 0
+
+
+def test_unchanged_data_is_served_from_the_store(make_bars, kernel_starts):
+    bars = frame(make_bars(400))
+    first = feature_store.update_feature_store("TCS.NS", bars)
+    kernel_starts.clear()
+    again = feature_store.update_feature_store("TCS.NS", bars)
+    assert kernel_starts == []
+    assert again.path == first.path
+    assert isinstance(again.indicators, np.memmap)
+
+
+def test_concurrent_updates_of_one_version_share_the_store(make_bars):
+    bars = frame(make_bars(400))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        stored = list(pool.map(lambda _: feature_store.update_feature_store("TCS.NS", bars), range(32)))
+    assert len({s.path for s in stored}) == 1
+    assert all(s.label_codes() is not None for s in stored)
+    assert not [p for p in os.listdir(feature_store.FEATURE_STORE_DIR) if p.endswith(".tmp")]
@@ -0,0 +1,78 @@
+"""Random forest: the compiled forest against sklearn, and out-of-sample scoring of stored forests."""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from stocksense import forest
+from stocksense.indicators import create_labels, fused_indicators
+
+
+@pytest.fixture
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 8))
+    y = np.where(X[:, 0] + X[:, 1] ** 2 > 1, "BUY", np.where(X[:, 2] < -0.5, "SELL", "HOLD"))
+    X[rng.random(X.shape) < 0.05] = np.nan  # Exercise the learned missing-value directions
+    return RandomForestClassifier(n_estimators=40, random_state=0).fit(X, y), rng
+
+
+def test_compact_forest_matches_sklearn(fitted):
+    clf, rng = fitted
+    X = rng.normal(size=(5000, 8))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    compiled = forest.CompactForest(clf)
+    np.testing.assert_allclose(compiled.predict_proba(X), clf.predict_proba(X), atol=1e-6)
+    np.testing.assert_array_equal(compiled.predict(X), clf.predict(X))
+
+
+def test_compact_forest_handles_small_tiles(fitted, monkeypatch):
+    clf, rng = fitted
+    monkeypatch.setattr(forest, "COMPACT_RF_CHUNK_CELLS", 7)
+    X = rng.normal(size=(13, 8))
+    np.testing.assert_allclose(forest.CompactForest(clf).predict_proba(X), clf.predict_proba(X), atol=1e-6)
+
+
+def test_compile_forest_recompiles_grown_forests(fitted):
+    clf, rng = fitted
+    compiled = forest.compile_forest(clf)
+    assert forest.compile_forest(clf) is compiled
+    clf.set_params(warm_start=True, n_estimators=50)
+    clf.fit(rng.normal(size=(300, 8)), np.resize(["BUY", "SELL", "HOLD"], 300))
+    assert len(forest.compile_forest(clf).roots) == 50
+
+
+def train(make_bars, n):
+    df = make_bars(900).tz_localize(None).iloc[:n]
+    df, features = fused_indicators(df)
+    return forest.train_rf(features, create_labels(df), "TCS.NS", df, n_estimators=30)
+
+
+def test_reused_and_grown_forests_are_scored_on_their_holdout(make_bars):
+    clf, X_train, X_test, _, _ = train(make_bars, 850)
+    holdout = set(X_test.index)
+    assert holdout and not holdout & set(X_train.index)
+
+    _, _, reused_test, _, _ = train(make_bars, 850)
+    assert set(reused_test.index) == holdout
+
+    grown, grown_train, grown_test, _, _ = train(make_bars, 860)
+    assert grown.n_estimators == 30 + forest.RF_WARM_START_TREES
+    assert set(grown_test.index) <= holdout
+    assert not set(grown_train.index) & holdout
+    assert grown_train.index.max() > X_train.index.max()
+
+
+def test_batches_are_dispatched_by_size(fitted, monkeypatch):
+    clf, rng = fitted
+    monkeypatch.setattr(forest, "COMPACT_RF_MAX_ROWS", 10)
+    calls = []
+    compiled_proba = forest.CompactForest.predict_proba
+
+    def recording(self, X):
+        calls.append(len(X))
+        return compiled_proba(self, X)
+    monkeypatch.setattr(forest.CompactForest, "predict_proba", recording)
+    forest.forest_predict_proba(clf, rng.normal(size=(10, 8)))
+    large = rng.normal(size=(11, 8))
+    np.testing.assert_array_equal(forest.forest_predict(clf, large), clf.predict(large))
+    assert calls == [10]
@@ -0,0 +1,31 @@
+"""Global LSTM: which tickers a saved panel model can still serve."""
+import pytest
+
+from stocksense import global_lstm
+
+
+@pytest.fixture
+def panel(make_bars, monkeypatch):
+    """Price frames for three tickers, with a small global model trained on their first 250 bars"""
+    monkeypatch.setattr(global_lstm, "HIDDEN_SIZE", 8)
+    frames = {t: make_bars(260, seed=k).tz_localize(None) for k, t in enumerate(["TCS.NS", "INFY.NS", "ITC.NS"])}
+    global_lstm.train_global_lstm({t: df.iloc[:250] for t, df in frames.items()}, epochs=1)
+    return frames
+
+
+def test_appended_bars_are_still_served(panel):
+    model, scalers = global_lstm.load_global_lstm(panel)
+    assert sorted(scalers) == sorted(panel) and model.tickers == list(panel)
+    assert global_lstm.global_ticker_model("TCS.NS", panel["TCS.NS"]) is not None
+
+
+def test_revised_history_is_not_served(panel):
+    adjusted = panel["TCS.NS"].copy()
+    adjusted["Close"] /= 2
+    _, scalers = global_lstm.load_global_lstm({**panel, "TCS.NS": adjusted})
+    assert sorted(scalers) == ["INFY.NS", "ITC.NS"]
+    assert global_lstm.global_ticker_model("TCS.NS", adjusted) is None
+
+
+def test_untrained_ticker_is_not_served(panel, make_bars):
+    assert global_lstm.global_ticker_model("WIPRO.NS", make_bars(260).tz_localize(None)) is None
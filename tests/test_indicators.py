@@ -0,0 +1,61 @@
+"""Indicator engines against the pandas reference calculate_technical_indicators."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocksense.indicators import (INDICATOR_COLUMNS, KERNEL_COLUMNS, StreamingIndicators, build_features,
+                                   calculate_technical_indicators, indicator_matrix)
+
+
+def closes(n, drift=3e-4, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(drift, 0.02, n)))
+    return pd.DataFrame({"Close": close}, index=pd.RangeIndex(n))
+
+
+def exact_bollinger(close):
+    """Upper and lower bands from each 20-bar window directly"""
+    windows = np.lib.stride_tricks.sliding_window_view(close, 20)
+    mean, band = windows.mean(axis=1), 2 * windows.std(axis=1, ddof=1)
+    return mean + band, mean - band
+
+
+@pytest.mark.parametrize("n", [300, 20000])
+def test_streaming_matches_pandas(n):
+    df = closes(n)
+    expected = calculate_technical_indicators(df.copy())[INDICATOR_COLUMNS]
+    pd.testing.assert_frame_equal(StreamingIndicators().update_frame(df), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_streaming_resumes_from_history():
+    df = closes(1000)
+    engine = StreamingIndicators.from_history(df.iloc[:700])
+    expected = calculate_technical_indicators(df.copy())[INDICATOR_COLUMNS].iloc[700:]
+    pd.testing.assert_frame_equal(engine.update_frame(df.iloc[700:]), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_streaming_bollinger_stays_exact_on_a_falling_price():
+    # The price falls by about 1e8 over the series; running moments alone lose most of their digits
+    df = closes(20000, drift=-1e-3)
+    streamed = StreamingIndicators().update_frame(df)
+    upper, lower = exact_bollinger(df["Close"].values)
+    np.testing.assert_allclose(streamed["BB_upper"].values[19:], upper, rtol=1e-12)
+    np.testing.assert_allclose(streamed["BB_lower"].values[19:], lower, rtol=1e-12)
+
+
+@pytest.mark.parametrize("n", [300, 20000])
+def test_indicator_matrix_matches_pandas(n):
+    # 20000 rows spans several kernel tiles
+    df = closes(n)
+    reference = calculate_technical_indicators(df.copy())
+    expected = pd.concat([reference[INDICATOR_COLUMNS], build_features(reference)], axis=1).astype(float)
+    matrix = pd.DataFrame(indicator_matrix(df["Close"]), index=df.index, columns=KERNEL_COLUMNS)
+    pd.testing.assert_frame_equal(matrix, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_indicator_matrix_bollinger_stays_exact_on_a_falling_price():
+    df = closes(20000, drift=-1e-3)
+    matrix = pd.DataFrame(indicator_matrix(df["Close"]), columns=KERNEL_COLUMNS)
+    upper, lower = exact_bollinger(df["Close"].values)
+    np.testing.assert_allclose(matrix["BB_upper"].values[19:], upper, rtol=1e-12)
+    np.testing.assert_allclose(matrix["BB_lower"].values[19:], lower, rtol=1e-12)
@@ -0,0 +1,71 @@
+"""LSTM checkpoints: fine-tuning on appended bars and retraining after revised history."""
+import numpy as np
+import pytest
+import torch
+
+from stocksense import lstm
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Epoch budget of every _fit_lstm call, with a small network so training is quick"""
+    monkeypatch.setattr(lstm, "HIDDEN_SIZE", 8)
+    monkeypatch.setattr(lstm, "EPOCHS", 2)
+    calls = []
+    fit = lstm._fit_lstm
+
+    def recording(model, opt, X, y, epochs, **kwargs):
+        calls.append(epochs)
+        return fit(model, opt, X, y, epochs, **kwargs)
+    monkeypatch.setattr(lstm, "_fit_lstm", recording)
+    return calls
+
+
+def history(make_bars, n):
+    return make_bars(300).tz_localize(None).iloc[:n]
+
+
+def test_appended_bars_fine_tune_the_checkpoint(make_bars, fits):
+    _, scaler = lstm.train_lstm(history(make_bars, 290), "TCS.NS")
+    _, tuned_scaler = lstm.train_lstm(history(make_bars, 293), "TCS.NS")
+    assert fits == [2, lstm.FINETUNE_EPOCHS]
+    np.testing.assert_array_equal(tuned_scaler.data_max_, scaler.data_max_)
+
+
+def test_unchanged_data_reuses_the_checkpoint(make_bars, fits):
+    lstm.train_lstm(history(make_bars, 290), "TCS.NS")
+    lstm.train_lstm(history(make_bars, 290), "TCS.NS")
+    assert fits == [2]
+
+
+def test_readjusted_history_retrains_with_a_new_scaler(make_bars, fits):
+    df = history(make_bars, 290)
+    lstm.train_lstm(df, "TCS.NS")
+    adjusted = df.copy()
+    adjusted["Close"] /= 2  # A 1:2 split back-adjusts every stored close
+    _, scaler = lstm.train_lstm(adjusted, "TCS.NS")
+    assert fits == [2, 2]
+    assert scaler.data_max_[0] == adjusted["Close"].max()
+
+
+class Recording(torch.nn.Module):
+    """Wraps a model and keeps every batch it was trained on"""
+    def __init__(self, model):
+        super().__init__()
+        self.model, self.trained_on = model, []
+
+    def forward(self, x):
+        if self.training:
+            self.trained_on.append(x.detach().clone())
+        return self.model(x)
+
+
+def test_held_out_windows_are_trained_on_before_serving(make_bars):
+    closes = make_bars(1200)["Close"].values.reshape(-1, 1)
+    X, y = lstm._lstm_windows((closes - closes.min()) / np.ptp(closes))
+    model = Recording(lstm.LSTMWithAttention(1, 8))
+    opt = torch.optim.Adam(model.parameters(), lr=0.001)
+    controller = lstm._fit_lstm(model, opt, X, y, 2)
+    assert controller.epochs_run == 2
+    newest = torch.from_numpy(np.ascontiguousarray(X[-1]))
+    assert any((batch == newest).all(dim=(1, 2)).any() for batch in model.trained_on)
@@ -0,0 +1,67 @@
+"""NewsAPI client against tools/newsapi_stub.py replaying recorded responses."""
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from stocksense import data
+from tools.newsapi_stub import make_handler, recording_name
+
+
+def article(title, description=""):
+    return {"title": title, "description": description, "url": f"https://example.com/{recording_name(title)}",
+            "publishedAt": "2024-05-02T09:15:00Z"}
+
+
+@pytest.fixture
+def recordings(tmp_path, monkeypatch):
+    """Directory the stub replays from, with NEWSAPI_URL pointed at the running stub"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(data, "NEWSAPI_URL", f"http://127.0.0.1:{server.server_port}/v2/everything")
+
+    def record(query, *articles):
+        with open(tmp_path / f"{recording_name(query)}.json", "w") as f:
+            json.dump({"status": "ok", "totalResults": len(articles), "articles": list(articles)}, f)
+    yield record
+    server.shutdown()
+    server.server_close()
+
+
+def test_ticker_news_keeps_articles_about_the_company(recordings):
+    query = data.build_news_query("TCS.NS")
+    recordings(query,
+               article("TCS wins a large cloud deal"),
+               article("IT stocks rally", "Analysts upgrade TCS after results"),
+               article("Infosys shares slip"))
+    news = data.fetch_news_newsapi(query, "TCS", "TCS.NS")
+    assert [n["title"] for n in news] == ["TCS wins a large cloud deal", "IT stocks rally"]
+    assert news[0]["url"].startswith("https://example.com/") and news[0]["date"] == "2024-05-02T09:15:00Z"
+
+
+def test_ticker_news_without_a_recording_is_empty(recordings):
+    assert data.fetch_news_newsapi(data.build_news_query("TCS.NS"), "TCS", "TCS.NS") == []
+
+
+def test_unreachable_api_returns_no_news(monkeypatch):
+    monkeypatch.setattr(data, "NEWSAPI_URL", "http://127.0.0.1:9/v2/everything")
+    assert data.fetch_news_newsapi("anything", "TCS", "TCS.NS") == []
+
+
+def test_market_headlines_are_tagged_and_deduplicated(recordings):
+    headlines = [article("Nifty hits a record high"), article("Bank stocks drop on rate worries"),
+                 article("Monsoon update")]
+    recordings("Indian stock market", *headlines)
+    recordings("Nifty Sensex", *headlines)
+    # The cached wrapper is bypassed so each test sees its own recordings
+    result, error = data.fetch_market_headlines.__wrapped__()
+    assert error is None
+    assert result == ["🔥 Nifty hits a record high", "📉 Bank stocks drop on rate worries"]
+
+
+def test_market_headline_errors_are_reported(monkeypatch):
+    monkeypatch.setattr(data, "NEWSAPI_URL", "http://127.0.0.1:9/v2/everything")
+    result, error = data.fetch_market_headlines.__wrapped__()
+    assert result == [] and error
@@ -0,0 +1,98 @@
+"""Tracing: span nesting, error records, per-run isolation and export."""
+import json
+import threading
+
+import pytest
+
+from stocksense import tracing
+from stocksense.tracing import export_run  # Bound before the fixture replaces it
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    """Runs passed to export_run, instead of writing them to the trace directory"""
+    runs = []
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", True)
+    monkeypatch.setattr(tracing, "export_run", runs.append)
+    return runs
+
+
+def test_spans_nest_under_the_run(exported):
+    with tracing.trace("analysis", ticker="TCS.NS") as run:
+        with tracing.span("features"):
+            with tracing.span("kernel"):
+                pass
+        with pytest.raises(ValueError):
+            with tracing.span("news"):
+                raise ValueError("offline")
+
+    assert exported == [run]
+    assert run.labels == {"ticker": "TCS.NS"} and run.status == "ok"
+    assert [(s["span"], s["parent"]) for s in run.spans] == [
+        ("kernel", "features"), ("features", "analysis"), ("news", "analysis"), ("analysis", None)]
+    assert [s["span"] for s in run.stages()] == ["features", "news"]
+    assert run.spans[2]["error"] == "ValueError"
+    for record in run.spans:
+        assert record["wall_s"] >= 0 and record["cpu_s"] >= 0
+        assert record["rss_bytes"] > 0 and isinstance(record["rss_delta_bytes"], int)
+
+
+def test_failed_run_is_marked_and_still_exported(exported):
+    with pytest.raises(RuntimeError):
+        with tracing.trace("analysis") as run:
+            raise RuntimeError
+    assert exported == [run] and run.status == "error" and run.spans[-1]["error"] == "RuntimeError"
+
+
+def test_spans_outside_a_run_are_ignored(exported):
+    with tracing.span("orphan"):
+        pass
+    assert exported == []
+
+
+def test_nested_trace_is_a_span_of_the_outer_run(exported):
+    with tracing.trace("screen") as outer:
+        with tracing.trace("analysis") as inner:
+            assert inner is outer
+    assert [s["span"] for s in outer.spans] == ["analysis", "screen"]
+
+
+def test_disabled_tracing_yields_no_run(exported, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", False)
+    with tracing.trace("analysis") as run:
+        with tracing.span("features"):
+            pass
+    assert run is None and exported == []
+
+
+def test_concurrent_runs_only_see_their_own_spans(exported):
+    runs, barrier = {}, threading.Barrier(2)
+
+    def analyze(ticker):
+        with tracing.trace("analysis", ticker=ticker) as run:
+            barrier.wait()
+            with tracing.span(f"stage-{ticker}"):
+                barrier.wait()
+        runs[ticker] = run
+
+    threads = [threading.Thread(target=analyze, args=(t,)) for t in ("A", "B")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for ticker, run in runs.items():
+        assert [s["span"] for s in run.spans] == [f"stage-{ticker}", "analysis"]
+
+
+def test_export_writes_jsonl_and_prometheus(exported, tmp_path):
+    with tracing.trace("analysis", ticker='T"1') as run:
+        with tracing.span("features"):
+            pass
+    for _ in range(2):
+        export_run(run, str(tmp_path))
+    lines = (tmp_path / tracing.TRACE_LOG).read_text().splitlines()
+    assert len(lines) == 2 and json.loads(lines[0])["spans"] == run.spans
+    prom = (tmp_path / "analysis.prom").read_text()
+    assert 'stocksense_span_wall_seconds{run="analysis",ticker="T\\"1",span="features"}' in prom
+    assert "# TYPE stocksense_span_rss_delta_bytes gauge" in prom
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,82 @@
+"""Local NewsAPI stand-in that replays recorded responses.
+
+Start it with a directory of recordings and point the app at it:
+
+    python tools/newsapi_stub.py recordings/ --port 8765
+    NEWSAPI_URL=http://127.0.0.1:8765/v2/everything streamlit run stock.py
+
+Each recording is a NewsAPI response body saved as JSON. A request is answered with
+``<slug of the q parameter>.json`` if it exists, otherwise ``default.json``, otherwise an
+empty article list. With ``--upstream`` missing recordings are fetched from the real API
+once and saved, so a session can be recorded and then replayed offline.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+
+def recording_name(query):
+    return re.sub(r"[^a-z0-9]+", "_", query.lower()).strip("_") or "default"
+
+
+def make_handler(recordings_dir, delay=0.0, upstream=None):
+    class NewsApiStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            path = os.path.join(recordings_dir, recording_name(params.get("q", "")) + ".json")
+
+            if not os.path.exists(path) and upstream:
+                resp = requests.get(upstream, params=params, timeout=10)
+                if resp.status_code == 200:
+                    with open(path, "w", encoding="utf-8") as f:
+                        json.dump(resp.json(), f, indent=2)
+
+            if not os.path.exists(path):
+                path = os.path.join(recordings_dir, "default.json")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+            else:
+                body = json.dumps({"status": "ok", "totalResults": 0, "articles": []}).encode("utf-8")
+
+            if delay:
+                time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return NewsApiStubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", help="Directory of recorded NewsAPI JSON responses")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated latency per request in seconds")
+    parser.add_argument("--upstream", help="Record missing responses from this URL, e.g. https://newsapi.org/v2/everything")
+    args = parser.parse_args()
+
+    os.makedirs(args.recordings, exist_ok=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.recordings, args.delay, args.upstream))
+    print(f"Serving NewsAPI recordings from {args.recordings} on http://{args.host}:{args.port}/v2/everything")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()